@@ -53,10 +53,16 @@ lon_min, lon_max = min(lons), max(lons)
 paso_lat, paso_lon = 0.0009, 0.0012
 sensor_num = 1
 
-lat_current = lat_min
-while lat_current <= lat_max:
-    lon_current = lon_min
-    while lon_current <= lon_max:
+def cantidad_puntos(desde, hasta, paso):
+    """Puntos de desde a hasta (inclusive) cada paso; la tolerancia cuenta un borde exacto"""
+    return int(np.floor((hasta - desde) / paso + 1e-9)) + 1
+
+# Cada coordenada es borde + índice * paso: sin error acumulado entre filas
+latitudes = (lat_min + np.arange(cantidad_puntos(lat_min, lat_max, paso_lat)) * paso_lat).tolist()
+longitudes = (lon_min + np.arange(cantidad_puntos(lon_min, lon_max, paso_lon)) * paso_lon).tolist()
+
+for lat_current in latitudes:
+    for lon_current in longitudes:
         # Evitar duplicar las esquinas exactas
         es_esquina = any(abs(lat_current - e[0]) < 0.0001 and abs(lon_current - e[1]) < 0.0001 for e in esquinas)
         
@@ -69,8 +75,6 @@ while lat_current <= lat_max:
                 'tipo': 'interno'
             })
             sensor_num += 1
-        lon_current += paso_lon
-    lat_current += paso_lat
 
 df = pd.DataFrame(sensores)
 print(f"✓ Total sensores: {len(df)}")
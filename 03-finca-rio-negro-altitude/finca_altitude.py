@@ -15,11 +15,19 @@ lon_este = -67.028948
 paso_lat = 0.0008   # ~88m
 paso_lon = 0.0010   # ~88m
 
+def cantidad_puntos(desde, hasta, paso):
+    """Puntos de desde a hasta (inclusive) cada paso; la tolerancia cuenta un borde exacto"""
+    return int(np.floor((hasta - desde) / paso + 1e-9)) + 1
+
 # CALCULAR TOTAL DE PUNTOS ANTES DE CREARLOS
-num_filas = int((lat_norte - lat_sur) / paso_lat) + 1
-num_cols = int((lon_este - lon_oeste) / paso_lon) + 1
+num_filas = cantidad_puntos(lat_sur, lat_norte, paso_lat)
+num_cols = cantidad_puntos(lon_oeste, lon_este, paso_lon)
 total_puntos = num_filas * num_cols
 
+# Cada coordenada es borde + índice * paso: sin error acumulado y con las mismas filas que el resumen
+latitudes = (lat_norte - np.arange(num_filas) * paso_lat).tolist()
+longitudes = (lon_oeste + np.arange(num_cols) * paso_lon).tolist()
+
 print(f"RESUMEN PREVIO:")
 print(f"   Area: {abs(lat_norte-lat_sur)*111000:.0f}m x {abs(lon_este-lon_oeste)*111000*np.cos(np.radians(-39)):.0f}m")
 print(f"   Espaciado: ~88m entre sensores")
@@ -47,12 +55,10 @@ np.random.seed(2024)
 
 print("Generando sensores con altitud real...")
 
-lat_current = lat_norte
 sensor_num = 1
 
-while lat_current >= lat_sur:
-    lon_current = lon_oeste
-    while lon_current <= lon_este:
+for lat_current in latitudes:
+    for lon_current in longitudes:
         
         # Obtener altitud real del terreno
         inicio = time.time()
@@ -93,8 +99,6 @@ while lat_current >= lat_sur:
         })
         
         sensor_num += 1
-        lon_current += paso_lon
-    lat_current -= paso_lat
 
 df = pd.DataFrame(sensores)
 print(f"Total sensores: {len(df)}")
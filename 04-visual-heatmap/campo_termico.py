@@ -0,0 +1,124 @@
+"""
+Campo térmico sintético vectorizado (reemplaza calcular_temperatura punto a punto).
+
+Cada nivel de altura tiene una temperatura base y centros térmicos
+(lat, lon, temp); la influencia de cada centro decae como exp(-distancia * decaimiento).
+El campo completo se calcula con broadcasting NumPy sobre
+niveles x centros x puntos, en bloques de puntos para acotar la memoria.
+
+Uso como módulo:
+    from campo_termico import generar_campo
+    temps = generar_campo(lat, lon, [centros_1m, centros_2m, centros_5m, centros_10m],
+                          [12, 11.5, 11, 10.5], semilla=2024)   # (n_puntos, 4)
+
+Prueba de carga (10^6 puntos):
+    python campo_termico.py --puntos 1000000
+"""
+import time
+
+import numpy as np
+
+ALTURAS = (1, 2, 5, 10)
+COLUMNAS_TEMP = tuple(f"temp_{altura}m" for altura in ALTURAS)
+
+# Puntos por bloque: niveles x centros x bloque floats en memoria a la vez
+BLOQUE_PUNTOS = 262144
+
+
+def _generador(semilla):
+    """RandomState legado: con la misma semilla da los mismos valores que np.random.seed + np.random.normal"""
+    if isinstance(semilla, np.random.RandomState):
+        return semilla
+    if semilla is None:
+        # Mismo comportamiento que los scripts: usar el estado global de np.random
+        return np.random.mtrand._rand
+    return np.random.RandomState(semilla)
+
+
+def generar_campo(lat, lon, centros_por_nivel, temp_base_por_nivel,
+                  decaimiento=800.0, ruido=0.8, semilla=None, bloque=BLOQUE_PUNTOS):
+    """
+    Temperaturas de todos los puntos para todos los niveles.
+
+    lat, lon: arrays de n puntos.
+    centros_por_nivel: por nivel, lista de (lat, lon, temp) (misma cantidad de centros por nivel).
+    temp_base_por_nivel: temperatura base de cada nivel.
+    ruido: desvío del ruido gaussiano (0 = sin ruido).
+    semilla: int, RandomState o None (estado global de np.random).
+
+    Devuelve un array (n_puntos, n_niveles). El ruido se sortea en el mismo
+    orden que el loop original (punto por punto, nivel por nivel).
+    """
+    lat = np.asarray(lat, dtype=np.float64).ravel()
+    lon = np.asarray(lon, dtype=np.float64).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError("lat y lon deben tener la misma cantidad de puntos")
+
+    centros = np.asarray(centros_por_nivel, dtype=np.float64)
+    if centros.ndim != 3 or centros.shape[2] != 3:
+        raise ValueError("centros_por_nivel debe ser (niveles, centros, 3) con (lat, lon, temp)")
+    temp_base = np.asarray(temp_base_por_nivel, dtype=np.float64)
+    if temp_base.shape != (centros.shape[0],):
+        raise ValueError("Se necesita una temperatura base por nivel")
+
+    # (niveles, centros, 1) contra (1, 1, puntos)
+    lat_c = centros[:, :, 0, None]
+    lon_c = centros[:, :, 1, None]
+    amplitud = (centros[:, :, 2] - temp_base[:, None])[:, :, None]
+
+    n = len(lat)
+    campo = np.empty((n, len(temp_base)), dtype=np.float64)
+    for inicio in range(0, n, bloque):
+        fin = min(inicio + bloque, n)
+        distancia = np.hypot(lat[None, None, inicio:fin] - lat_c, lon[None, None, inicio:fin] - lon_c)
+        influencia = (amplitud * np.exp(-distancia * decaimiento)).sum(axis=1)
+        campo[inicio:fin] = (temp_base[:, None] + influencia).T
+
+    if ruido:
+        campo += _generador(semilla).normal(0, ruido, size=campo.shape)
+    return campo
+
+
+def _calcular_temperatura(lat, lon, centros, temp_base, decaimiento=800.0, ruido=0.8):
+    """Versión original punto a punto (solo para comparar en la prueba de carga)"""
+    temp = temp_base
+    for lat_c, lon_c, temp_c in centros:
+        distancia = np.sqrt((lat - lat_c)**2 + (lon - lon_c)**2)
+        temp += (temp_c - temp_base) * np.exp(-distancia * decaimiento)
+    return temp + np.random.normal(0, ruido)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prueba de carga del campo térmico sintético")
+    parser.add_argument("--puntos", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    centros = [
+        [(-39.164, -67.035, 18), (-39.167, -67.031, 16)],
+        [(-39.165, -67.036, 17), (-39.168, -67.032, 15)],
+        [(-39.166, -67.034, 16), (-39.164, -67.030, 14)],
+        [(-39.167, -67.035, 15), (-39.165, -67.031, 13)],
+    ]
+    bases = [12, 11.5, 11, 10.5]
+    rng = np.random.default_rng(0)
+    lat = -39.169029 + rng.random(args.puntos) * 0.005477
+    lon = -67.038406 + rng.random(args.puntos) * 0.009458
+
+    inicio = time.perf_counter()
+    campo = generar_campo(lat, lon, centros, bases, semilla=2024)
+    vectorizado = time.perf_counter() - inicio
+
+    # Punto a punto sobre una muestra y extrapolado
+    muestra = min(args.puntos, 20_000)
+    inicio = time.perf_counter()
+    for i in range(muestra):
+        for centros_nivel, base in zip(centros, bases):
+            _calcular_temperatura(lat[i], lon[i], centros_nivel, base)
+    por_punto = (time.perf_counter() - inicio) / muestra * args.puntos
+
+    print(f"{args.puntos:,} puntos x {len(bases)} niveles")
+    print(f"Vectorizado:    {vectorizado:8.2f} s")
+    print(f"Punto a punto: ~{por_punto:8.2f} s (extrapolado de {muestra:,} puntos)")
+    print(f"Temp 1m: {campo[:, 0].min():.1f} - {campo[:, 0].max():.1f}°C")
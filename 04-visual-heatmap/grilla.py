@@ -0,0 +1,108 @@
+"""
+Grilla regular de puntos (sensores o celdas) sin error acumulado de punto flotante.
+
+Reemplaza los loops `while lat_current >= lat_sur: ... lon_current += paso_lon`:
+cada coordenada se calcula como borde + índice * paso, con la cantidad
+exacta de filas y columnas, en una sola llamada estilo meshgrid.
+Orden fila por fila (norte → sur, oeste → este), igual que los loops.
+
+Uso:
+    from grilla import construir_grilla, grilla_dataframe
+    lat, lon = construir_grilla(lat_norte, lat_sur, lon_oeste, lon_este, paso_m=88)
+    lat, lon = construir_grilla(lat_norte, lat_sur, lon_oeste, lon_este, paso_lat=0.0008, paso_lon=0.0010)
+    df = grilla_dataframe(lat_norte, lat_sur, lon_oeste, lon_este, paso_m=88, poligono=vertices)
+"""
+import numpy as np
+
+METROS_POR_GRADO = 111320.0
+# Tolerancia para que un borde que cae justo en un múltiplo del paso cuente como fila/columna
+_TOLERANCIA = 1e-9
+
+
+def pasos_en_grados(paso_m, lat_ref):
+    """(paso_lat, paso_lon) en grados equivalentes a paso_m metros a la latitud lat_ref"""
+    paso_lat = paso_m / METROS_POR_GRADO
+    paso_lon = paso_m / (METROS_POR_GRADO * np.cos(np.radians(lat_ref)))
+    return paso_lat, paso_lon
+
+
+def _resolver_pasos(norte, sur, paso_m, paso_lat, paso_lon):
+    if paso_m is not None:
+        return pasos_en_grados(paso_m, (norte + sur) / 2)
+    if paso_lat is None or paso_lon is None:
+        raise ValueError("Indicar paso_m o paso_lat y paso_lon")
+    return paso_lat, paso_lon
+
+
+def dimensiones(norte, sur, oeste, este, paso_m=None, paso_lat=None, paso_lon=None):
+    """(filas, columnas) exactas de la grilla"""
+    if norte < sur or este < oeste:
+        raise ValueError("Bordes inválidos: se espera norte >= sur y este >= oeste")
+    paso_lat, paso_lon = _resolver_pasos(norte, sur, paso_m, paso_lat, paso_lon)
+    if paso_lat <= 0 or paso_lon <= 0:
+        raise ValueError("El paso debe ser positivo")
+    filas = int(np.floor((norte - sur) / paso_lat + _TOLERANCIA)) + 1
+    columnas = int(np.floor((este - oeste) / paso_lon + _TOLERANCIA)) + 1
+    return filas, columnas
+
+
+def malla(norte, sur, oeste, este, paso_m=None, paso_lat=None, paso_lon=None):
+    """Arrays 2-D (filas, columnas) de latitud y longitud"""
+    filas, columnas = dimensiones(norte, sur, oeste, este, paso_m, paso_lat, paso_lon)
+    paso_lat, paso_lon = _resolver_pasos(norte, sur, paso_m, paso_lat, paso_lon)
+    lats = norte - np.arange(filas) * paso_lat
+    lons = oeste + np.arange(columnas) * paso_lon
+    return np.meshgrid(lats, lons, indexing="ij")
+
+
+def dentro_de_poligono(lat, lon, poligono):
+    """
+    Máscara de los puntos dentro del polígono [(lat, lon), ...] (ray casting).
+
+    Vectorizado sobre los puntos; el loop es solo sobre los lados del polígono.
+    """
+    vertices = np.asarray(poligono, dtype=np.float64)
+    if vertices.ndim != 2 or vertices.shape[1] != 2 or len(vertices) < 3:
+        raise ValueError("El polígono necesita al menos 3 vértices (lat, lon)")
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+
+    dentro = np.zeros(lat.shape, dtype=bool)
+    lat_a, lon_a = vertices[:, 0], vertices[:, 1]
+    lat_b, lon_b = np.roll(lat_a, -1), np.roll(lon_a, -1)
+    for y1, x1, y2, x2 in zip(lat_a, lon_a, lat_b, lon_b):
+        if y1 == y2:
+            continue
+        # El lado cruza la horizontal del punto y el cruce queda al este del punto
+        cruza = (y1 > lat) != (y2 > lat)
+        x_cruce = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+        dentro ^= cruza & (lon < x_cruce)
+    return dentro
+
+
+def construir_grilla(norte, sur, oeste, este, paso_m=None, paso_lat=None, paso_lon=None, poligono=None):
+    """
+    Arrays 1-D (lat, lon) de la grilla en orden fila por fila.
+
+    paso_m: separación en metros; o paso_lat / paso_lon en grados.
+    poligono: vértices [(lat, lon), ...] para quedarse solo con los puntos dentro de la finca.
+    """
+    lat, lon = malla(norte, sur, oeste, este, paso_m, paso_lat, paso_lon)
+    lat, lon = lat.ravel(), lon.ravel()
+    if poligono is not None:
+        dentro = dentro_de_poligono(lat, lon, poligono)
+        lat, lon = lat[dentro], lon[dentro]
+    return lat, lon
+
+
+def grilla_dataframe(norte, sur, oeste, este, paso_m=None, paso_lat=None, paso_lon=None,
+                     poligono=None, prefijo_id="S_"):
+    """DataFrame con latitude, longitude y sensor_id (S_001, S_002, ...)"""
+    import pandas as pd
+
+    lat, lon = construir_grilla(norte, sur, oeste, este, paso_m, paso_lat, paso_lon, poligono)
+    return pd.DataFrame({
+        "latitude": lat,
+        "longitude": lon,
+        "sensor_id": [f"{prefijo_id}{num:03d}" for num in range(1, len(lat) + 1)],
+    })
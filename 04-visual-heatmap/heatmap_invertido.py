@@ -3,6 +3,9 @@ import numpy as np
 import requests
 import time
 
+from campo_termico import COLUMNAS_TEMP, generar_campo
+from grilla import construir_grilla
+
 print("=== HEATMAP 3D COLORES INVERTIDOS - ROJO=FRIO, AZUL=CALIENTE ===")
 print("Rango térmico: -5°C a 20°C")
 print("ROJO = Temperaturas bajas (-5°C) - ALARMA")
@@ -29,9 +32,6 @@ def obtener_altitud_real(lat, lon):
     except:
         return 280
 
-sensores = []
-np.random.seed(2024)
-
 print("Generando 80 sensores con amplitud térmica mayor...")
 
 # Centros térmicos con rango más realista
@@ -40,54 +40,37 @@ centros_2m = [(-39.165, -67.036, 16), (-39.168, -67.032, 6)]
 centros_5m = [(-39.166, -67.034, 14), (-39.164, -67.030, 4)]
 centros_10m = [(-39.167, -67.035, 12), (-39.165, -67.031, 2)]
 
-def calcular_temperatura(lat, lon, centros, temp_base):
-    temp = temp_base
-    for lat_c, lon_c, temp_c in centros:
-        distancia = np.sqrt((lat - lat_c)**2 + (lon - lon_c)**2)
-        influencia = np.exp(-distancia * 600)  # Mayor influencia para más variación
-        temp += (temp_c - temp_base) * influencia
-    return temp + np.random.normal(0, 2)  # Más ruido para mayor variación
+# Grilla completa de una vez: filas y columnas exactas, sin acumular error de punto flotante
+latitudes, longitudes = construir_grilla(lat_norte, lat_sur, lon_oeste, lon_este, paso_lat=paso_lat, paso_lon=paso_lon)
+altitudes = []
+
+for sensor_num, (lat, lon) in enumerate(zip(latitudes, longitudes), start=1):
+    # Obtener altitud real
+    altitud_terreno = obtener_altitud_real(lat, lon)
+    print(f"Sensor {sensor_num} -> Altitud: {altitud_terreno}m")
+    time.sleep(0.05)
+    altitudes.append(altitud_terreno)
 
-lat_current = lat_norte
-sensor_num = 1
+# Generar temperaturas con rango más equilibrado: mayor influencia (600) y más ruido (2)
+temps = np.round(generar_campo(
+    latitudes, longitudes,
+    [centros_1m, centros_2m, centros_5m, centros_10m],
+    [12, 11, 10, 9],
+    decaimiento=600,
+    ruido=2,
+    semilla=2024
+), 1)
 
-while lat_current >= lat_sur:
-    lon_current = lon_oeste
-    while lon_current <= lon_este:
-        
-        # Obtener altitud real
-        altitud_terreno = obtener_altitud_real(lat_current, lon_current)
-        print(f"Sensor {sensor_num} -> Altitud: {altitud_terreno}m")
-        time.sleep(0.05)
-        
-        # Generar temperaturas con rango más equilibrado
-        temp_1m = round(calcular_temperatura(lat_current, lon_current, centros_1m, 12), 1)
-        temp_2m = round(calcular_temperatura(lat_current, lon_current, centros_2m, 11), 1)
-        temp_5m = round(calcular_temperatura(lat_current, lon_current, centros_5m, 10), 1)
-        temp_10m = round(calcular_temperatura(lat_current, lon_current, centros_10m, 9), 1)
-        
-        # Asegurar rango 2°C a 20°C (más equilibrado)
-        temp_1m = max(2, min(20, temp_1m))
-        temp_2m = max(2, min(20, temp_2m))
-        temp_5m = max(2, min(20, temp_5m))
-        temp_10m = max(2, min(20, temp_10m))
-        
-        sensores.append({
-            'latitude': lat_current,
-            'longitude': lon_current,
-            'altitude_terrain': altitud_terreno,
-            'temp_1m': temp_1m,
-            'temp_2m': temp_2m,
-            'temp_5m': temp_5m,
-            'temp_10m': temp_10m,
-            'sensor_id': f'S_{sensor_num:03d}'
-        })
-        
-        sensor_num += 1
-        lon_current += paso_lon
-    lat_current -= paso_lat
+# Asegurar rango 2°C a 20°C (más equilibrado)
+temps = np.clip(temps, 2, 20)
 
-df = pd.DataFrame(sensores)
+df = pd.DataFrame({
+    'latitude': latitudes,
+    'longitude': longitudes,
+    'altitude_terrain': altitudes,
+    **dict(zip(COLUMNAS_TEMP, temps.T)),
+    'sensor_id': [f'S_{num:03d}' for num in range(1, len(latitudes) + 1)]
+})
 print(f"Sensores: {len(df)}")
 print(f"Altitud: {df['altitude_terrain'].min():.1f} - {df['altitude_terrain'].max():.1f}m")
 print(f"Temp 1m: {df['temp_1m'].min():.1f} - {df['temp_1m'].max():.1f}°C")
@@ -3,6 +3,9 @@ import numpy as np
 import requests
 import time
 
+from campo_termico import ALTURAS, COLUMNAS_TEMP, generar_campo
+from grilla import construir_grilla
+
 print("=== HEATMAP 3D CON THRESHOLD Y COLORES INVERTIDOS ===")
 
 # CONFIGURACIÓN DE THRESHOLD
@@ -32,9 +35,6 @@ def obtener_altitud_real(lat, lon):
     except:
         return 280
 
-sensores = []
-np.random.seed(2024)
-
 print("Generando 80 sensores con threshold analysis...")
 
 # Centros térmicos diferentes para cada altura
@@ -43,57 +43,36 @@ centros_2m = [(-39.165, -67.036, 17), (-39.168, -67.032, 15)]
 centros_5m = [(-39.166, -67.034, 16), (-39.164, -67.030, 14)]
 centros_10m = [(-39.167, -67.035, 15), (-39.165, -67.031, 13)]
 
-def calcular_temperatura(lat, lon, centros, temp_base):
-    temp = temp_base
-    for lat_c, lon_c, temp_c in centros:
-        distancia = np.sqrt((lat - lat_c)**2 + (lon - lon_c)**2)
-        influencia = np.exp(-distancia * 800)
-        temp += (temp_c - temp_base) * influencia
-    return temp + np.random.normal(0, 0.8)
-
-lat_current = lat_norte
-sensor_num = 1
-
-while lat_current >= lat_sur:
-    lon_current = lon_oeste
-    while lon_current <= lon_este:
-        
-        # Obtener altitud real
-        altitud_terreno = obtener_altitud_real(lat_current, lon_current)
-        print(f"Sensor {sensor_num} -> Altitud: {altitud_terreno}m")
-        time.sleep(0.05)
-        
-        temp_1m = round(calcular_temperatura(lat_current, lon_current, centros_1m, 12), 1)
-        temp_2m = round(calcular_temperatura(lat_current, lon_current, centros_2m, 11.5), 1)
-        temp_5m = round(calcular_temperatura(lat_current, lon_current, centros_5m, 11), 1)
-        temp_10m = round(calcular_temperatura(lat_current, lon_current, centros_10m, 10.5), 1)
-        
-        # Crear campos de threshold (1 = por debajo, 0 = por encima)
-        threshold_1m = 1 if temp_1m < THRESHOLD_TEMP else 0
-        threshold_2m = 1 if temp_2m < THRESHOLD_TEMP else 0
-        threshold_5m = 1 if temp_5m < THRESHOLD_TEMP else 0
-        threshold_10m = 1 if temp_10m < THRESHOLD_TEMP else 0
-        
-        sensores.append({
-            'latitude': lat_current,
-            'longitude': lon_current,
-            'altitude_terrain': altitud_terreno,
-            'temp_1m': temp_1m,
-            'temp_2m': temp_2m,
-            'temp_5m': temp_5m,
-            'temp_10m': temp_10m,
-            'threshold_1m': threshold_1m,
-            'threshold_2m': threshold_2m,
-            'threshold_5m': threshold_5m,
-            'threshold_10m': threshold_10m,
-            'sensor_id': f'S_{sensor_num:03d}'
-        })
-        
-        sensor_num += 1
-        lon_current += paso_lon
-    lat_current -= paso_lat
-
-df = pd.DataFrame(sensores)
+# Grilla completa de una vez: filas y columnas exactas, sin acumular error de punto flotante
+latitudes, longitudes = construir_grilla(lat_norte, lat_sur, lon_oeste, lon_este, paso_lat=paso_lat, paso_lon=paso_lon)
+altitudes = []
+
+for sensor_num, (lat, lon) in enumerate(zip(latitudes, longitudes), start=1):
+    # Obtener altitud real
+    altitud_terreno = obtener_altitud_real(lat, lon)
+    print(f"Sensor {sensor_num} -> Altitud: {altitud_terreno}m")
+    time.sleep(0.05)
+    altitudes.append(altitud_terreno)
+
+# Las 4 capas de todos los sensores en una sola pasada vectorizada
+temps = np.round(generar_campo(
+    latitudes, longitudes,
+    [centros_1m, centros_2m, centros_5m, centros_10m],
+    [12, 11.5, 11, 10.5],
+    semilla=2024
+), 1)
+
+# Campos de threshold (1 = por debajo, 0 = por encima)
+threshold = (temps < THRESHOLD_TEMP).astype(int)
+
+df = pd.DataFrame({
+    'latitude': latitudes,
+    'longitude': longitudes,
+    'altitude_terrain': altitudes,
+    **dict(zip(COLUMNAS_TEMP, temps.T)),
+    **{f'threshold_{altura}m': threshold[:, i] for i, altura in enumerate(ALTURAS)},
+    'sensor_id': [f'S_{num:03d}' for num in range(1, len(latitudes) + 1)]
+})
 print(f"Sensores: {len(df)}")
 print(f"Altitud: {df['altitude_terrain'].min():.1f} - {df['altitude_terrain'].max():.1f}m")
 print(f"Temp 1m: {df['temp_1m'].min():.1f} - {df['temp_1m'].max():.1f}°C")
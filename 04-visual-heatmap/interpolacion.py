@@ -0,0 +1,270 @@
+"""
+Superficies continuas de temperatura por IDW (inverse distance weighting) sobre los k vecinos más cercanos.
+
+Los sensores se proyectan a metros (equirectangular local) y los vecinos
+de todas las celdas del raster se buscan con un KD-tree (scipy cKDTree,
+en paralelo con workers=-1). Los pesos quedan en una matriz dispersa
+W (celdas x sensores) y cada nivel de altura es un producto W @ lecturas.
+Los sensores casi no se mueven: W se guarda en cache por disposición
+(hash de posiciones + raster + k + potencia) y una lectura nueva es solo W @ lecturas.
+
+Uso:
+    from interpolacion import Raster, superficie_idw
+    raster = Raster.desde_paso(lat_norte, lat_sur, lon_oeste, lon_este, paso_m=5)
+    superficie = superficie_idw(df['latitude'], df['longitude'], df[COLUMNAS_TEMP], raster)  # (4, filas, columnas)
+
+Prueba de rendimiento (raster 1000x1000, 10.000 sensores; primera superficie y con W en cache):
+    python interpolacion.py
+La primera superficie es casi toda la consulta al KD-tree (~1 µs por celda y
+núcleo): ~1,3–1,7 s en un núcleo; por debajo de 1 s hacen falta 2 núcleos, mejor 4.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import scipy.sparse as sparse
+from scipy.spatial import cKDTree
+
+from grilla import METROS_POR_GRADO, dimensiones, pasos_en_grados
+
+K_VECINOS = 8
+POTENCIA = 2.0
+# Celdas por consulta al KD-tree: acota la memoria de distancias/índices intermedios
+BLOQUE_CELDAS = 262144
+
+# Matrices W ya calculadas por disposición de sensores, con tope en bytes: un raster
+# 1000x1000 con k=8 ocupa ~100 MB, uno de 200x200 ~4 MB
+MAX_BYTES_CACHE_PESOS = 256 * 2 ** 20
+_pesos_cache: "OrderedDict[str, sparse.csr_matrix]" = OrderedDict()
+
+
+class Raster(NamedTuple):
+    """Raster regular: centros de celda desde (norte, oeste) hasta (sur, este), filas x columnas"""
+    norte: float
+    sur: float
+    oeste: float
+    este: float
+    filas: int
+    columnas: int
+
+    @classmethod
+    def desde_paso(cls, norte, sur, oeste, este, paso_m=None, paso_lat=None, paso_lon=None):
+        """Raster con el paso de grilla.py (cantidad exacta de filas y columnas)"""
+        filas, columnas = dimensiones(norte, sur, oeste, este, paso_m, paso_lat, paso_lon)
+        if paso_m is not None:
+            paso_lat, paso_lon = pasos_en_grados(paso_m, (norte + sur) / 2)
+        # Última fila/columna sobre la grilla, no sobre el borde
+        return cls(norte, norte - (filas - 1) * paso_lat, oeste, oeste + (columnas - 1) * paso_lon, filas, columnas)
+
+    @property
+    def celdas(self) -> int:
+        return self.filas * self.columnas
+
+    def coordenadas(self):
+        """Arrays 1-D (lat, lon) de los centros de celda, fila por fila"""
+        lats = np.linspace(self.norte, self.sur, self.filas)
+        lons = np.linspace(self.oeste, self.este, self.columnas)
+        lat, lon = np.meshgrid(lats, lons, indexing="ij")
+        return lat.ravel(), lon.ravel()
+
+
+def a_metros(lat, lon, lat_ref):
+    """Coordenadas (y, x) en metros respecto del ecuador / meridiano 0 a escala de lat_ref"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    escala_lon = METROS_POR_GRADO * np.cos(np.radians(lat_ref))
+    return np.column_stack((lat * METROS_POR_GRADO, lon * escala_lon))
+
+
+def matriz_pesos(lat_s, lon_s, lat_p, lon_p, k=K_VECINOS, potencia=POTENCIA, bloque=BLOQUE_CELDAS):
+    """
+    Matriz dispersa W (puntos x sensores) de pesos IDW normalizados.
+
+    Cada fila tiene los k vecinos más cercanos del punto con peso 1/d^potencia;
+    un punto que coincide con un sensor toma el valor de ese sensor.
+    """
+    lat_s = np.asarray(lat_s, dtype=np.float64)
+    lat_p = np.asarray(lat_p, dtype=np.float64)
+    n_sensores = len(lat_s)
+    if n_sensores == 0:
+        raise ValueError("Se necesita al menos un sensor")
+    k = min(k, n_sensores)
+
+    lat_ref = float(np.mean(lat_s))
+    arbol = cKDTree(a_metros(lat_s, lon_s, lat_ref))
+    puntos = a_metros(lat_p, lon_p, lat_ref)
+
+    n = len(puntos)
+    pesos = np.empty((n, k), dtype=np.float64)
+    indices = np.empty((n, k), dtype=np.int32)
+    for inicio in range(0, n, bloque):
+        fin = min(inicio + bloque, n)
+        distancia, vecinos = arbol.query(puntos[inicio:fin], k=k, workers=-1)
+        distancia = distancia.reshape(fin - inicio, k)
+        indices[inicio:fin] = vecinos.reshape(fin - inicio, k)
+
+        pesos[inicio:fin] = _pesos_idw(distancia, potencia)
+
+    return _csr_vecinos(pesos, indices, n_sensores)
+
+
+def _pesos_idw(distancia, potencia):
+    """Pesos 1/d^potencia normalizados por fila (distancias ordenadas de menor a mayor)"""
+    exacto = distancia[:, 0] == 0
+    with np.errstate(divide="ignore"):
+        peso = 1.0 / distancia ** potencia
+    # Celda sobre un sensor: todo el peso para ese sensor
+    peso[exacto] = 0.0
+    peso[exacto, 0] = 1.0
+    return peso / peso.sum(axis=1, keepdims=True)
+
+
+def _csr_vecinos(pesos, indices, n_sensores):
+    n, k = pesos.shape
+    return sparse.csr_matrix(
+        (pesos.ravel(), indices.ravel(), np.arange(0, n * k + 1, k)),
+        shape=(n, n_sensores)
+    )
+
+
+def clave_disposicion(lat_s, lon_s, raster, k=K_VECINOS, potencia=POTENCIA):
+    """Hash de las posiciones de los sensores, el raster y los parámetros IDW"""
+    clave = hashlib.sha1()
+    clave.update(np.ascontiguousarray(lat_s, dtype=np.float64).tobytes())
+    clave.update(np.ascontiguousarray(lon_s, dtype=np.float64).tobytes())
+    clave.update(repr((tuple(raster), int(k), float(potencia))).encode())
+    return clave.hexdigest()
+
+
+def pesos_raster(lat_s, lon_s, raster, k=K_VECINOS, potencia=POTENCIA):
+    """W (celdas x sensores) del raster: se calcula una vez por disposición y se reutiliza"""
+    clave = clave_disposicion(lat_s, lon_s, raster, k, potencia)
+    pesos = _pesos_cache.get(clave)
+    if pesos is not None:
+        _pesos_cache.move_to_end(clave)
+        return pesos
+
+    lat_p, lon_p = raster.coordenadas()
+    pesos = matriz_pesos(lat_s, lon_s, lat_p, lon_p, k, potencia)
+    _pesos_cache[clave] = pesos
+    # Se descartan las menos usadas hasta entrar en el tope; la recién calculada siempre queda
+    while len(_pesos_cache) > 1 and sum(map(_bytes_pesos, _pesos_cache.values())) > MAX_BYTES_CACHE_PESOS:
+        _pesos_cache.popitem(last=False)
+    return pesos
+
+
+def _bytes_pesos(pesos):
+    """Memoria de una matriz W en CSR (datos, índices de columna y punteros de fila)"""
+    return pesos.data.nbytes + pesos.indices.nbytes + pesos.indptr.nbytes
+
+
+def limpiar_cache_pesos():
+    """Vacía el cache de matrices W (p. ej. después de mover sensores)"""
+    _pesos_cache.clear()
+
+
+def aplicar_pesos(pesos, valores):
+    """W @ valores por nivel; los sensores sin lectura (NaN) en un nivel se excluyen y se renormaliza"""
+    valores = np.asarray(valores, dtype=np.float64)
+    plano = valores.ndim == 1
+    valores = valores.reshape(len(valores), -1)
+
+    faltantes = np.isnan(valores)
+    if not faltantes.any():
+        resultado = pesos @ valores
+    else:
+        resultado = np.empty((pesos.shape[0], valores.shape[1]))
+        for nivel in range(valores.shape[1]):
+            validos = (~faltantes[:, nivel]).astype(np.float64)
+            suma = pesos @ validos
+            with np.errstate(invalid="ignore", divide="ignore"):
+                # Celdas cuyos k vecinos no tienen lectura quedan en NaN
+                resultado[:, nivel] = (pesos @ np.nan_to_num(valores[:, nivel])) / suma
+    return resultado[:, 0] if plano else resultado
+
+
+def interpolar_idw(lat_s, lon_s, valores, lat_p, lon_p, k=K_VECINOS, potencia=POTENCIA):
+    """Valores IDW en puntos arbitrarios: (n_puntos,) o (n_puntos, niveles) según valores"""
+    return aplicar_pesos(matriz_pesos(lat_s, lon_s, lat_p, lon_p, k, potencia), valores)
+
+
+def validacion_cruzada_idw(lat_s, lon_s, valores, k=K_VECINOS, potencia=POTENCIA):
+    """Errores leave-one-out (estimado - lectura): cada sensor interpolado desde los demás"""
+    lat_s = np.asarray(lat_s, dtype=np.float64)
+    n_sensores = len(lat_s)
+    if n_sensores < 2:
+        raise ValueError("Se necesitan al menos dos sensores")
+    k = min(k, n_sensores - 1)
+
+    puntos = a_metros(lat_s, lon_s, float(np.mean(lat_s)))
+    distancia, vecinos = cKDTree(puntos).query(puntos, k=k + 1, workers=-1)
+    propio = vecinos == np.arange(n_sensores)[:, None]
+    # Sensores con coordenadas repetidas pueden no verse a sí mismos: se descarta el más lejano
+    propio[~propio.any(axis=1), -1] = True
+    distancia = distancia[~propio].reshape(n_sensores, k)
+    vecinos = vecinos[~propio].reshape(n_sensores, k)
+
+    pesos = _csr_vecinos(_pesos_idw(distancia, potencia), vecinos, n_sensores)
+    valores = np.asarray(valores, dtype=np.float64)
+    return aplicar_pesos(pesos, valores) - valores
+
+
+def superficie_idw(lat_s, lon_s, valores, raster, k=K_VECINOS, potencia=POTENCIA):
+    """Superficie continua (niveles, filas, columnas) sobre el raster, con W en cache por disposición"""
+    resultado = aplicar_pesos(pesos_raster(lat_s, lon_s, raster, k, potencia), valores)
+    return resultado.reshape(raster.celdas, -1).T.reshape(-1, raster.filas, raster.columnas)
+
+
+def raster_dataframe(raster, superficie, columnas):
+    """DataFrame latitude/longitude + una columna por nivel (para Kepler o CSV)"""
+    import pandas as pd
+
+    lat, lon = raster.coordenadas()
+    superficie = np.asarray(superficie).reshape(len(columnas), -1)
+    return pd.DataFrame({"latitude": lat, "longitude": lon, **dict(zip(columnas, superficie))})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from campo_termico import generar_campo
+
+    parser = argparse.ArgumentParser(description="Prueba de rendimiento de la interpolación IDW")
+    parser.add_argument("--sensores", type=int, default=10_000)
+    parser.add_argument("--lado", type=int, default=1000, help="Raster de lado x lado celdas")
+    parser.add_argument("--k", type=int, default=K_VECINOS)
+    args = parser.parse_args()
+
+    lat_norte, lat_sur, lon_oeste, lon_este = -39.163552, -39.169029, -67.038406, -67.028948
+    centros = [
+        [(-39.164, -67.035, 18), (-39.167, -67.031, 16)],
+        [(-39.165, -67.036, 17), (-39.168, -67.032, 15)],
+        [(-39.166, -67.034, 16), (-39.164, -67.030, 14)],
+        [(-39.167, -67.035, 15), (-39.165, -67.031, 13)],
+    ]
+    rng = np.random.default_rng(0)
+    lat_s = lat_sur + rng.random(args.sensores) * (lat_norte - lat_sur)
+    lon_s = lon_oeste + rng.random(args.sensores) * (lon_este - lon_oeste)
+    lecturas = generar_campo(lat_s, lon_s, centros, [12, 11.5, 11, 10.5], semilla=2024)
+    raster = Raster(lat_norte, lat_sur, lon_oeste, lon_este, args.lado, args.lado)
+
+    inicio = time.perf_counter()
+    superficie = superficie_idw(lat_s, lon_s, lecturas, raster, k=args.k)
+    total = time.perf_counter() - inicio
+
+    # Lecturas nuevas sobre la misma disposición: solo W @ lecturas
+    nuevas = lecturas + rng.normal(0, 0.5, lecturas.shape)
+    repeticiones = 5
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        superficie_idw(lat_s, lon_s, nuevas, raster, k=args.k)
+    cacheada = (time.perf_counter() - inicio) / repeticiones
+
+    print(f"Raster {args.lado}x{args.lado} ({raster.celdas:,} celdas) desde {args.sensores:,} sensores, "
+          f"k={args.k}, {os.cpu_count()} núcleo(s)")
+    print(f"Superficie de {superficie.shape[0]} niveles: {total:.2f} s (primera), "
+          f"{cacheada * 1000:.1f} ms (W en cache)")
+    print(f"Temp 1m: {np.nanmin(superficie[0]):.1f} - {np.nanmax(superficie[0]):.1f}°C")
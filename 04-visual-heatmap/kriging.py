@@ -0,0 +1,430 @@
+"""
+Kriging ordinario con factorización en cache y raster de varianza de predicción.
+
+El variograma (modelo esférico, exponencial o gaussiano; el gaussiano
+equivale a una interpolación RBF gaussiana con media constante) se ajusta
+una vez por disposición de sensores. La matriz de covarianza entre sensores
+se factoriza con Cholesky una sola vez y se reutiliza: cada lectura nueva es
+una sustitución hacia atrás (n²) más C(celdas, sensores) @ alfa.
+La varianza de predicción no depende de las lecturas: se calcula una vez
+por raster y queda en cache junto con la covarianza celdas x sensores.
+
+Uso:
+    from kriging import superficie_kriging
+    superficie, varianza = superficie_kriging(df['latitude'], df['longitude'], df[COLUMNAS_TEMP], raster)
+    # (4, filas, columnas) cada una; varianza en °C², sqrt(varianza) = desvío de la predicción
+
+Comparación con IDW (velocidad y error leave-one-out):
+    python kriging.py
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from scipy.linalg import LinAlgError, cho_factor, cho_solve, lapack, solve_triangular
+from scipy.optimize import curve_fit
+from scipy.spatial.distance import cdist, pdist
+
+from interpolacion import Raster, a_metros
+
+MODELOS = ("esferico", "exponencial", "gaussiano")
+CLASES_VARIOGRAMA = 15
+# Sensores usados para el variograma empírico (los pares crecen como n²)
+MAX_SENSORES_VARIOGRAMA = 2000
+# Celdas x sensores por bloque de covarianza cruzada
+BLOQUE_ELEMENTOS = 2 ** 22
+# Covarianza celdas x sensores guardada por raster (float32) si no supera esta cantidad de elementos (128 MB)
+MAX_ELEMENTOS_CACHE = 2 ** 25
+# Se suma a la diagonal para que Cholesky no falle con pepita ~0 (esférico, exponencial)
+_ESTABILIZADOR = 1e-8
+# Pepita mínima del gaussiano por sensor: sin pepita la covarianza gaussiana es casi singular
+# (cond ~1e12 con 500 sensores) y la superficie oscila lejos de los sensores
+PEPITA_MIN_GAUSSIANO_POR_SENSOR = 2e-7
+# Condición máxima (norma 1) de la covarianza entre sensores: más allá la solución pierde más de 7 dígitos
+MAX_CONDICION = 1e9
+
+# Motores ya factorizados por disposición de sensores
+_MOTORES_CACHE_TAMANO = 8
+_motores_cache: "OrderedDict[str, Kriging]" = OrderedDict()
+
+
+class Variograma(NamedTuple):
+    """Variograma ajustado: alcance en metros, pepita como fracción de la meseta, meseta (°C²) por nivel"""
+    modelo: str
+    alcance: float
+    pepita: float
+    mesetas: Tuple[float, ...]
+
+
+def correlacion(distancia, modelo, alcance):
+    """Correlación (1 en distancia 0) del modelo a la distancia dada, alcance práctico en metros"""
+    r = np.asarray(distancia, dtype=np.float64) / alcance
+    if modelo == "esferico":
+        return np.where(r < 1, 1 - 1.5 * r + 0.5 * r ** 3, 0.0)
+    if modelo == "exponencial":
+        return np.exp(-3 * r)
+    if modelo == "gaussiano":
+        return np.exp(-3 * r ** 2)
+    raise ValueError(f"Modelo de variograma desconocido: {modelo} (opciones: {', '.join(MODELOS)})")
+
+
+def pepita_minima(modelo, n_sensores):
+    """Pepita mínima (fracción de la meseta) del ajuste: solo el gaussiano la necesita y crece con los sensores"""
+    if modelo == "gaussiano":
+        return min(PEPITA_MIN_GAUSSIANO_POR_SENSOR * n_sensores, 0.1)
+    return 0.0
+
+
+def _a_matriz(valores):
+    valores = np.asarray(valores, dtype=np.float64)
+    return valores.reshape(len(valores), -1)
+
+
+def variograma_empirico(puntos, valores, clases=CLASES_VARIOGRAMA, max_sensores=MAX_SENSORES_VARIOGRAMA):
+    """
+    (distancia media, semivarianza, pares) por clase de distancia.
+
+    Cada nivel se estandariza (media 0, varianza 1) y las semivarianzas de
+    todos los niveles se promedian: la meseta normalizada es 1.
+    """
+    valores = _a_matriz(valores)
+    if len(puntos) > max_sensores:
+        muestra = np.random.default_rng(0).choice(len(puntos), max_sensores, replace=False)
+        puntos, valores = puntos[muestra], valores[muestra]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        estandar = (valores - np.nanmean(valores, axis=0)) / np.nanstd(valores, axis=0)
+
+    distancia = pdist(puntos)
+    filas, columnas = np.triu_indices(len(puntos), k=1)
+    with np.errstate(invalid="ignore"):
+        gamma = np.nanmean(0.5 * (estandar[filas] - estandar[columnas]) ** 2, axis=1)
+    validos = np.isfinite(gamma)
+    distancia, gamma = distancia[validos], gamma[validos]
+    if len(distancia) == 0:
+        raise ValueError("No hay pares de sensores con lecturas para el variograma")
+
+    # Hasta la mitad de la distancia máxima: más allá quedan pocos pares
+    bordes = np.linspace(0, distancia.max() / 2, clases + 1)
+    clase = np.digitize(distancia, bordes) - 1
+    dentro = clase < clases
+    pares = np.bincount(clase[dentro], minlength=clases)
+    suma_d = np.bincount(clase[dentro], weights=distancia[dentro], minlength=clases)
+    suma_g = np.bincount(clase[dentro], weights=gamma[dentro], minlength=clases)
+    con_pares = pares > 0
+    return suma_d[con_pares] / pares[con_pares], suma_g[con_pares] / pares[con_pares], pares[con_pares]
+
+
+def ajustar_variograma(lat_s, lon_s, valores, modelo="esferico", clases=CLASES_VARIOGRAMA):
+    """Ajusta alcance y pepita al variograma empírico (mínimos cuadrados ponderados por pares)"""
+    correlacion(0.0, modelo, 1.0)
+    lat_s = np.asarray(lat_s, dtype=np.float64)
+    puntos = a_metros(lat_s, lon_s, float(np.mean(lat_s)))
+    distancia, gamma, pares = variograma_empirico(puntos, valores, clases)
+
+    def semivarianza(h, alcance, pepita):
+        return pepita + (1 - pepita) * (1 - correlacion(h, modelo, alcance))
+
+    alcance_max = 4 * distancia.max()
+    pepita_min = pepita_minima(modelo, len(lat_s))
+    if len(distancia) >= 3:
+        (alcance, pepita), _ = curve_fit(
+            semivarianza, distancia, gamma,
+            p0=(distancia.max(), max(0.1, pepita_min)),
+            bounds=([distancia.min() / 10, pepita_min], [alcance_max, 1.0]),
+            sigma=1 / np.sqrt(pares)
+        )
+    else:
+        # Muy pocos sensores para ajustar: alcance de la finca, pepita mínima del modelo
+        alcance, pepita = distancia.max() * 2, pepita_min
+
+    mesetas = np.nanvar(_a_matriz(valores), axis=0)
+    return Variograma(modelo, float(alcance), float(pepita), tuple(float(m) for m in mesetas))
+
+
+class Kriging:
+    """Kriging ordinario para una disposición fija de sensores (Cholesky calculado una vez)"""
+
+    def __init__(self, lat_s, lon_s, variograma: Variograma):
+        lat_s = np.asarray(lat_s, dtype=np.float64)
+        if len(lat_s) == 0:
+            raise ValueError("Se necesita al menos un sensor")
+        self.variograma = variograma
+        self.lat_s = lat_s
+        self.lon_s = np.asarray(lon_s, dtype=np.float64)
+        self._lat_ref = float(np.mean(lat_s))
+        self._puntos = a_metros(self.lat_s, self.lon_s, self._lat_ref)
+
+        # Covarianza normalizada (meseta 1): la pepita solo en la diagonal
+        covarianza = (1 - variograma.pepita) * correlacion(
+            cdist(self._puntos, self._puntos), variograma.modelo, variograma.alcance
+        )
+        covarianza[np.diag_indices_from(covarianza)] = 1.0 + _ESTABILIZADOR
+        try:
+            self._factor = cho_factor(covarianza, lower=True)
+        except LinAlgError:
+            raise ValueError("Covarianza entre sensores singular (¿sensores repetidos?)") from None
+        self.condicion = _condicion(self._factor[0], covarianza)
+        if self.condicion > MAX_CONDICION:
+            raise ValueError(
+                f"Covarianza entre sensores mal condicionada (cond ~{self.condicion:.1e} > {MAX_CONDICION:.0e}): "
+                f"subir la pepita del variograma {variograma.modelo} (pepita_minima() da la del ajuste) "
+                f"o usar otro modelo"
+            )
+
+        # Media desconocida del kriging ordinario: C⁻¹1 y 1ᵀC⁻¹1
+        self._c_inv_uno = cho_solve(self._factor, np.ones(len(lat_s)))
+        self._suma = float(self._c_inv_uno.sum())
+        self._diagonal_inversa = None
+        self._rasters: "OrderedDict[Raster, tuple]" = OrderedDict()
+        self._submotores: "OrderedDict[bytes, Kriging]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.lat_s)
+
+    def _covarianza_cruzada(self, lat_p, lon_p):
+        puntos = a_metros(lat_p, lon_p, self._lat_ref)
+        return (1 - self.variograma.pepita) * correlacion(
+            cdist(puntos, self._puntos), self.variograma.modelo, self.variograma.alcance
+        )
+
+    def _bloques(self, lat_p, lon_p):
+        """(inicio, fin, covarianza cruzada) por bloque de puntos"""
+        lat_p = np.asarray(lat_p, dtype=np.float64).ravel()
+        lon_p = np.asarray(lon_p, dtype=np.float64).ravel()
+        bloque = max(1, BLOQUE_ELEMENTOS // len(self))
+        for inicio in range(0, len(lat_p), bloque):
+            fin = min(inicio + bloque, len(lat_p))
+            yield inicio, fin, self._covarianza_cruzada(lat_p[inicio:fin], lon_p[inicio:fin])
+
+    def resolver(self, valores):
+        """(media (niveles,), alfa (sensores, niveles)) para lecturas sin NaN"""
+        valores = _a_matriz(valores)
+        media = self._c_inv_uno @ valores / self._suma
+        alfa = cho_solve(self._factor, valores - media)
+        return media, alfa
+
+    def _submotor(self, validos):
+        """Motor de los sensores con lectura en un nivel (también en cache)"""
+        clave = np.packbits(validos).tobytes()
+        motor = self._submotores.get(clave)
+        if motor is None:
+            motor = Kriging(self.lat_s[validos], self.lon_s[validos], self.variograma)
+            self._submotores[clave] = motor
+            if len(self._submotores) > _MOTORES_CACHE_TAMANO:
+                self._submotores.popitem(last=False)
+        return motor
+
+    def predecir(self, lat_p, lon_p, valores):
+        """Estimación (n_puntos, niveles) en puntos arbitrarios"""
+        valores = _a_matriz(valores)
+        faltantes = np.isnan(valores)
+        if faltantes.any():
+            # Niveles con sensores sin lectura: sistema de los sensores restantes
+            resultado = np.empty((np.size(lat_p), valores.shape[1]))
+            for nivel in range(valores.shape[1]):
+                validos = ~faltantes[:, nivel]
+                if not validos.any():
+                    resultado[:, nivel] = np.nan
+                    continue
+                motor = self if validos.all() else self._submotor(validos)
+                resultado[:, nivel] = motor.predecir(lat_p, lon_p, valores[validos, nivel])[:, 0]
+            return resultado
+
+        media, alfa = self.resolver(valores)
+        resultado = np.empty((np.size(lat_p), valores.shape[1]))
+        for inicio, fin, cruzada in self._bloques(lat_p, lon_p):
+            resultado[inicio:fin] = media + cruzada @ alfa
+        return resultado
+
+    def _varianza_normalizada(self, cruzada):
+        # 1 - cᵀC⁻¹c + (1 - 1ᵀC⁻¹c)² / 1ᵀC⁻¹1, con cᵀC⁻¹c = |L⁻¹c|² (una sola sustitución)
+        reducida = solve_triangular(self._factor[0], cruzada.T, lower=True, check_finite=False)
+        lagrange = 1 - cruzada @ self._c_inv_uno
+        return np.maximum(1 - np.einsum("ij,ij->j", reducida, reducida) + lagrange ** 2 / self._suma, 0.0)
+
+    def varianza(self, lat_p, lon_p):
+        """Varianza de predicción (n_puntos, niveles) en °C²: no depende de las lecturas"""
+        normalizada = np.empty(np.size(lat_p))
+        for inicio, fin, cruzada in self._bloques(lat_p, lon_p):
+            normalizada[inicio:fin] = self._varianza_normalizada(cruzada)
+        return normalizada[:, None] * np.asarray(self.variograma.mesetas)
+
+    def superficie(self, raster: Raster, valores):
+        """(superficie, varianza), cada una (niveles, filas, columnas); varianza y covarianza en cache por raster"""
+        valores = _a_matriz(valores)
+        if np.isnan(valores).any():
+            # Con sensores faltantes la varianza también cambia: sin cache por raster
+            lat_p, lon_p = raster.coordenadas()
+            estimado = self.predecir(lat_p, lon_p, valores)
+            varianza = np.full(estimado.shape, np.nan)
+            for nivel in range(valores.shape[1]):
+                validos = ~np.isnan(valores[:, nivel])
+                if validos.any():
+                    motor = self if validos.all() else self._submotor(validos)
+                    varianza[:, nivel] = motor.varianza(lat_p, lon_p)[:, nivel]
+            return _a_raster(estimado, raster), _a_raster(varianza, raster)
+
+        if raster not in self._rasters:
+            lat_p, lon_p = raster.coordenadas()
+            guardar = raster.celdas * len(self) <= MAX_ELEMENTOS_CACHE
+            cruzada = np.empty((raster.celdas, len(self)), dtype=np.float32) if guardar else None
+            normalizada = np.empty(raster.celdas)
+            # Varianza y covarianza cruzada en la misma pasada por bloques
+            for inicio, fin, bloque in self._bloques(lat_p, lon_p):
+                normalizada[inicio:fin] = self._varianza_normalizada(bloque)
+                if guardar:
+                    cruzada[inicio:fin] = bloque
+            varianza = normalizada[:, None] * np.asarray(self.variograma.mesetas)
+            self._rasters[raster] = (cruzada, _a_raster(varianza, raster))
+            if len(self._rasters) > _MOTORES_CACHE_TAMANO:
+                self._rasters.popitem(last=False)
+        self._rasters.move_to_end(raster)
+        cruzada, varianza = self._rasters[raster]
+
+        if cruzada is None:
+            estimado = self.predecir(*raster.coordenadas(), valores)
+        else:
+            media, alfa = self.resolver(valores)
+            estimado = media + cruzada @ alfa.astype(np.float32)
+        return _a_raster(estimado, raster), varianza
+
+    def validacion_cruzada(self, valores):
+        """
+        Errores leave-one-out (estimado - lectura) con el mismo variograma.
+
+        Forma cerrada (Dubrule): el error del sensor i es -alfa_i / (A⁻¹)_ii,
+        sin volver a factorizar n sistemas.
+        """
+        valores = _a_matriz(valores)
+        if np.isnan(valores).any():
+            errores = np.full(valores.shape, np.nan)
+            for nivel in range(valores.shape[1]):
+                validos = ~np.isnan(valores[:, nivel])
+                if validos.sum() >= 2:
+                    motor = self if validos.all() else self._submotor(validos)
+                    errores[validos, nivel] = motor.validacion_cruzada(valores[validos, nivel])[:, 0]
+            return errores
+
+        if self._diagonal_inversa is None:
+            # diag(A⁻¹) del sistema con la restricción de suma 1: diag(C⁻¹) - (C⁻¹1)² / 1ᵀC⁻¹1
+            c_inv = cho_solve(self._factor, np.eye(len(self)))
+            self._diagonal_inversa = np.diag(c_inv) - self._c_inv_uno ** 2 / self._suma
+        _, alfa = self.resolver(valores)
+        return -alfa / self._diagonal_inversa[:, None]
+
+
+def _condicion(factor, covarianza):
+    """Número de condición (norma 1) estimado por LAPACK a partir del factor de Cholesky, O(n²)"""
+    inversa, _ = lapack.dpocon(factor, np.abs(covarianza).sum(axis=0).max(), uplo="L")
+    return np.inf if inversa == 0 else 1 / inversa
+
+
+def _a_raster(valores, raster):
+    return np.asarray(valores).reshape(raster.celdas, -1).T.reshape(-1, raster.filas, raster.columnas)
+
+
+def _clave_motor(lat_s, lon_s, niveles, modelo, variograma):
+    clave = hashlib.sha1()
+    clave.update(np.ascontiguousarray(lat_s, dtype=np.float64).tobytes())
+    clave.update(np.ascontiguousarray(lon_s, dtype=np.float64).tobytes())
+    clave.update(repr((niveles, modelo, variograma)).encode())
+    return clave.hexdigest()
+
+
+def motor_kriging(lat_s, lon_s, valores, modelo="esferico", variograma=None):
+    """
+    Motor de la disposición de sensores, en cache.
+
+    Sin variograma explícito se ajusta con las primeras lecturas recibidas y
+    se mantiene para las siguientes (los sensores y el terreno no cambian).
+    """
+    # Las mesetas son por nivel: la cantidad de niveles también es parte de la clave
+    clave = _clave_motor(lat_s, lon_s, _a_matriz(valores).shape[1], modelo, variograma)
+    motor = _motores_cache.get(clave)
+    if motor is not None:
+        _motores_cache.move_to_end(clave)
+        return motor
+
+    if variograma is None:
+        variograma = ajustar_variograma(lat_s, lon_s, valores, modelo)
+    motor = Kriging(lat_s, lon_s, variograma)
+    _motores_cache[clave] = motor
+    if len(_motores_cache) > _MOTORES_CACHE_TAMANO:
+        _motores_cache.popitem(last=False)
+    return motor
+
+
+def limpiar_cache_motores():
+    """Vacía el cache de motores (p. ej. para reajustar el variograma)"""
+    _motores_cache.clear()
+
+
+def superficie_kriging(lat_s, lon_s, valores, raster, modelo="esferico", variograma=None):
+    """(superficie, varianza de predicción), cada una (niveles, filas, columnas)"""
+    return motor_kriging(lat_s, lon_s, valores, modelo, variograma).superficie(raster, valores)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from campo_termico import generar_campo
+    from interpolacion import limpiar_cache_pesos, superficie_idw, validacion_cruzada_idw
+
+    parser = argparse.ArgumentParser(description="Kriging ordinario contra IDW: velocidad y error leave-one-out")
+    parser.add_argument("--sensores", type=int, default=500)
+    parser.add_argument("--lado", type=int, default=200, help="Raster de lado x lado celdas")
+    parser.add_argument("--modelo", choices=MODELOS, default="esferico")
+    args = parser.parse_args()
+
+    lat_norte, lat_sur, lon_oeste, lon_este = -39.163552, -39.169029, -67.038406, -67.028948
+    centros = [
+        [(-39.164, -67.035, 18), (-39.167, -67.031, 16)],
+        [(-39.165, -67.036, 17), (-39.168, -67.032, 15)],
+        [(-39.166, -67.034, 16), (-39.164, -67.030, 14)],
+        [(-39.167, -67.035, 15), (-39.165, -67.031, 13)],
+    ]
+    bases = [12, 11.5, 11, 10.5]
+    rng = np.random.default_rng(0)
+    lat_s = lat_sur + rng.random(args.sensores) * (lat_norte - lat_sur)
+    lon_s = lon_oeste + rng.random(args.sensores) * (lon_este - lon_oeste)
+    lecturas = generar_campo(lat_s, lon_s, centros, bases, semilla=2024)
+    nuevas = lecturas + rng.normal(0, 0.5, lecturas.shape)
+    raster = Raster(lat_norte, lat_sur, lon_oeste, lon_este, args.lado, args.lado)
+    # Campo sin ruido en las celdas, para medir el error contra el valor real
+    real = _a_raster(generar_campo(*raster.coordenadas(), centros, bases, ruido=0), raster)
+
+    def cronometrar(funcion, repeticiones=1):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            resultado = funcion()
+        return resultado, (time.perf_counter() - inicio) / repeticiones
+
+    limpiar_cache_pesos()
+    idw, idw_primera = cronometrar(lambda: superficie_idw(lat_s, lon_s, lecturas, raster))
+    _, idw_cache = cronometrar(lambda: superficie_idw(lat_s, lon_s, nuevas, raster), 5)
+    idw_loo = validacion_cruzada_idw(lat_s, lon_s, lecturas)
+
+    limpiar_cache_motores()
+    motor, ajuste = cronometrar(lambda: motor_kriging(lat_s, lon_s, lecturas, args.modelo))
+    (kriging, varianza), kriging_primera = cronometrar(lambda: motor.superficie(raster, lecturas))
+    _, kriging_cache = cronometrar(lambda: superficie_kriging(lat_s, lon_s, nuevas, raster, args.modelo), 5)
+    kriging_loo = motor.validacion_cruzada(lecturas)
+
+    def rmse(errores, eje=None):
+        return np.sqrt(np.nanmean(np.asarray(errores) ** 2, axis=eje))
+
+    v = motor.variograma
+    print(f"Raster {args.lado}x{args.lado} ({raster.celdas:,} celdas) desde {args.sensores:,} sensores")
+    print(f"Variograma {v.modelo}: alcance {v.alcance:.0f} m, pepita {v.pepita:.2f}, "
+          f"meseta 1m {v.mesetas[0]:.2f} °C²")
+    print(f"{'':<10}{'primera':>12}{'en cache':>12}{'LOO RMSE 1m/2m/5m/10m (°C)':>34}{'vs real':>10}")
+    for nombre, primera, cache, loo, superficie in (
+        ("IDW", idw_primera, idw_cache, idw_loo, idw),
+        ("Kriging", ajuste + kriging_primera, kriging_cache, kriging_loo, kriging),
+    ):
+        por_nivel = " / ".join(f"{e:.3f}" for e in rmse(loo, eje=0))
+        print(f"{nombre:<10}{primera * 1000:>10.1f}ms{cache * 1000:>10.1f}ms{por_nivel:>34}"
+              f"{rmse(superficie - real):>10.3f}")
+    print(f"Desvío de predicción 1m: {np.sqrt(varianza[0]).min():.2f} - {np.sqrt(varianza[0]).max():.2f} °C")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los tests importan los módulos del ejemplo (grilla, interpolacion, kriging) desde su carpeta
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from campo_termico import _calcular_temperatura, generar_campo
+
+CENTROS = [
+    [(-39.164, -67.035, 18), (-39.167, -67.031, 16)],
+    [(-39.165, -67.036, 17), (-39.168, -67.032, 15)],
+    [(-39.166, -67.034, 16), (-39.164, -67.030, 14)],
+    [(-39.167, -67.035, 15), (-39.165, -67.031, 13)],
+]
+BASES = [12, 11.5, 11, 10.5]
+
+
+def puntos(n):
+    rng = np.random.default_rng(1)
+    return -39.169029 + rng.random(n) * 0.005477, -67.038406 + rng.random(n) * 0.009458
+
+
+def campo_punto_a_punto(lat, lon, semilla):
+    """Loop original de los scripts: punto por punto, nivel por nivel, con el estado global de np.random"""
+    np.random.seed(semilla)
+    return np.array([
+        [_calcular_temperatura(lat_p, lon_p, centros, base) for centros, base in zip(CENTROS, BASES)]
+        for lat_p, lon_p in zip(lat, lon)
+    ])
+
+
+@pytest.mark.parametrize("bloque", [7, 262144])
+def test_misma_semilla_mismo_campo_que_el_loop(bloque):
+    lat, lon = puntos(300)
+    esperado = campo_punto_a_punto(lat, lon, 2024)
+
+    np.testing.assert_allclose(generar_campo(lat, lon, CENTROS, BASES, semilla=2024, bloque=bloque), esperado, rtol=1e-12)
+    # Sin semilla usa el estado global, igual que los scripts que llaman a np.random.seed
+    np.random.seed(2024)
+    np.testing.assert_allclose(generar_campo(lat, lon, CENTROS, BASES, bloque=bloque), esperado, rtol=1e-12)
+
+
+def test_sin_ruido_no_consume_el_generador():
+    lat, lon = puntos(10)
+    np.random.seed(5)
+    generar_campo(lat, lon, CENTROS, BASES, ruido=0)
+    assert np.random.normal() == np.random.RandomState(5).normal()
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from grilla import construir_grilla, dentro_de_poligono, dimensiones
+
+
+@pytest.mark.parametrize("bordes, pasos, esperado", [
+    # Bordes justo sobre un múltiplo del paso: 0.3 / 0.1 = 2.9999... en punto flotante
+    ((-39.0, -39.3, -67.0, -66.95), (0.1, 0.01), (4, 6)),
+    # Bordes entre dos pasos: se cortan en el último punto dentro
+    ((-39.0, -39.25, -67.0, -66.955), (0.1, 0.01), (3, 5)),
+    # Grilla de un solo punto
+    ((-39.0, -39.0, -67.0, -67.0), (0.1, 0.01), (1, 1)),
+])
+def test_dimensiones_exactas(bordes, pasos, esperado):
+    norte, sur, oeste, este = bordes
+    paso_lat, paso_lon = pasos
+    assert dimensiones(norte, sur, oeste, este, paso_lat=paso_lat, paso_lon=paso_lon) == esperado
+
+    lat, lon = construir_grilla(norte, sur, oeste, este, paso_lat=paso_lat, paso_lon=paso_lon)
+    filas, columnas = esperado
+    assert len(lat) == filas * columnas
+    # Último punto sobre el borde (o antes), sin error acumulado
+    assert lat[-1] == pytest.approx(norte - (filas - 1) * paso_lat, abs=1e-12)
+    assert lon[-1] == pytest.approx(oeste + (columnas - 1) * paso_lon, abs=1e-12)
+    assert lat[-1] >= sur - 1e-9 and lon[-1] <= este + 1e-9
+
+
+def test_dimensiones_bordes_invalidos():
+    with pytest.raises(ValueError):
+        dimensiones(-39.3, -39.0, -67.0, -66.95, paso_lat=0.1, paso_lon=0.01)
+
+
+def test_dentro_de_poligono_concavo():
+    # Polígono en U (lat, lon): la muesca entre los brazos queda afuera
+    poligono = [(0, 0), (0, 3), (3, 3), (3, 2), (1, 2), (1, 1), (3, 1), (3, 0)]
+    puntos = {
+        (0.5, 0.5): True,   # base de la U
+        (0.5, 1.5): True,
+        (2.0, 0.5): True,   # brazo oeste
+        (2.0, 2.5): True,   # brazo este
+        (2.0, 1.5): False,  # muesca
+        (3.5, 1.5): False,
+        (-0.5, 1.5): False,
+        (2.0, 3.5): False,
+    }
+    lat, lon = np.array(list(puntos)).T
+    assert dentro_de_poligono(lat, lon, poligono).tolist() == list(puntos.values())
@@ -0,0 +1,32 @@
+import numpy as np
+
+import interpolacion
+from interpolacion import Raster, limpiar_cache_pesos, pesos_raster
+
+NORTE, SUR, OESTE, ESTE = -39.163552, -39.169029, -67.038406, -67.028948
+
+
+def test_cache_de_pesos_acotado_por_bytes(monkeypatch):
+    rng = np.random.default_rng(0)
+    lat = SUR + rng.random(50) * (NORTE - SUR)
+    lon = OESTE + rng.random(50) * (ESTE - OESTE)
+    rasters = [Raster(NORTE, SUR, OESTE, ESTE, 40 + i, 40) for i in range(4)]
+
+    limpiar_cache_pesos()
+    tamano = interpolacion._bytes_pesos(pesos_raster(lat, lon, rasters[0]))
+    # Entran dos matrices de este tamaño, no una tercera
+    monkeypatch.setattr(interpolacion, "MAX_BYTES_CACHE_PESOS", int(2.5 * tamano))
+    for raster in rasters[1:]:
+        pesos_raster(lat, lon, raster)
+
+    cache = interpolacion._pesos_cache
+    assert len(cache) == 2
+    assert sum(map(interpolacion._bytes_pesos, cache.values())) <= interpolacion.MAX_BYTES_CACHE_PESOS
+    # Las que quedan son las más recientes
+    assert list(cache) == [interpolacion.clave_disposicion(lat, lon, raster) for raster in rasters[2:]]
+
+    # Una W más grande que el tope igual se guarda (sola), para reutilizarla
+    monkeypatch.setattr(interpolacion, "MAX_BYTES_CACHE_PESOS", 1)
+    pesos_raster(lat, lon, rasters[0])
+    assert len(cache) == 1
+    limpiar_cache_pesos()
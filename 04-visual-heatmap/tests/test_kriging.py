@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from campo_termico import generar_campo
+from interpolacion import Raster, superficie_idw
+from kriging import MAX_CONDICION, MODELOS, Kriging, _a_raster, ajustar_variograma, limpiar_cache_motores, superficie_kriging
+
+NORTE, SUR, OESTE, ESTE = -39.163552, -39.169029, -67.038406, -67.028948
+CENTROS = [
+    [(-39.164, -67.035, 18), (-39.167, -67.031, 16)],
+    [(-39.165, -67.036, 17), (-39.168, -67.032, 15)],
+]
+BASES = [12, 11.5]
+
+
+def campo_suave(sensores, semilla=0):
+    rng = np.random.default_rng(semilla)
+    lat = SUR + rng.random(sensores) * (NORTE - SUR)
+    lon = OESTE + rng.random(sensores) * (ESTE - OESTE)
+    return lat, lon, generar_campo(lat, lon, CENTROS, BASES, ruido=0)
+
+
+def rmse(estimado, real):
+    return float(np.sqrt(np.mean((estimado - real) ** 2)))
+
+
+@pytest.mark.parametrize("modelo", MODELOS)
+def test_campo_suave_no_peor_que_idw(modelo):
+    lat, lon, lecturas = campo_suave(500)
+    raster = Raster(NORTE, SUR, OESTE, ESTE, 60, 60)
+    real = _a_raster(generar_campo(*raster.coordenadas(), CENTROS, BASES, ruido=0), raster)
+
+    limpiar_cache_motores()
+    kriging, varianza = superficie_kriging(lat, lon, lecturas, raster, modelo)
+    idw = superficie_idw(lat, lon, lecturas, raster)
+
+    assert rmse(kriging, real) < rmse(idw, real)
+    assert np.abs(kriging - real).max() < 2 * np.abs(idw - real).max()
+    assert np.all(np.isfinite(varianza))
+
+
+def test_gaussiano_con_pepita_minima_queda_bien_condicionado():
+    lat, lon, lecturas = campo_suave(500)
+    variograma = ajustar_variograma(lat, lon, lecturas, "gaussiano")
+
+    assert variograma.pepita > 0
+    assert Kriging(lat, lon, variograma).condicion < MAX_CONDICION
+
+
+def test_covarianza_mal_condicionada_falla_con_mensaje_claro():
+    lat, lon, lecturas = campo_suave(500)
+    sin_pepita = ajustar_variograma(lat, lon, lecturas, "gaussiano")._replace(pepita=0.0)
+
+    with pytest.raises(ValueError, match="mal condicionada"):
+        Kriging(lat, lon, sin_pepita)
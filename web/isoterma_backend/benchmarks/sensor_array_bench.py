@@ -0,0 +1,123 @@
+"""
+Benchmark de memoria: sensores como List[Sensor] (pydantic) vs SensorArray (columnas NumPy).
+
+Uso (desde web/isoterma_backend):
+    python -m benchmarks.sensor_array_bench [--sensors 100000] [--page 1000]
+
+Mide, para una finca con N sensores, la memoria retenida (tracemalloc) y el
+tiempo de construcción/validación de cada representación, la memoria que
+retiene el FarmRepository cargado desde un fincas.json (contra guardar los
+documentos parseados completos, como antes) y el costo de materializar
+modelos pydantic en el borde de la API.
+"""
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from src.models.farm_models import Farm
+from src.models.sensor_array import farm_model, validate_farm
+from src.repositories.farm_repository import FarmRepository
+
+STATUSES = ("active", "active", "active", "warning", "error")
+
+
+def make_farm(sensors: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    lat = -39.0 + rng.random(sensors) * 0.05
+    lon = -67.6 + rng.random(sensors) * 0.05
+    temps = np.round(rng.normal(4, 3, sensors), 1)
+    return {
+        "id": "F_BENCH",
+        "name": "Finca benchmark",
+        "location": {"latitude": -39.0, "longitude": -67.6, "address": "Ruta 22", "region": "Río Negro"},
+        "area_hectares": 5000.0,
+        "bounds": {"north": -38.95, "south": -39.0, "west": -67.6, "east": -67.55},
+        "sensors": [
+            {"id": f"S_{i:06d}", "latitude": la, "longitude": lo, "status": STATUSES[i % len(STATUSES)], "temperature": t}
+            for i, (la, lo, t) in enumerate(zip(lat.tolist(), lon.tolist(), temps.tolist()))
+        ],
+        "crops": ["manzana", "pera"],
+        "owner": "Benchmark",
+        "created_at": "2026-01-01T00:00:00Z"
+    }
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(build):
+    """(objeto, bytes retenidos, segundos) de construir algo a partir del documento"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # tracemalloc enlentece las asignaciones: el tiempo se mide aparte
+    return result, retained, timed(build)
+
+
+def load_repository(path: Path) -> FarmRepository:
+    repository = FarmRepository(path)
+    repository.list_raw()
+    return repository
+
+
+def parsed_documents(path: Path) -> list:
+    """Lo que retenía el repositorio antes: el documento parseado completo más las columnas"""
+    with open(path, 'r', encoding='utf-8') as f:
+        documents = json.load(f)
+    return [(farm, validate_farm(farm)) for farm in documents]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor representation memory benchmark")
+    parser.add_argument("--sensors", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=1000)
+    args = parser.parse_args()
+
+    farm = make_farm(args.sensors)
+    models, models_bytes, models_seconds = measure(lambda: Farm(**farm))
+    array, array_bytes, array_seconds = measure(lambda: validate_farm(farm))
+    assert len(models.sensors) == len(array)
+
+    print(f"\n{args.sensors:,} sensores en una finca")
+    print(f"{'representación':<28}{'MB':>10}{'bytes/sensor':>14}{'build ms':>12}")
+    for label, size, seconds in (
+        ("List[Sensor] (pydantic)", models_bytes, models_seconds),
+        ("SensorArray (NumPy)", array_bytes, array_seconds),
+    ):
+        print(f"{label:<28}{size / 1e6:>10.1f}{size / args.sensors:>14.1f}{seconds * 1000:>12.1f}")
+    print(f"SensorArray.nbytes (solo columnas): {array.nbytes / 1e6:.1f} MB; "
+          f"{models_bytes / array_bytes:.1f}x menos memoria retenida")
+
+    # El repositorio completo cargado desde el archivo
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "fincas.json"
+        path.write_text(json.dumps([farm]), encoding="utf-8")
+        _, documents_bytes, _ = measure(lambda: parsed_documents(path))
+        repository, repository_bytes, repository_seconds = measure(lambda: load_repository(path))
+        assert len(repository.sensors(farm["id"])) == args.sensors
+    print(f"FarmRepository cargado: {repository_bytes / 1e6:.1f} MB ({repository_seconds * 1000:.0f} ms) "
+          f"contra {documents_bytes / 1e6:.1f} MB guardando los documentos parseados")
+
+    # Borde de la API: modelos solo para lo que se responde
+    page_seconds = timed(lambda: array.take(slice(0, args.page)).to_models())
+    full_seconds = timed(lambda: farm_model(farm, array), repeat=1)
+    print(f"materializar {args.page:,} Sensor: {page_seconds * 1000:.1f} ms; "
+          f"Farm completa: {full_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark del codec de series temporales contra CSV/NDJSON y registros binarios fijos.
+
+Uso (desde web/isoterma_backend):
+    python -m benchmarks.timeseries_codec_bench [--points 200000]
+
+Reporta bytes por punto y throughput de decodificación para una serie de un
+sensor a una altura, muestreada cada 60 s con resolución de 0.1 °C.
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+import numpy as np
+
+from src.repositories import timeseries_codec
+from src.repositories.timeseries_store import RAW_DTYPE
+
+
+def make_series(points: int, jitter_ms: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    start_ms = 1_771_614_000_000
+    ts_ms = start_ms + np.arange(points, dtype=np.int64) * 60_000
+    if jitter_ms:
+        ts_ms += rng.integers(-jitter_ms, jitter_ms + 1, points)
+    # Ciclo diario + ruido, redondeado a décimas como en los scripts de heatmap
+    hours = np.arange(points) / 60.0
+    temps = 12 + 8 * np.sin(2 * np.pi * (hours - 9) / 24) + np.cumsum(rng.normal(0, 0.05, points))
+    return ts_ms, np.round(temps, 1).astype(np.float32)
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_csv(ts_ms: np.ndarray, temps: np.ndarray) -> tuple:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["sensor_id", "ts", "temp_2m"])
+    writer.writerows(zip(["S_001"] * len(ts_ms), (ts_ms / 1000).tolist(), temps.tolist()))
+    data = buffer.getvalue().encode()
+
+    def decode():
+        rows = list(csv.reader(io.StringIO(data.decode())))[1:]
+        np.array([float(row[1]) for row in rows]), np.array([float(row[2]) for row in rows], dtype=np.float32)
+
+    return len(data), timed(decode)
+
+
+def bench_ndjson(ts_ms: np.ndarray, temps: np.ndarray) -> tuple:
+    data = "\n".join(
+        json.dumps({"sensor_id": "S_001", "ts": ts, "temp_2m": temp})
+        for ts, temp in zip((ts_ms / 1000).tolist(), temps.tolist())
+    ).encode()
+
+    def decode():
+        rows = [json.loads(line) for line in data.split(b"\n")]
+        np.array([row["ts"] for row in rows]), np.array([row["temp_2m"] for row in rows], dtype=np.float32)
+
+    return len(data), timed(decode)
+
+
+def bench_fixed(ts_ms: np.ndarray, temps: np.ndarray) -> tuple:
+    records = np.empty(len(ts_ms), dtype=RAW_DTYPE)
+    records["ts_ms"] = ts_ms
+    records["series"] = 0
+    records["height"] = 2
+    records["temp"] = temps
+    data = records.tobytes()
+    return len(data), timed(lambda: np.frombuffer(data, dtype=RAW_DTYPE).copy())
+
+
+def bench_codec(ts_ms: np.ndarray, temps: np.ndarray) -> tuple:
+    data = timeseries_codec.write_chunks(timeseries_codec.encode_series(0, 2, ts_ms, temps))
+
+    def decode():
+        for chunk in timeseries_codec.iter_chunks(data):
+            timeseries_codec.decode_chunk(chunk)
+
+    return len(data), timed(decode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-series codec benchmark")
+    parser.add_argument("--points", type=int, default=200_000)
+    args = parser.parse_args()
+
+    scenarios = {
+        "intervalo fijo": make_series(args.points, jitter_ms=0),
+        "jitter ±500 ms": make_series(args.points, jitter_ms=500),
+    }
+    # Valores sin redondear: fuerza el modo XOR del codec
+    ts_ms, temps = make_series(args.points, jitter_ms=0)
+    scenarios["float sin redondear"] = (ts_ms, (temps + np.random.default_rng(1).normal(0, 0.01, args.points)).astype(np.float32))
+
+    encoders = [
+        ("csv", bench_csv),
+        ("ndjson", bench_ndjson),
+        ("binario fijo", bench_fixed),
+        ("codec dod+xor/int", bench_codec),
+    ]
+    for name, (ts_ms, temps) in scenarios.items():
+        print(f"\n{name} ({len(ts_ms):,} puntos)")
+        print(f"{'formato':<20}{'bytes/punto':>12}{'vs csv':>9}{'decode Mpts/s':>15}")
+        csv_bytes = None
+        for label, bench in encoders:
+            size, seconds = bench(ts_ms, temps)
+            csv_bytes = csv_bytes or size
+            print(f"{label:<20}{size / len(ts_ms):>12.2f}{csv_bytes / size:>8.1f}x{len(ts_ms) / seconds / 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,60 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from src.routers import api
+from src.services.farm_service import FarmService
+from src.services.farm_stream import stream_hub
+from src.services.history_service import HistoryService
+from src.services.line_listener import line_listener
+from src.services.prefetch_scheduler import prefetcher
+from src.services.reading_service import ReadingService
+from src.utils import config
+from src.utils.http_client import startup_http_client, shutdown_http_client
 from src.utils.logging_config import setup_logging
 
 # Setup logging
 logger = setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown of shared resources"""
+    # Cliente HTTP compartido (pool keep-alive) para todos los routers
+    await startup_http_client()
+    # Precarga periódica del clima de todas las fincas en la cache
+    if config.PREFETCH_ENABLED:
+        await prefetcher.start()
+    # Escritor en background de lecturas de sensores
+    ReadingService.writer.start()
+    # Compactación y retención del historial de lecturas
+    HistoryService.start_maintenance()
+    # Snapshot periódico del estado vivo de sensores (arranque rápido)
+    FarmService.live.start_snapshots()
+    # Listener TCP/UDP opcional para gateways (mismo pipeline que POST /readings)
+    if config.LINE_LISTENER_ENABLED:
+        await line_listener.start()
+    yield
+    await line_listener.stop()
+    # Aplicar las lecturas ya aceptadas antes de cerrar streams y repositorio
+    await ReadingService.writer.stop()
+    await HistoryService.stop_maintenance()
+    await FarmService.live.stop_snapshots()
+    await stream_hub.stop()
+    await prefetcher.stop()
+    await shutdown_http_client()
+    # Escribir cambios de fincas pendientes antes de salir
+    FarmService.repository.close()
+
 # Create FastAPI app
 app = FastAPI(
     title="Isoterma Backend API",
     description="Backend para consultas meteorológicas y validación de sensores térmicos",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -13,6 +13,10 @@ class Bounds(BaseModel):
     west: float
     east: float
 
+# Alturas de medición de cada sensor (mismas que 03-finca-rio-negro-altitude/finca_altitude.py)
+HEIGHTS_M = (1, 2, 5, 10)
+TEMP_FIELDS = ("temp_1m", "temp_2m", "temp_5m", "temp_10m")
+
 class Sensor(BaseModel):
     id: str
     latitude: float
@@ -31,6 +35,10 @@ class Farm(BaseModel):
     owner: str
     created_at: str
 
+# Campos proyectables de una finca; los sensores se piden aparte (include=sensors)
+FARM_FIELDS = tuple(field for field in Farm.model_fields if field != "sensors")
+DETAIL_FIELDS = FARM_FIELDS + ("settings",)
+
 class FarmListResponse(BaseModel):
     success: bool
     farms: List[Farm]
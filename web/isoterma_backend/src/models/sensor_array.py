@@ -0,0 +1,179 @@
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from src.models.farm_models import TEMP_FIELDS, Farm, Sensor
+
+# Sensor.temperature del documento es la lectura a 2 m
+CURRENT_TEMP_COLUMN = TEMP_FIELDS.index("temp_2m")
+# Estados conocidos primero: sus códigos son estables entre fincas
+KNOWN_STATUSES = ("active", "warning", "error")
+# Validar la lista entera en pydantic-core es más rápido que model_construct sensor por sensor
+_SENSOR_LIST = TypeAdapter(List[Sensor])
+
+
+class SensorArray:
+    """Sensors of one farm as contiguous columns instead of one object per sensor.
+
+    ids (fixed-width unicode), latitude/longitude (float64), status codes
+    (uint8 into `statuses`) and temps (n, 4) float64, one column per height
+    with NaN for missing values (float64 so the document temperatures
+    round-trip exactly). Validated once when built; pydantic Sensor objects
+    are only materialised at the API boundary (to_models).
+    """
+
+    __slots__ = ("ids", "latitude", "longitude", "status_codes", "statuses", "temps", "_order")
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        status_codes: np.ndarray,
+        statuses: Sequence[str],
+        temps: np.ndarray
+    ):
+        self.ids = ids
+        self.latitude = latitude
+        self.longitude = longitude
+        self.status_codes = status_codes
+        self.statuses = tuple(statuses)
+        self.temps = temps
+        self._order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: Sequence[str],
+        latitude: Sequence[float],
+        longitude: Sequence[float],
+        status: Sequence[str],
+        temperature: Sequence[Optional[float]]
+    ) -> "SensorArray":
+        """Build and validate from per-field sequences (document fields or SQLite rows)"""
+        count = len(ids)
+        if not all(isinstance(sensor_id, str) for sensor_id in ids):
+            raise ValueError("Sensor id must be a string")
+        if not all(isinstance(value, str) for value in status):
+            raise ValueError("Sensor status must be a string")
+        try:
+            latitude = np.array(latitude, dtype=np.float64).reshape(count)
+            longitude = np.array(longitude, dtype=np.float64).reshape(count)
+            current = np.array([np.nan if t is None else t for t in temperature], dtype=np.float64).reshape(count)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid sensor coordinates or temperature: {e}") from None
+
+        statuses = list(KNOWN_STATUSES)
+        codes = {name: code for code, name in enumerate(statuses)}
+        for name in status:
+            if name not in codes:
+                codes[name] = len(statuses)
+                statuses.append(name)
+        if len(statuses) > 256:
+            raise ValueError("Too many distinct sensor statuses")
+
+        temps = np.full((count, len(TEMP_FIELDS)), np.nan, dtype=np.float64)
+        temps[:, CURRENT_TEMP_COLUMN] = current
+        return cls(
+            ids=np.array(ids, dtype=str) if count else np.empty(0, dtype="<U1"),
+            latitude=latitude,
+            longitude=longitude,
+            status_codes=np.fromiter((codes[name] for name in status), dtype=np.uint8, count=count),
+            statuses=statuses,
+            temps=temps
+        )
+
+    @classmethod
+    def from_dicts(cls, sensors: List[dict]) -> "SensorArray":
+        """Build from the sensor dicts of a fincas.json document"""
+        try:
+            return cls.from_columns(
+                [sensor["id"] for sensor in sensors],
+                [sensor["latitude"] for sensor in sensors],
+                [sensor["longitude"] for sensor in sensors],
+                [sensor["status"] for sensor in sensors],
+                [sensor.get("temperature") for sensor in sensors]
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid sensor: missing or malformed field {e}") from None
+
+    @property
+    def temperature(self) -> np.ndarray:
+        """Current (2 m) temperature of every sensor, NaN when unknown"""
+        return self.temps[:, CURRENT_TEMP_COLUMN]
+
+    @property
+    def status(self) -> np.ndarray:
+        return np.array(self.statuses, dtype=object)[self.status_codes]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in (self.ids, self.latitude, self.longitude, self.status_codes, self.temps))
+
+    def index_of(self, sensor_id: str) -> Optional[int]:
+        """Row of a sensor id (binary search over a lazily built sort order)"""
+        if self._order is None:
+            self._order = np.argsort(self.ids, kind="stable")
+        sorted_ids = self.ids[self._order]
+        position = int(np.searchsorted(sorted_ids, sensor_id))
+        if position < len(sorted_ids) and sorted_ids[position] == sensor_id:
+            return int(self._order[position])
+        return None
+
+    def take(self, rows: Iterable[int]) -> "SensorArray":
+        """Subset of rows (slices or index arrays), sharing the status vocabulary"""
+        rows = rows if isinstance(rows, slice) else np.asarray(rows, dtype=np.int64)
+        return SensorArray(
+            self.ids[rows], self.latitude[rows], self.longitude[rows],
+            self.status_codes[rows], self.statuses, self.temps[rows]
+        )
+
+    def with_temps(self, temps: np.ndarray) -> "SensorArray":
+        """Same sensors with another temperature matrix (e.g. live readings overlaid)"""
+        return SensorArray(self.ids, self.latitude, self.longitude, self.status_codes, self.statuses, temps)
+
+    def record(self, row: int) -> dict:
+        """fincas.json-shaped dict of one sensor"""
+        temperature = float(self.temps[row, CURRENT_TEMP_COLUMN])
+        return {
+            "id": str(self.ids[row]),
+            "latitude": float(self.latitude[row]),
+            "longitude": float(self.longitude[row]),
+            "status": self.statuses[self.status_codes[row]],
+            "temperature": None if np.isnan(temperature) else temperature
+        }
+
+    def to_dicts(self) -> List[dict]:
+        """fincas.json-shaped sensor dicts (what the repositories write back)"""
+        current = self.temperature
+        temperature = np.where(np.isnan(current), None, current).tolist()
+        return [
+            {"id": sensor_id, "latitude": lat, "longitude": lon, "status": status, "temperature": temp}
+            for sensor_id, lat, lon, status, temp in zip(
+                self.ids.tolist(), self.latitude.tolist(), self.longitude.tolist(),
+                self.status.tolist(), temperature
+            )
+        ]
+
+    def to_models(self) -> List[Sensor]:
+        """Sensor models for a response (only materialise what is going to be returned)"""
+        return _SENSOR_LIST.validate_python(self.to_dicts())
+
+
+def validate_farm(farm: dict) -> SensorArray:
+    """Validate a farm document: pydantic for the farm fields, vectorized for its sensors"""
+    if not isinstance(farm.get("sensors"), list):
+        raise ValueError("Farm sensors must be a list")
+    sensors = SensorArray.from_dicts(farm["sensors"])
+    Farm(**{**farm, "sensors": []})
+    return sensors
+
+
+def farm_model(farm: dict, sensors: SensorArray) -> Farm:
+    """Farm response model: farm fields validated by pydantic, sensors materialised from the columns"""
+    header = Farm(**{**farm, "sensors": []})
+    return header.model_copy(update={"sensors": sensors.to_models()})
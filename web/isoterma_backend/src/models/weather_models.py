@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+from src.utils import config
+
 class WeatherRequest(BaseModel):
     """Request model for weather queries"""
     latitude: float = Field(..., ge=-90, le=90, description="Latitude")
@@ -54,4 +56,14 @@ class ValidationResponse(BaseModel):
     api_temperature: float
     difference: float
     status: str  # "OK", "WARNING", "ERROR"
-    message: str
\ No newline at end of file
+    message: str
+
+class Coordinate(BaseModel):
+    """Single location for batch queries"""
+    latitude: float = Field(..., ge=-90, le=90, description="Latitude")
+    longitude: float = Field(..., ge=-180, le=180, description="Longitude")
+
+class BatchWeatherRequest(BaseModel):
+    """Request for weather at many locations in one call"""
+    locations: List[Coordinate] = Field(..., min_length=1, max_length=config.WEATHER_BATCH_MAX_LOCATIONS)
+    forecast_days: int = Field(3, ge=1, le=7, description="Forecast days")
@@ -0,0 +1,40 @@
+import logging
+from pathlib import Path
+
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+
+def _backend_path(value: str) -> Path:
+    """Relative paths in config are relative to the backend directory"""
+    path = Path(value)
+    return path if path.is_absolute() else BACKEND_DIR / path
+
+
+def sqlite_path() -> Path:
+    return _backend_path(config.FARM_SQLITE_PATH)
+
+
+def timeseries_path() -> Path:
+    return _backend_path(config.TIMESERIES_DIR)
+
+
+def live_state_path() -> Path:
+    return _backend_path(config.LIVE_STATE_SNAPSHOT_PATH)
+
+
+def create_farm_repository(json_path: Path):
+    """Farm repository for the configured backend (FARM_STORAGE_BACKEND=json|sqlite)"""
+    if config.FARM_STORAGE_BACKEND == "sqlite":
+        from src.repositories.sqlite_farm_repository import SqliteFarmRepository
+        logger.info(f"Farm storage: SQLite ({sqlite_path()})")
+        return SqliteFarmRepository(sqlite_path())
+
+    if config.FARM_STORAGE_BACKEND != "json":
+        raise ValueError(f"Unknown FARM_STORAGE_BACKEND: {config.FARM_STORAGE_BACKEND}")
+
+    from src.repositories.farm_repository import FarmRepository
+    return FarmRepository(json_path)
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.models.farm_models import Farm
+from src.models.sensor_array import SensorArray, farm_model, validate_farm
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+def _project(farm: dict, fields: Sequence[str]) -> dict:
+    # Solo el primer nivel: los valores anidados se comparten con el snapshot
+    return {field: farm[field] for field in fields if field in farm}
+
+
+class FarmRepository:
+    """In-memory farm store backed by a JSON file, reloaded only when the file changes.
+
+    Farms are parsed and validated once per file version and indexed by id.
+    Sensors live only as one SensorArray (columnar) per farm: the stored
+    documents have no "sensors" key (use sensors(farm_id)), and pydantic
+    models are only built when a caller asks for them.
+    Returned dicts/arrays are shared snapshots: callers must not mutate them.
+    Invalid farms are left out of the index but kept in the parsed document
+    list, so a flush rewrites them unchanged instead of dropping them.
+
+    Writes are applied in memory and flushed by a single writer: several
+    updates inside FARM_FLUSH_DELAY_SECONDS share one atomic rewrite
+    (temp file + rename), with fsync according to FARM_FSYNC_POLICY.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_delay: float = config.FARM_FLUSH_DELAY_SECONDS,
+        fsync_policy: str = config.FARM_FSYNC_POLICY
+    ):
+        self.path = Path(path)
+        self.version = 0
+        self.flush_delay = flush_delay
+        self.fsync_policy = fsync_policy
+        self.flushes = 0
+        self.pending_updates = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._last_fsync = 0.0
+        self._signature: Optional[Tuple[int, int]] = None
+        self._documents: List[Any] = []
+        self._raw: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self._positions: Dict[str, int] = {}
+        self._sensors: Dict[str, SensorArray] = {}
+        # Por documento: (posición de la clave "sensors", columnas) para reescribirlo igual; None si es inválido
+        self._document_sensors: List[Optional[Tuple[int, SensorArray]]] = []
+
+    def list_farms(self) -> List[Farm]:
+        """All valid farms as pydantic models (materialised from the sensor columns)"""
+        self._ensure_fresh()
+        return [farm_model(farm, self._sensors[farm["id"]]) for farm in self._raw]
+
+    def list_raw(self) -> List[dict]:
+        """All valid farms as documents without sensors (includes settings)"""
+        self._ensure_fresh()
+        return self._raw
+
+    def get(self, farm_id: str) -> Optional[dict]:
+        """Farm document (without sensors) by id, O(1)"""
+        self._ensure_fresh()
+        return self._by_id.get(farm_id)
+
+    def list_page(self, fields: Sequence[str], after: Optional[str] = None, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        """Projected farms (top-level fields only) after the given id, plus the last id when more remain"""
+        self._ensure_fresh()
+        start = 0
+        if after is not None:
+            if after not in self._positions:
+                raise ValueError(f"Invalid cursor: unknown farm {after}")
+            start = self._positions[after] + 1
+        farms = self._raw[start:start + limit]
+        more = start + limit < len(self._raw)
+        return [_project(farm, fields) for farm in farms], farms[-1]["id"] if more and farms else None
+
+    def get_fields(self, farm_id: str, fields: Sequence[str]) -> Optional[dict]:
+        """Projected farm by id, O(1)"""
+        self._ensure_fresh()
+        farm = self._by_id.get(farm_id)
+        return _project(farm, fields) if farm else None
+
+    def get_model(self, farm_id: str) -> Optional[Farm]:
+        """Farm model by id, O(1) lookup"""
+        self._ensure_fresh()
+        farm = self._by_id.get(farm_id)
+        return farm_model(farm, self._sensors[farm_id]) if farm else None
+
+    def sensors(self, farm_id: str) -> Optional[SensorArray]:
+        """Columnar sensors of a farm, O(1)"""
+        self._ensure_fresh()
+        return self._sensors.get(farm_id)
+
+    def update_settings(self, farm_id: str, settings: dict) -> dict:
+        """Merge settings into a farm in memory and schedule a batched flush"""
+        self._ensure_fresh()
+        with self._lock:
+            farm = self._by_id.get(farm_id)
+            if farm is None:
+                raise ValueError(f"Farm not found: {farm_id}")
+
+            merged = {**farm.get("settings", {}), **settings}
+            farm["settings"] = merged
+            self.pending_updates += 1
+            self._schedule_flush()
+            return merged
+
+    def flush(self) -> None:
+        """Write pending changes now (atomic rename); no-op when nothing is pending"""
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self.pending_updates:
+                    return
+                batched = self.pending_updates
+                # El archivo completo, incluidas las fincas inválidas que no se sirven
+                payload = json.dumps(self._serialize(), indent=2, ensure_ascii=False)
+                self.pending_updates = 0
+
+            try:
+                self._atomic_write(payload)
+            except Exception as e:
+                logger.error(f"Error writing farms file: {e}")
+                with self._lock:
+                    self.pending_updates += batched
+                raise
+
+            with self._lock:
+                # Nuestra propia escritura no debe disparar una recarga
+                self._signature = self._stat_signature()
+                self.flushes += 1
+            logger.info(f"Flushed {batched} farm updates to {self.path.name}")
+
+    def close(self) -> None:
+        """Flush pending writes (called on app shutdown)"""
+        self.flush()
+
+    def _serialize(self) -> List[Any]:
+        """File contents: valid farms with their sensors rebuilt from the columns (caller holds the lock)"""
+        documents = []
+        for document, stored in zip(self._documents, self._document_sensors):
+            if stored is None:
+                documents.append(document)
+                continue
+            slot, sensors = stored
+            items = list(document.items())
+            items.insert(slot, ("sensors", sensors.to_dicts()))
+            documents.append(dict(items))
+        return documents
+
+    def _schedule_flush(self) -> None:
+        # Debounce: la primera actualización arma el timer, las siguientes se suman al mismo flush
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self._timed_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _timed_flush(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            # Ya logueado en flush(); los cambios quedan pendientes para el próximo intento
+            with self._lock:
+                self._flush_timer = None
+                self._schedule_flush()
+
+    def _should_fsync(self) -> bool:
+        if self.fsync_policy == "always":
+            return True
+        if self.fsync_policy == "interval":
+            return time.monotonic() - self._last_fsync >= config.FARM_FSYNC_INTERVAL_SECONDS
+        return False
+
+    def _atomic_write(self, payload: str) -> None:
+        fsync = self._should_fsync()
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            if self.path.exists():
+                os.chmod(tmp_path, self.path.stat().st_mode & 0o777)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        if fsync:
+            # fsync del directorio para que el rename sobreviva a un corte de energía
+            dir_fd = os.open(self.path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            self._last_fsync = time.monotonic()
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _ensure_fresh(self) -> None:
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+
+        with self._lock:
+            # Otro thread pudo recargar mientras esperábamos el lock
+            if signature == self._signature:
+                return
+            if self.pending_updates:
+                # Hay cambios en memoria sin escribir: prevalecen sobre el archivo
+                logger.warning(f"{self.path.name} changed on disk with pending updates; keeping in-memory version")
+                return
+            self._load(signature)
+
+    def _load(self, signature: Optional[Tuple[int, int]]) -> None:
+        if signature is None:
+            logger.error(f"Farms data file not found: {self.path}")
+            self._replace([], [], signature, {}, [])
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            # Mantener la última versión válida (p.ej. archivo a medio escribir)
+            logger.error(f"Error loading farms, keeping previous snapshot: {e}")
+            return
+
+        documents: List[Any] = []
+        raw: List[dict] = []
+        sensors: Dict[str, SensorArray] = {}
+        document_sensors: List[Optional[Tuple[int, SensorArray]]] = []
+        for farm_data in data:
+            try:
+                farm_sensors = validate_farm(farm_data)
+            except Exception as e:
+                farm_id = farm_data.get("id", "?") if isinstance(farm_data, dict) else "?"
+                logger.error(f"Invalid farm {farm_id} skipped: {e}")
+                # Se conserva tal cual para no perderla al reescribir el archivo
+                documents.append(farm_data)
+                document_sensors.append(None)
+                continue
+            # Los dicts de sensores no se guardan: solo sus columnas
+            farm = {key: value for key, value in farm_data.items() if key != "sensors"}
+            sensors[farm["id"]] = farm_sensors
+            document_sensors.append((list(farm_data).index("sensors"), farm_sensors))
+            documents.append(farm)
+            raw.append(farm)
+
+        self._replace(documents, raw, signature, sensors, document_sensors)
+
+    def _replace(
+        self,
+        documents: List[Any],
+        raw: List[dict],
+        signature: Optional[Tuple[int, int]],
+        sensors: Dict[str, SensorArray],
+        document_sensors: List[Optional[Tuple[int, SensorArray]]]
+    ) -> None:
+        self._documents = documents
+        self._raw = raw
+        self._sensors = sensors
+        self._document_sensors = document_sensors
+        self._by_id = {farm["id"]: farm for farm in raw}
+        self._positions = {farm["id"]: position for position, farm in enumerate(raw)}
+        self._signature = signature
+        self.version += 1
+        logger.info(f"Loaded {len(raw)} farms (version {self.version})")
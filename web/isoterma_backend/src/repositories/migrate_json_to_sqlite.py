@@ -0,0 +1,41 @@
+"""Import data/fincas.json into the SQLite farm store.
+
+Usage (from isoterma_backend/):
+    python -m src.repositories.migrate_json_to_sqlite [--json data/fincas.json] [--db data/fincas.db]
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+
+from src.repositories.factory import BACKEND_DIR, sqlite_path
+from src.repositories.sqlite_farm_repository import SqliteFarmRepository
+from src.utils.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(json_path: Path, db_path: Path) -> None:
+    with open(json_path, 'r', encoding='utf-8') as f:
+        farms = json.load(f)
+
+    repository = SqliteFarmRepository(db_path)
+    try:
+        farm_count, sensor_count = repository.import_farms(farms)
+    finally:
+        repository.close()
+    logger.info(f"Imported {farm_count} farms and {sensor_count} sensors into {db_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import fincas.json into SQLite")
+    parser.add_argument("--json", type=Path, default=BACKEND_DIR / "data" / "fincas.json")
+    parser.add_argument("--db", type=Path, default=sqlite_path())
+    args = parser.parse_args()
+
+    setup_logging()
+    migrate(args.json, args.db)
+
+
+if __name__ == "__main__":
+    main()
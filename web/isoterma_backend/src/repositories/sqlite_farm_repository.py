@@ -0,0 +1,345 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.models.farm_models import Farm
+from src.models.sensor_array import SensorArray, farm_model, validate_farm
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS farms (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    address TEXT NOT NULL,
+    region TEXT NOT NULL,
+    area_hectares REAL NOT NULL,
+    north REAL NOT NULL,
+    south REAL NOT NULL,
+    west REAL NOT NULL,
+    east REAL NOT NULL,
+    crops TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_farms_position ON farms(position);
+
+CREATE TABLE IF NOT EXISTS sensors (
+    farm_id TEXT NOT NULL REFERENCES farms(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    status TEXT NOT NULL,
+    temperature REAL,
+    PRIMARY KEY (farm_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_sensors_farm_position ON sensors(farm_id, position);
+CREATE INDEX IF NOT EXISTS idx_sensors_lat_lon ON sensors(latitude, longitude);
+
+CREATE TABLE IF NOT EXISTS farm_settings (
+    farm_id TEXT NOT NULL REFERENCES farms(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (farm_id, key)
+);
+"""
+
+# Sentencias fijas: sqlite3 las prepara una vez y las reutiliza desde su cache por conexión
+SELECT_FARMS = """
+SELECT id, name, latitude, longitude, address, region, area_hectares,
+       north, south, west, east, crops, owner, created_at
+FROM farms ORDER BY position
+"""
+SELECT_FARM = """
+SELECT id, name, latitude, longitude, address, region, area_hectares,
+       north, south, west, east, crops, owner, created_at
+FROM farms WHERE id = ?
+"""
+SELECT_SENSORS = "SELECT farm_id, id, latitude, longitude, status, temperature FROM sensors ORDER BY farm_id, position"
+SELECT_FARM_SENSORS = """
+SELECT farm_id, id, latitude, longitude, status, temperature
+FROM sensors WHERE farm_id = ? ORDER BY position
+"""
+SELECT_SETTINGS = "SELECT farm_id, key, value FROM farm_settings ORDER BY rowid"
+SELECT_FARM_SETTINGS = "SELECT farm_id, key, value FROM farm_settings WHERE farm_id = ? ORDER BY rowid"
+FARM_EXISTS = "SELECT 1 FROM farms WHERE id = ?"
+FARM_POSITION = "SELECT position FROM farms WHERE id = ?"
+
+# Columnas de la tabla farms que arma cada campo del documento (proyección en el SELECT)
+FIELD_COLUMNS = {
+    "id": ("id",),
+    "name": ("name",),
+    "location": ("latitude", "longitude", "address", "region"),
+    "area_hectares": ("area_hectares",),
+    "bounds": ("north", "south", "west", "east"),
+    "crops": ("crops",),
+    "owner": ("owner",),
+    "created_at": ("created_at",),
+}
+UPSERT_SETTING = """
+INSERT INTO farm_settings (farm_id, key, value) VALUES (?, ?, ?)
+ON CONFLICT (farm_id, key) DO UPDATE SET value = excluded.value
+"""
+INSERT_FARM = """
+INSERT INTO farms (id, position, name, latitude, longitude, address, region, area_hectares,
+                   north, south, west, east, crops, owner, created_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_SENSOR = """
+INSERT INTO sensors (farm_id, id, position, latitude, longitude, status, temperature)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# FARM_FSYNC_POLICY → PRAGMA synchronous (en WAL, NORMAL solo hace fsync en checkpoints)
+SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+
+class SqliteFarmRepository:
+    """Farm store on local SQLite (WAL mode) with indexed farms, sensors and settings tables.
+
+    Same interface as FarmRepository: documents have no "sensors" key and
+    sensors are served as SensorArray columns. Full listings (documents and
+    sensor columns) are cached per data version; single-farm lookups go
+    straight to the primary-key indexes. Settings writes from this process
+    patch the cached documents in place instead of invalidating them.
+    """
+
+    def __init__(self, path: Path, fsync_policy: str = config.FARM_FSYNC_POLICY):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={SYNCHRONOUS.get(fsync_policy, 'FULL')}")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._local_writes = 0
+        self._data_version: Optional[int] = None
+        self._version = 0
+        self._snapshot_version = -1
+        self._raw: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self._sensors: Dict[str, SensorArray] = {}
+
+    @property
+    def version(self) -> int:
+        """Bumped on imports and on commits from other connections (migrations, other workers)"""
+        with self._lock:
+            return self._current_version()
+
+    def _current_version(self) -> int:
+        """Caller holds the lock"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._version += 1
+        return self._version + self._local_writes
+
+    def list_farms(self) -> List[Farm]:
+        raw, sensors = self._snapshot()
+        return [farm_model(farm, sensors[farm["id"]]) for farm in raw]
+
+    def list_raw(self) -> List[dict]:
+        return self._snapshot()[0]
+
+    def get(self, farm_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(SELECT_FARM, (farm_id,)).fetchone()
+            if row is None:
+                return None
+            settings = self._conn.execute(SELECT_FARM_SETTINGS, (farm_id,)).fetchall()
+        return self._build([row], settings)[0]
+
+    def list_page(self, fields: Sequence[str], after: Optional[str] = None, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        """Projected farms after the given id (keyset on position), reading only the requested columns"""
+        columns = self._columns(fields)
+        with self._lock:
+            position = -1
+            if after is not None:
+                row = self._conn.execute(FARM_POSITION, (after,)).fetchone()
+                if row is None:
+                    raise ValueError(f"Invalid cursor: unknown farm {after}")
+                position = row[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM farms WHERE position > ? ORDER BY position LIMIT ?",
+                (position, limit + 1)
+            ).fetchall()
+            farms = self._project(columns, rows[:limit], fields)
+        return farms, rows[limit - 1][0] if len(rows) > limit else None
+
+    def get_fields(self, farm_id: str, fields: Sequence[str]) -> Optional[dict]:
+        columns = self._columns(fields)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM farms WHERE id = ?", (farm_id,)).fetchall()
+            farms = self._project(columns, rows, fields)
+        return farms[0] if farms else None
+
+    @staticmethod
+    def _columns(fields: Sequence[str]) -> List[str]:
+        # El id siempre se lee: lo usan el cursor y los settings
+        columns = ["id"]
+        for field in fields:
+            columns.extend(column for column in FIELD_COLUMNS.get(field, ()) if column not in columns)
+        return columns
+
+    def _project(self, columns: List[str], rows: list, fields: Sequence[str]) -> List[dict]:
+        """Rebuild only the requested document fields from the selected columns (caller holds the lock)"""
+        settings_by_farm: Dict[str, dict] = {}
+        if "settings" in fields and rows:
+            farm_ids = [row[0] for row in rows]
+            for farm_id, key, value in self._conn.execute(
+                f"SELECT farm_id, key, value FROM farm_settings WHERE farm_id IN ({', '.join('?' * len(farm_ids))}) ORDER BY rowid",
+                farm_ids
+            ):
+                settings_by_farm.setdefault(farm_id, {})[key] = json.loads(value)
+
+        farms = []
+        for row in rows:
+            values = dict(zip(columns, row))
+            farm = {}
+            for field in fields:
+                if field == "location":
+                    farm[field] = {key: values[key] for key in FIELD_COLUMNS["location"]}
+                elif field == "bounds":
+                    farm[field] = {key: values[key] for key in FIELD_COLUMNS["bounds"]}
+                elif field == "crops":
+                    farm[field] = json.loads(values["crops"])
+                elif field == "settings":
+                    if values["id"] in settings_by_farm:
+                        farm[field] = settings_by_farm[values["id"]]
+                elif field in FIELD_COLUMNS:
+                    farm[field] = values[field]
+            farms.append(farm)
+        return farms
+
+    def get_model(self, farm_id: str) -> Optional[Farm]:
+        farm = self.get(farm_id)
+        return farm_model(farm, self._farm_sensors(farm_id)) if farm else None
+
+    def sensors(self, farm_id: str) -> Optional[SensorArray]:
+        return self._snapshot()[1].get(farm_id)
+
+    def _farm_sensors(self, farm_id: str) -> SensorArray:
+        """Columns of one farm straight from the sensors index (no full snapshot)"""
+        with self._lock:
+            rows = self._conn.execute(SELECT_FARM_SENSORS, (farm_id,)).fetchall()
+        return self._build_arrays([(farm_id,)], rows)[farm_id]
+
+    def update_settings(self, farm_id: str, settings: dict) -> dict:
+        with self._lock:
+            if self._conn.execute(FARM_EXISTS, (farm_id,)).fetchone() is None:
+                raise ValueError(f"Farm not found: {farm_id}")
+            with self._conn:
+                self._conn.executemany(
+                    UPSERT_SETTING,
+                    [(farm_id, key, json.dumps(value)) for key, value in settings.items()]
+                )
+            rows = self._conn.execute(SELECT_FARM_SETTINGS, (farm_id,)).fetchall()
+            merged = {key: json.loads(value) for _, key, value in rows}
+            # Escritura propia: se aplica al snapshot en memoria sin recargar todas las fincas
+            farm = self._by_id.get(farm_id)
+            if farm is not None:
+                farm["settings"] = merged
+        return merged
+
+    def import_farms(self, farms: List[dict]) -> Tuple[int, int]:
+        """Replace all data with the given farm documents (fincas.json format) in one transaction"""
+        farm_rows = []
+        sensor_rows = []
+        setting_rows = []
+        for position, farm in enumerate(farms):
+            validate_farm(farm)  # validar antes de escribir
+            location = farm["location"]
+            bounds = farm["bounds"]
+            farm_rows.append((
+                farm["id"], position, farm["name"],
+                location["latitude"], location["longitude"], location["address"], location["region"],
+                farm["area_hectares"],
+                bounds["north"], bounds["south"], bounds["west"], bounds["east"],
+                json.dumps(farm["crops"], ensure_ascii=False), farm["owner"], farm["created_at"]
+            ))
+            for sensor_position, sensor in enumerate(farm.get("sensors", [])):
+                sensor_rows.append((
+                    farm["id"], sensor["id"], sensor_position,
+                    sensor["latitude"], sensor["longitude"], sensor["status"], sensor.get("temperature")
+                ))
+            for key, value in farm.get("settings", {}).items():
+                setting_rows.append((farm["id"], key, json.dumps(value)))
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM farm_settings")
+                self._conn.execute("DELETE FROM sensors")
+                self._conn.execute("DELETE FROM farms")
+                self._conn.executemany(INSERT_FARM, farm_rows)
+                self._conn.executemany(INSERT_SENSOR, sensor_rows)
+                self._conn.executemany(UPSERT_SETTING, setting_rows)
+            self._local_writes += 1
+        return len(farm_rows), len(sensor_rows)
+
+    def flush(self) -> None:
+        """Writes are committed per update; nothing to flush"""
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _snapshot(self) -> Tuple[List[dict], Dict[str, SensorArray]]:
+        with self._lock:
+            version = self._current_version()
+            if version != self._snapshot_version:
+                # Bajo el lock: un update_settings concurrente no puede parchear un snapshot a punto de reemplazarse
+                farms = self._conn.execute(SELECT_FARMS).fetchall()
+                sensors = self._conn.execute(SELECT_SENSORS).fetchall()
+                settings = self._conn.execute(SELECT_SETTINGS).fetchall()
+                self._raw = self._build(farms, settings)
+                self._by_id = {farm["id"]: farm for farm in self._raw}
+                self._sensors = self._build_arrays(farms, sensors)
+                self._snapshot_version = version
+                logger.info(f"Loaded {len(self._raw)} farms from SQLite")
+            return self._raw, self._sensors
+
+    @staticmethod
+    def _build_arrays(farms: list, sensors: list) -> Dict[str, SensorArray]:
+        """Sensor columns per farm straight from the rows (ordered by farm_id, position)"""
+        rows_by_farm: Dict[str, list] = {}
+        for row in sensors:
+            rows_by_farm.setdefault(row[0], []).append(row)
+        arrays = {}
+        for farm in farms:
+            rows = rows_by_farm.get(farm[0], [])
+            _, ids, lat, lon, status, temperature = zip(*rows) if rows else ((),) * 6
+            arrays[farm[0]] = SensorArray.from_columns(ids, lat, lon, status, temperature)
+        return arrays
+
+    @staticmethod
+    def _build(farms: list, settings: list) -> List[dict]:
+        """Rebuild fincas.json-shaped documents (without sensors) from table rows"""
+        settings_by_farm: Dict[str, dict] = {}
+        for farm_id, key, value in settings:
+            settings_by_farm.setdefault(farm_id, {})[key] = json.loads(value)
+
+        result = []
+        for (farm_id, name, lat, lon, address, region, area,
+             north, south, west, east, crops, owner, created_at) in farms:
+            farm = {
+                "id": farm_id,
+                "name": name,
+                "location": {"latitude": lat, "longitude": lon, "address": address, "region": region},
+                "area_hectares": area,
+                "bounds": {"north": north, "south": south, "west": west, "east": east},
+                "crops": json.loads(crops),
+                "owner": owner,
+                "created_at": created_at
+            }
+            if farm_id in settings_by_farm:
+                farm["settings"] = settings_by_farm[farm_id]
+            result.append(farm)
+        return result
@@ -0,0 +1,158 @@
+import struct
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# Puntos por chunk: acota lo que hay que decodificar para leer una ventana corta
+CHUNK_POINTS = 1024
+# Las lecturas vienen con resolución de 0.1 °C (los round(..., 1) de los scripts de heatmap)
+VALUE_SCALE = 10
+
+MODE_SCALED = 0
+MODE_XOR = 1
+
+MAGIC = b"TSC1"
+# series, height, count, t0 (ms), primer delta (ms), ancho dod, modo, ancho valores, shift xor, primer valor
+CHUNK_HEADER = struct.Struct("<IBIqqBBBBI")
+LENGTH = struct.Struct("<I")
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+
+def _bit_width(values: np.ndarray) -> int:
+    if not len(values):
+        return 0
+    return int(values.max()).bit_length()
+
+
+def pack_bits(values: np.ndarray, width: int) -> bytes:
+    """Fixed-width big-endian bit packing of unsigned ints (vectorized)"""
+    if width == 0 or not len(values):
+        return b""
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    bits = ((values.astype(np.uint64)[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+    return np.packbits(bits.ravel()).tobytes()
+
+
+def unpack_bits(buffer: bytes, count: int, width: int) -> np.ndarray:
+    if width == 0 or count == 0:
+        return np.zeros(count, dtype=np.uint64)
+    bits = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8), count=count * width).reshape(count, width)
+    # Reagrupar de a 8 bits y combinar bytes: evita multiplicar por una columna por bit
+    pad = (-width) % 8
+    if pad:
+        bits = np.concatenate([np.zeros((count, pad), dtype=np.uint8), bits], axis=1)
+    packed = np.packbits(bits, axis=1).astype(np.uint64)
+    result = np.zeros(count, dtype=np.uint64)
+    for column in range(packed.shape[1]):
+        result = (result << np.uint64(8)) | packed[:, column]
+    return result
+
+
+def _packed_size(count: int, width: int) -> int:
+    return (count * width + 7) // 8
+
+
+def encode_chunk(series: int, height: int, ts_ms: np.ndarray, temps: np.ndarray) -> bytes:
+    """One chunk (sorted by ts): delta-of-delta timestamps + scaled-int or XOR values, both bit-packed"""
+    count = len(ts_ms)
+    ts_ms = ts_ms.astype(np.int64)
+    temps = temps.astype(np.float32)
+
+    deltas = np.diff(ts_ms)
+    first_delta = int(deltas[0]) if count > 1 else 0
+    dod = _zigzag(np.diff(deltas))
+    ts_width = _bit_width(dod)
+
+    finite = bool(np.isfinite(temps).all()) and np.abs(temps).max() < 2 ** 31 / VALUE_SCALE
+    scaled = np.round(temps.astype(np.float64) * VALUE_SCALE).astype(np.int64) if finite else None
+    if finite and np.array_equal((scaled / VALUE_SCALE).astype(np.float32), temps):
+        # Camino habitual: enteros en décimas de grado, delta + zigzag
+        mode = MODE_SCALED
+        first_value = int(scaled[0]) & 0xFFFFFFFF
+        residuals = _zigzag(np.diff(scaled))
+        shift = 0
+    else:
+        # Estilo Gorilla: XOR de los bits float32 con el anterior, sin los ceros finales comunes del chunk
+        mode = MODE_XOR
+        bits = temps.view(np.uint32).astype(np.uint64)
+        first_value = int(bits[0])
+        residuals = bits[1:] ^ bits[:-1]
+        nonzero = residuals[residuals != 0]
+        # Bit menos significativo encendido de cada XOR (v & -v); el menor define el shift común
+        lowest = nonzero & (np.uint64(0) - nonzero)
+        shift = int(lowest.min()).bit_length() - 1 if len(nonzero) else 0
+        residuals = residuals >> np.uint64(shift)
+    value_width = _bit_width(residuals)
+
+    header = CHUNK_HEADER.pack(
+        series, height, count, int(ts_ms[0]), first_delta,
+        ts_width, mode, value_width, shift, first_value
+    )
+    return header + pack_bits(dod, ts_width) + pack_bits(residuals, value_width)
+
+
+def read_chunk_header(chunk: bytes) -> Tuple[int, int, int]:
+    """(series, height, count) without decoding the payload"""
+    series, height, count = CHUNK_HEADER.unpack_from(chunk)[:3]
+    return series, height, count
+
+
+def decode_chunk(chunk: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """(ts_ms int64, temps float32) of one chunk"""
+    (series, height, count, t0, first_delta,
+     ts_width, mode, value_width, shift, first_value) = CHUNK_HEADER.unpack_from(chunk)
+    offset = CHUNK_HEADER.size
+
+    ts_ms = np.empty(count, dtype=np.int64)
+    ts_ms[0] = t0
+    if count > 1:
+        dod_count = count - 2
+        dod_size = _packed_size(dod_count, ts_width)
+        dod = _unzigzag(unpack_bits(chunk[offset:offset + dod_size], dod_count, ts_width))
+        offset += dod_size
+        deltas = np.concatenate(([first_delta], first_delta + np.cumsum(dod)))
+        ts_ms[1:] = t0 + np.cumsum(deltas)
+
+    residuals = unpack_bits(chunk[offset:offset + _packed_size(count - 1, value_width)], count - 1, value_width)
+    if mode == MODE_SCALED:
+        first = first_value - (1 << 32) if first_value >= 1 << 31 else first_value
+        scaled = np.concatenate(([first], first + np.cumsum(_unzigzag(residuals))))
+        temps = (scaled / VALUE_SCALE).astype(np.float32)
+    else:
+        xors = residuals << np.uint64(shift)
+        bits = np.bitwise_xor.accumulate(np.concatenate(([np.uint64(first_value)], xors)))
+        temps = bits.astype(np.uint32).view(np.float32)
+    return ts_ms, temps
+
+
+def encode_series(series: int, height: int, ts_ms: np.ndarray, temps: np.ndarray) -> List[bytes]:
+    """Split one sorted series into CHUNK_POINTS-sized encoded chunks"""
+    return [
+        encode_chunk(series, height, ts_ms[start:start + CHUNK_POINTS], temps[start:start + CHUNK_POINTS])
+        for start in range(0, len(ts_ms), CHUNK_POINTS)
+    ]
+
+
+def write_chunks(chunks: List[bytes]) -> bytes:
+    """File body: magic + length-prefixed chunks"""
+    return MAGIC + b"".join(LENGTH.pack(len(chunk)) + chunk for chunk in chunks)
+
+
+def iter_chunks(data: bytes) -> Iterator[bytes]:
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a time-series chunk file")
+    offset = len(MAGIC)
+    while offset + LENGTH.size <= len(data):
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        yield data[offset:offset + length]
+        offset += length
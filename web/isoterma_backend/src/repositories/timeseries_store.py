@@ -0,0 +1,398 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.repositories import timeseries_codec
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+
+# Registros binarios de tamaño fijo: los archivos de partición solo crecen con append
+RAW_DTYPE = np.dtype([("ts_ms", "<i8"), ("series", "<u4"), ("height", "u1"), ("temp", "<f4")])
+# Agregados parciales: varios registros de la misma clave se combinan al leer o al compactar
+ROLLUP_DTYPE = np.dtype([
+    ("bucket", "<i8"), ("series", "<u4"), ("height", "u1"),
+    ("count", "<u4"), ("sum", "<f8"), ("min", "<f4"), ("max", "<f4")
+])
+
+ROLLUP_SECONDS = {"1m": 60, "15m": 900, "1h": 3600}
+RESOLUTIONS = ("raw",) + tuple(ROLLUP_SECONDS)
+# Rollups de un día cerrado ordenados por (serie, altura, bucket): una serie se lee con búsqueda binaria
+SORTED_SUFFIX = ".srt"
+
+
+def retention_days() -> Dict[str, int]:
+    return {
+        "raw": config.TIMESERIES_RETENTION_RAW_DAYS,
+        "1m": config.TIMESERIES_RETENTION_1M_DAYS,
+        "15m": config.TIMESERIES_RETENTION_15M_DAYS,
+        "1h": config.TIMESERIES_RETENTION_1H_DAYS,
+    }
+
+
+def _group_starts(*keys: np.ndarray) -> np.ndarray:
+    """Start index of each run of equal keys in already-sorted arrays"""
+    change = np.zeros(len(keys[0]), dtype=bool)
+    change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+
+def aggregate(records: np.ndarray, width: int) -> np.ndarray:
+    """Raw records → one partial min/sum/max/count record per (bucket, series, height)"""
+    bucket = (records["ts_ms"] // 1000 // width) * width
+    order = np.lexsort((records["height"], records["series"], bucket))
+    bucket = bucket[order]
+    series = records["series"][order]
+    height = records["height"][order]
+    temp = records["temp"][order].astype(np.float64)
+
+    starts = _group_starts(bucket, series, height)
+    out = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    out["bucket"] = bucket[starts]
+    out["series"] = series[starts]
+    out["height"] = height[starts]
+    out["count"] = np.diff(np.append(starts, len(temp)))
+    out["sum"] = np.add.reduceat(temp, starts)
+    out["min"] = np.minimum.reduceat(temp, starts)
+    out["max"] = np.maximum.reduceat(temp, starts)
+    return out
+
+
+def merge_rollups(records: np.ndarray) -> np.ndarray:
+    """Combine partial rollup records sharing (bucket, series, height)"""
+    if not len(records):
+        return records
+    order = np.lexsort((records["height"], records["series"], records["bucket"]))
+    records = records[order]
+    starts = _group_starts(records["bucket"], records["series"], records["height"])
+    if len(starts) == len(records):
+        return records
+
+    out = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    out["bucket"] = records["bucket"][starts]
+    out["series"] = records["series"][starts]
+    out["height"] = records["height"][starts]
+    out["count"] = np.add.reduceat(records["count"], starts)
+    out["sum"] = np.add.reduceat(records["sum"], starts)
+    out["min"] = np.minimum.reduceat(records["min"], starts)
+    out["max"] = np.maximum.reduceat(records["max"], starts)
+    return out
+
+
+class TimeSeriesStore:
+    """Embedded store for per-sensor, per-height temperature history.
+
+    Layout under `root`: one append-only binary file per resolution and UTC
+    day (raw/2026-02-20.bin, 1m/..., 15m/..., 1h/...) plus series.json, the
+    sensor_id → series number registry. Every append writes the raw points
+    and their 1m/15m/1h partial aggregates; maintain() compacts closed days
+    and deletes partitions past the retention of their resolution.
+
+    Closed raw days are re-encoded per series into compressed chunks
+    (raw/2026-02-20.tsc, see timeseries_codec) and closed rollup days are
+    merged and sorted by series (1h/2026-02-20.srt), so a query reads only
+    its own series; late points for such a day land in a new .bin and are
+    folded in on the next maintain().
+
+    Appends, queries and the file swaps of maintain() share one lock, so a
+    query never sees a day both before and after it was re-encoded; the
+    encoding itself runs outside the lock.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._registry_path = self.root / "series.json"
+        self._series: Dict[str, int] = {}
+        self.points_written = 0
+        for resolution in RESOLUTIONS:
+            (self.root / resolution).mkdir(parents=True, exist_ok=True)
+        if self._registry_path.exists():
+            with open(self._registry_path, 'r', encoding='utf-8') as f:
+                self._series = json.load(f)
+
+    def append(self, sensor_ids: np.ndarray, ts: np.ndarray, heights: np.ndarray, temps: np.ndarray) -> int:
+        """Append points (ts in epoch seconds) and update their rollups; returns points written"""
+        if not len(ts):
+            return 0
+
+        with self._lock:
+            records = np.empty(len(ts), dtype=RAW_DTYPE)
+            records["ts_ms"] = np.round(ts * 1000).astype(np.int64)
+            records["series"] = self._series_numbers(sensor_ids)
+            records["height"] = heights
+            records["temp"] = temps
+
+            self._append_partitioned("raw", records, records["ts_ms"] // 1000)
+            for resolution, width in ROLLUP_SECONDS.items():
+                rollups = aggregate(records, width)
+                self._append_partitioned(resolution, rollups, rollups["bucket"])
+            self.points_written += len(records)
+        return len(records)
+
+    def query(self, sensor_id: str, height: int, start: float, end: float, resolution: str) -> dict:
+        """Points of one series in [start, end) as columns; rollups carry min/mean/max/count"""
+        series = self._series.get(sensor_id)
+        if resolution == "raw":
+            records = self._read_raw_range(series, height, start, end) if series is not None else np.empty(0, dtype=RAW_DTYPE)
+            ts = records["ts_ms"] / 1000.0
+            records = records[(ts >= start) & (ts < end)]
+            records = records[np.argsort(records["ts_ms"], kind="stable")]
+            return {
+                "ts": (records["ts_ms"] / 1000.0).tolist(),
+                "temperature": np.round(records["temp"].astype(np.float64), 2).tolist()
+            }
+
+        width = ROLLUP_SECONDS[resolution]
+        if series is None:
+            records = np.empty(0, dtype=ROLLUP_DTYPE)
+        else:
+            records = self._read_rollup_range(resolution, series, height, start - width, end)
+            records = records[(records["bucket"] + width > start) & (records["bucket"] < end)]
+        records = merge_rollups(records)
+        return {
+            "ts": records["bucket"].tolist(),
+            "min": np.round(records["min"].astype(np.float64), 2).tolist(),
+            "mean": np.round(records["sum"] / np.maximum(records["count"], 1), 2).tolist(),
+            "max": np.round(records["max"].astype(np.float64), 2).tolist(),
+            "count": records["count"].tolist()
+        }
+
+    def maintain(self, now: Optional[float] = None) -> dict:
+        """Compact closed days (raw ones into encoded chunks) and drop partitions past their retention"""
+        now = now or time.time()
+        today = int(now // DAY_SECONDS)
+        deleted = 0
+        compacted = 0
+        for resolution, days in retention_days().items():
+            oldest = today - days
+            for path in sorted((self.root / resolution).glob("*.*")):
+                day = self._path_day(path)
+                if day is None:
+                    continue
+                if day < oldest:
+                    path.unlink(missing_ok=True)
+                    deleted += 1
+                elif day < today and path.suffix == ".bin":
+                    if resolution == "raw":
+                        compacted += self._encode_raw_day(day)
+                    else:
+                        compacted += self._sort_rollup_day(resolution, day)
+        if deleted or compacted:
+            logger.info(f"Time-series maintenance: {compacted} partitions compacted, {deleted} expired")
+        return {"compacted": compacted, "deleted": deleted}
+
+    def stats(self) -> dict:
+        partitions = {}
+        for resolution in RESOLUTIONS:
+            files = [path for path in (self.root / resolution).glob("*.*") if path.suffix in (".bin", ".tsc", SORTED_SUFFIX)]
+            partitions[resolution] = {
+                "partitions": len(files),
+                "bytes": sum(path.stat().st_size for path in files)
+            }
+        return {"series": len(self._series), "points_written": self.points_written, "resolutions": partitions}
+
+    def _series_numbers(self, sensor_ids: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(sensor_ids.astype(str), return_inverse=True)
+        new = [sensor_id for sensor_id in unique.tolist() if sensor_id not in self._series]
+        if new:
+            for sensor_id in new:
+                self._series[sensor_id] = len(self._series)
+            self._write_registry()
+        numbers = np.array([self._series[sensor_id] for sensor_id in unique.tolist()], dtype=np.uint32)
+        return numbers[inverse]
+
+    def _write_registry(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".series.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._series, f)
+        os.replace(tmp_path, self._registry_path)
+
+    def _partition(self, resolution: str, day: int, suffix: str = ".bin") -> Path:
+        return self.root / resolution / f"{np.datetime64(day, 'D')}{suffix}"
+
+    @staticmethod
+    def _path_day(path: Path) -> Optional[int]:
+        try:
+            return int(np.datetime64(path.stem, "D").astype(np.int64))
+        except ValueError:
+            return None
+
+    def _append_partitioned(self, resolution: str, records: np.ndarray, seconds: np.ndarray) -> None:
+        days = seconds // DAY_SECONDS
+        oldest = int(time.time() // DAY_SECONDS) - retention_days()[resolution]
+        for day in np.unique(days).tolist():
+            if day < oldest:
+                continue
+            with open(self._partition(resolution, day), "ab") as f:
+                f.write(records[days == day].tobytes())
+
+    def _read_partition(self, path: Path, dtype: np.dtype) -> np.ndarray:
+        try:
+            count = path.stat().st_size // dtype.itemsize
+        except FileNotFoundError:
+            return np.empty(0, dtype=dtype)
+        # Un append en curso puede dejar un registro incompleto al final: se ignora
+        return np.fromfile(path, dtype=dtype, count=count)
+
+    def _read_rollup_range(self, resolution: str, series: int, height: int, start: float, end: float) -> np.ndarray:
+        """Rollup records of one series: a binary-searched slice of each closed day plus its pending .bin"""
+        parts: List[np.ndarray] = []
+        for day in range(int(start // DAY_SECONDS), int(end // DAY_SECONDS) + 1):
+            with self._lock:
+                parts.append(self._read_sorted_series(self._partition(resolution, day, SORTED_SUFFIX), series, height))
+                pending = self._read_partition(self._partition(resolution, day), ROLLUP_DTYPE)
+            # Solo el día abierto (o lecturas tardías) queda en .bin sin ordenar
+            parts.append(pending[(pending["series"] == series) & (pending["height"] == height)])
+        return np.concatenate(parts)
+
+    @staticmethod
+    def _read_sorted_series(path: Path, series: int, height: int) -> np.ndarray:
+        """Records of (series, height) from a file sorted by (series, height, bucket), touching O(log n) records"""
+        try:
+            count = path.stat().st_size // ROLLUP_DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if not count:
+            return np.empty(0, dtype=ROLLUP_DTYPE)
+
+        records = np.memmap(path, dtype=ROLLUP_DTYPE, mode="r", shape=(count,))
+        key = (series, height)
+
+        def bound(right: bool) -> int:
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                record = records[middle]
+                middle_key = (int(record["series"]), int(record["height"]))
+                if middle_key < key or (right and middle_key == key):
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+
+        selected = np.array(records[bound(False):bound(True)])
+        del records
+        return selected
+
+    @staticmethod
+    def _read_bytes(path: Path) -> bytes:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return b""
+
+    @staticmethod
+    def _decode(data: bytes, series: Optional[int] = None, height: Optional[int] = None) -> np.ndarray:
+        """Decode the chunks of a closed raw day (.tsc bytes), only those of (series, height) when given"""
+        if not data:
+            return np.empty(0, dtype=RAW_DTYPE)
+
+        parts = []
+        for chunk in timeseries_codec.iter_chunks(data):
+            chunk_series, chunk_height, count = timeseries_codec.read_chunk_header(chunk)
+            # El header alcanza para saltear los chunks de otras series sin decodificarlos
+            if series is not None and (chunk_series != series or chunk_height != height):
+                continue
+            ts_ms, temps = timeseries_codec.decode_chunk(chunk)
+            records = np.empty(count, dtype=RAW_DTYPE)
+            records["ts_ms"] = ts_ms
+            records["series"] = chunk_series
+            records["height"] = chunk_height
+            records["temp"] = temps
+            parts.append(records)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=RAW_DTYPE)
+
+    def _read_raw_range(self, series: int, height: int, start: float, end: float) -> np.ndarray:
+        parts = []
+        for day in range(int(start // DAY_SECONDS), int(end // DAY_SECONDS) + 1):
+            # Los dos archivos del día bajo el lock: nunca el .tsc nuevo junto al .bin ya incorporado
+            with self._lock:
+                encoded = self._read_bytes(self._partition("raw", day, ".tsc"))
+                records = self._read_partition(self._partition("raw", day), RAW_DTYPE)
+            parts.append(self._decode(encoded, series, height))
+            parts.append(records[(records["series"] == series) & (records["height"] == height)])
+        return np.concatenate(parts)
+
+    def _encode_raw_day(self, day: int) -> int:
+        """Fold a closed raw day (.bin plus any previous .tsc) into one compressed chunk file"""
+        path = self._partition("raw", day)
+        target = self._partition("raw", day, ".tsc")
+        with self._lock:
+            encoded = self._read_bytes(target)
+            pending = self._read_partition(path, RAW_DTYPE)
+
+        # Codificar fuera del lock: las lecturas tardías que lleguen mientras tanto quedan en el .bin
+        records = np.concatenate([self._decode(encoded), pending])
+        if not len(records):
+            with self._lock:
+                self._drop_folded(path, 0, RAW_DTYPE)
+            return 0
+
+        records = records[np.lexsort((records["ts_ms"], records["height"], records["series"]))]
+        chunks = []
+        starts = _group_starts(records["series"], records["height"])
+        ends = np.append(starts[1:], len(records))
+        for first, last in zip(starts.tolist(), ends.tolist()):
+            group = records[first:last]
+            chunks.extend(timeseries_codec.encode_series(
+                int(group["series"][0]), int(group["height"][0]), group["ts_ms"], group["temp"]
+            ))
+
+        tmp_path = self._write_tmp(target, timeseries_codec.write_chunks(chunks))
+        with self._lock:
+            os.replace(tmp_path, target)
+            self._drop_folded(path, len(pending), RAW_DTYPE)
+        logger.info(f"Encoded raw partition {target.name}: {len(records)} points in {target.stat().st_size} bytes")
+        return 1
+
+    def _drop_folded(self, path: Path, folded: int, dtype: np.dtype) -> None:
+        """Remove the first `folded` records of a .bin (already folded elsewhere), keeping any appended since (caller holds the lock)"""
+        remaining = self._read_partition(path, dtype)[folded:]
+        if not len(remaining):
+            path.unlink(missing_ok=True)
+        else:
+            os.replace(self._write_tmp(path, remaining.tobytes()), path)
+
+    @staticmethod
+    def _write_tmp(target: Path, data: bytes) -> str:
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    def _sort_rollup_day(self, resolution: str, day: int) -> int:
+        """Fold a closed rollup day (.bin plus any previous .srt) into one file merged and sorted by series"""
+        path = self._partition(resolution, day)
+        target = self._partition(resolution, day, SORTED_SUFFIX)
+        with self._lock:
+            folded = self._read_partition(target, ROLLUP_DTYPE)
+            pending = self._read_partition(path, ROLLUP_DTYPE)
+
+        records = merge_rollups(np.concatenate([folded, pending]))
+        if not len(records):
+            with self._lock:
+                self._drop_folded(path, 0, ROLLUP_DTYPE)
+            return 0
+        records = records[np.lexsort((records["bucket"], records["height"], records["series"]))]
+
+        tmp_path = self._write_tmp(target, records.tobytes())
+        with self._lock:
+            os.replace(tmp_path, target)
+            self._drop_folded(path, len(pending), ROLLUP_DTYPE)
+        return 1
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import logging
+
+from src.services.farm_service import FarmService
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/alerts", tags=["Alerts"])
+
+def _parse_filter(value: Optional[str]) -> Optional[set]:
+    if not value:
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+@router.get("")
+async def sweep_alerts(
+    severity: Optional[str] = Query(None, description="Comma-separated severities (warning, info)"),
+    alert_type: Optional[str] = Query(None, description="Comma-separated alert types (current, weather, forecast)")
+):
+    """Evaluate alerts for every farm with alerts enabled in one pass"""
+    try:
+        result = await FarmService.sweep_alerts(_parse_filter(severity), _parse_filter(alert_type))
+        return {"success": True, "data": result}
+    except Exception as e:
+        logger.error(f"Error in sweep_alerts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
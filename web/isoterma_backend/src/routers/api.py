@@ -1,10 +1,14 @@
 from fastapi import APIRouter
 
-from src.routers import weather_routes, health_routes, farm_routes
+from src.routers import weather_routes, health_routes, farm_routes, sensor_routes, alert_routes, stream_routes, reading_routes
 
 router = APIRouter(prefix="/api/v1")
 
 # Include all route modules
 router.include_router(weather_routes.router)
 router.include_router(health_routes.router)
-router.include_router(farm_routes.router)
\ No newline at end of file
+router.include_router(farm_routes.router)
+router.include_router(sensor_routes.router)
+router.include_router(alert_routes.router)
+router.include_router(stream_routes.router)
+router.include_router(reading_routes.router)
\ No newline at end of file
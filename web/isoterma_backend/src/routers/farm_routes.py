@@ -1,29 +1,55 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 import logging
 
 from src.services.farm_service import FarmService
+from src.services.farm_stream import stream_hub
+from src.utils import config
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/farms", tags=["Farms"])
 
+INCLUDES = ("sensors",)
+
+def _include_sensors(include: Optional[str]) -> bool:
+    requested = {value.strip() for value in (include or "").split(",") if value.strip()}
+    unknown = requested - set(INCLUDES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))} (allowed: {', '.join(INCLUDES)})")
+    return "sensors" in requested
+
 @router.get("")
-async def get_all_farms():
-    """Get all farms"""
+async def get_all_farms(
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,name,location (default: all but sensors)"),
+    include: Optional[str] = Query(None, description="'sensors' to embed each farm's sensors"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(config.FARMS_PAGE_DEFAULT_LIMIT, ge=1, le=config.FARMS_PAGE_MAX_LIMIT, description="Farms per page")
+):
+    """Get a page of farms"""
+    include_sensors = _include_sensors(include)
     try:
-        farms = FarmService.get_all_farms()
+        page = FarmService.list_farms(fields, include_sensors, cursor, limit)
         return {
             "success": True,
-            "farms": farms
+            "farms": page["farms"],
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in get_all_farms: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{farm_id}")
-async def get_farm_detail(farm_id: str):
+async def get_farm_detail(
+    farm_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default: all but sensors)"),
+    include: Optional[str] = Query(None, description="'sensors' to embed the sensors with their live readings")
+):
     """Get farm details by ID"""
+    include_sensors = _include_sensors(include)
     try:
-        farm = FarmService.get_farm_by_id(farm_id)
+        farm = FarmService.get_farm(farm_id, fields, include_sensors)
         if not farm:
             raise HTTPException(status_code=404, detail=f"Farm not found: {farm_id}")
         
@@ -33,6 +59,8 @@ async def get_farm_detail(farm_id: str):
         }
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in get_farm_detail: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -42,6 +70,8 @@ async def update_farm_settings(farm_id: str, settings: dict):
     """Update farm threshold settings"""
     try:
         result = FarmService.update_farm_settings(farm_id, settings)
+        # Los umbrales cambiaron: los streams abiertos reevalúan y emiten solo las diferencias
+        stream_hub.notify(farm_id)
         return {"success": True, "data": result}
     except Exception as e:
         logger.error(f"Error updating farm settings: {e}")
@@ -51,7 +81,7 @@ async def update_farm_settings(farm_id: str, settings: dict):
 async def get_farm_alerts(farm_id: str):
     """Get current alerts for farm based on thresholds"""
     try:
-        alerts = FarmService.check_temperature_alerts(farm_id)
+        alerts = await FarmService.check_temperature_alerts(farm_id)
         return {"success": True, "data": alerts}
     except Exception as e:
         logger.error(f"Error getting farm alerts: {e}")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Request
+import logging
+
+from src.services.history_service import HistoryService
+from src.services.line_listener import line_listener
+from src.services.reading_parser import FORMATS
+from src.services.reading_service import ReadingService
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/readings", tags=["Readings"])
+
+@router.post("")
+async def ingest_readings(request: Request):
+    """Bulk-ingest sensor readings streamed as NDJSON or CSV (sensor_id, ts, temp_1m, temp_2m, temp_5m, temp_10m)"""
+    content_type = request.headers.get("content-type", "application/x-ndjson").split(";")[0].strip().lower()
+    fmt = FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type {content_type}; use application/x-ndjson or text/csv"
+        )
+    
+    try:
+        result = await ReadingService.ingest(request.stream(), fmt)
+        return {"success": True, "data": result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ingesting readings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats")
+async def get_reading_writer_stats():
+    """Writer queue depth and totals, gateway listener counters and time-series store size"""
+    return {
+        "success": True,
+        "data": {
+            **ReadingService.writer.stats(),
+            "listener": line_listener.stats(),
+            "history": HistoryService.store.stats()
+        }
+    }
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import logging
+import time
+
+from src.services.history_service import HistoryService, parse_time
+from src.services.reading_service import ReadingService
+from src.services.sensor_service import SensorService
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/sensors", tags=["Sensors"])
+
+@router.get("")
+async def get_sensors_in_bbox(
+    bbox: str = Query(..., description="Viewport as west,south,east,north (lon/lat degrees)")
+):
+    """Get sensors from every farm inside a bounding box"""
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'")
+    
+    try:
+        sensors = SensorService.get_sensors_in_bbox(west, south, east, north)
+        return {
+            "success": True,
+            "count": len(sensors),
+            "sensors": sensors
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in get_sensors_in_bbox: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/nearest")
+async def get_nearest_sensors(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    k: int = Query(1, ge=1, le=100, description="Number of sensors")
+):
+    """Get the k sensors closest to a point"""
+    try:
+        sensors = SensorService.get_nearest_sensors(lat, lon, k)
+        return {
+            "success": True,
+            "count": len(sensors),
+            "sensors": sensors
+        }
+    except Exception as e:
+        logger.error(f"Error in get_nearest_sensors: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{sensor_id}/history")
+async def get_sensor_history(
+    sensor_id: str,
+    height: int = Query(2, description="Height in metres (1, 2, 5, 10)"),
+    start: Optional[str] = Query(None, description="Epoch seconds or ISO 8601 (default: 24 h before end)"),
+    end: Optional[str] = Query(None, description="Epoch seconds or ISO 8601 (default: now)"),
+    resolution: str = Query("auto", description="auto, raw, 1m, 15m or 1h")
+):
+    """Get the reading history of a sensor at one height"""
+    if ReadingService.lookup(sensor_id) is None:
+        raise HTTPException(status_code=404, detail=f"Sensor not found: {sensor_id}")
+    
+    try:
+        end_ts = parse_time(end) if end else time.time()
+        start_ts = parse_time(start) if start else end_ts - 86400
+        history = HistoryService.get_sensor_history(sensor_id, height, start_ts, end_ts, resolution)
+        return {"success": True, "data": history}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in get_sensor_history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+import asyncio
+import logging
+
+from src.services.farm_service import FarmService
+from src.services.farm_stream import stream_hub
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/stream", tags=["Stream"])
+
+@router.get("/farms/{farm_id}")
+async def stream_farm_events(farm_id: str, request: Request):
+    """Server-Sent Events: a snapshot, then only alert and sensor deltas for the farm"""
+    if not FarmService.repository.get(farm_id):
+        raise HTTPException(status_code=404, detail=f"Farm not found: {farm_id}")
+    
+    async def event_source():
+        queue = stream_hub.subscribe(farm_id)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=config.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comentario SSE para mantener viva la conexión a través de proxies
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            stream_hub.unsubscribe(farm_id, queue)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/farms/{farm_id}/ws")
+async def websocket_farm_events(websocket: WebSocket, farm_id: str):
+    """WebSocket equivalent of the SSE stream"""
+    if not FarmService.repository.get(farm_id):
+        await websocket.close(code=4404, reason=f"Farm not found: {farm_id}")
+        return
+    
+    await websocket.accept()
+    queue = stream_hub.subscribe(farm_id)
+    
+    async def wait_disconnect():
+        # Detectar el cierre del cliente sin esperar al próximo envío
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    
+    disconnected = asyncio.create_task(wait_disconnect())
+    try:
+        while True:
+            next_message = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnected},
+                timeout=config.STREAM_KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnected in done:
+                next_message.cancel()
+                break
+            if next_message in done:
+                await websocket.send_text(next_message.result())
+            else:
+                next_message.cancel()
+                await websocket.send_text('{"event": "ping"}')
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in websocket stream for farm {farm_id}: {e}")
+    finally:
+        disconnected.cancel()
+        stream_hub.unsubscribe(farm_id, queue)
\ No newline at end of file
@@ -6,8 +6,10 @@ from src.models.weather_models import (
     WeatherRequest,
     WeatherResponse,
     ValidationRequest,
-    ValidationResponse
+    ValidationResponse,
+    BatchWeatherRequest
 )
+from src.services.prefetch_scheduler import prefetcher
 from src.services.weather_service import WeatherService
 
 logger = logging.getLogger(__name__)
@@ -46,6 +48,24 @@ async def get_forecast(
         logger.error(f"Error in get_forecast: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch")
+async def get_batch_weather(request: BatchWeatherRequest):
+    """Get current weather + forecast for many coordinates (results keep the input order)"""
+    try:
+        data = await WeatherService.get_forecast_many(
+            [(location.latitude, location.longitude) for location in request.locations],
+            request.forecast_days
+        )
+        return {
+            "success": True,
+            "count": len(data),
+            "failed": sum(item is None for item in data),
+            "data": data
+        }
+    except Exception as e:
+        logger.error(f"Error in get_batch_weather: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/validate")
 async def validate_sensor(request: ValidationRequest):
     """Validate sensor reading against API data"""
@@ -63,4 +83,21 @@ async def validate_sensor(request: ValidationRequest):
         }
     except Exception as e:
         logger.error(f"Error in validate_sensor: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Weather response cache counters (hits, misses, evictions, size)"""
+    return {
+        "success": True,
+        "data": WeatherService.cache_stats()
+    }
+
+
+@router.get("/prefetch/status")
+async def get_prefetch_status():
+    """Background prefetch jobs: schedule, last run timings and whether they fall behind"""
+    return {
+        "success": True,
+        "data": prefetcher.status()
+    }
\ No newline at end of file
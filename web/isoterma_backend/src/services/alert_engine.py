@@ -0,0 +1,163 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.sensor_array import SensorArray
+
+logger = logging.getLogger(__name__)
+
+# Las horas de Open-Meteo vienen en hora local de Argentina (UTC-3, sin horario de verano)
+ARGENTINA_OFFSET = timezone(timedelta(hours=-3))
+ARGENTINA_OFFSET_SECONDS = 3 * 3600
+
+DAY_LABELS = {0: "Hoy", 1: "Mañana", 2: "Pasado mañana"}
+
+# Arrays ya convertidos por payload horario (el mismo bloque cacheado sirve a varias fincas)
+_HOURLY_ARRAYS_SIZE = 256
+_hourly_arrays: "OrderedDict[int, Tuple[dict, np.ndarray, np.ndarray]]" = OrderedDict()
+
+
+def _to_float_array(values: List[Any]) -> np.ndarray:
+    """Floats with NaN for missing values (NaN never breaches a threshold)"""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _parse_local_times(times: List[str]) -> np.ndarray:
+    """ISO local times ('2026-02-20T18:00') → UTC epoch seconds as float (NaN if unparseable)"""
+    try:
+        local = np.array(times, dtype="datetime64[m]")
+    except ValueError:
+        local = np.empty(len(times), dtype="datetime64[m]")
+        for i, time_str in enumerate(times):
+            try:
+                local[i] = np.datetime64(time_str, "m")
+            except ValueError:
+                logger.error(f"Error parsing time {time_str}")
+                local[i] = np.datetime64("NaT")
+
+    epoch = local.astype("datetime64[s]").astype(np.int64).astype(np.float64)
+    epoch[np.isnat(local)] = np.nan
+    return epoch + ARGENTINA_OFFSET_SECONDS
+
+
+def hourly_arrays(hourly: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """(epoch seconds, temperature_2m) arrays for an hourly block, converted once per payload"""
+    key = id(hourly)
+    cached = _hourly_arrays.get(key)
+    # Guardamos la referencia al dict: el id no puede reutilizarse mientras siga en cache
+    if cached is not None and cached[0] is hourly:
+        _hourly_arrays.move_to_end(key)
+        return cached[1], cached[2]
+
+    times = hourly.get("time", [])
+    temperatures = hourly.get("temperature_2m", [])
+    epochs = _parse_local_times(times)
+    temps = _to_float_array(temperatures)
+
+    _hourly_arrays[key] = (hourly, epochs, temps)
+    if len(_hourly_arrays) > _HOURLY_ARRAYS_SIZE:
+        _hourly_arrays.popitem(last=False)
+    return epochs, temps
+
+
+def sensor_alerts(sensors: SensorArray, min_temp: float, max_temp: float) -> List[dict]:
+    """Threshold alerts for the current (2 m) sensor temperatures; dicts only for the sensors that breach"""
+    if sensors is None or not len(sensors):
+        return []
+
+    # NaN (sin lectura) nunca supera un umbral
+    temps = sensors.temperature
+    low = np.flatnonzero(temps < min_temp)
+    high = np.flatnonzero(temps > max_temp)
+    if not len(low) and not len(high):
+        return []
+
+    # Orden original: por sensor, la alerta baja antes que la alta
+    rows = sorted([(i, 0) for i in low.tolist()] + [(i, 1) for i in high.tolist()])
+    alerts = []
+    for i, is_high in rows:
+        temp = float(temps[i])
+        sensor_id = str(sensors.ids[i])
+        if is_high:
+            alerts.append({
+                "type": "temperature_high",
+                "sensor_id": sensor_id,
+                "temperature": temp,
+                "threshold": max_temp,
+                "message": f"Temperatura alta detectada: {temp}°C (máx: {max_temp}°C)",
+                "severity": "warning",
+                "alert_type": "current"
+            })
+        else:
+            alerts.append({
+                "type": "temperature_low",
+                "sensor_id": sensor_id,
+                "temperature": temp,
+                "threshold": min_temp,
+                "message": f"Temperatura baja detectada: {temp}°C (mín: {min_temp}°C)",
+                "severity": "warning",
+                "alert_type": "current"
+            })
+    return alerts
+
+
+def forecast_alerts(
+    hourly: dict,
+    min_temp: float,
+    max_temp: float,
+    forecast_hours: int = 24,
+    now: Optional[datetime] = None
+) -> List[dict]:
+    """Threshold alerts for the future hours among the first `forecast_hours` of the forecast"""
+    times = hourly.get("time", [])
+    temperatures = hourly.get("temperature_2m", [])
+    epochs, temps = hourly_arrays(hourly)
+
+    now = now or datetime.now(ARGENTINA_OFFSET)
+    window = min(forecast_hours, len(temps), len(epochs))
+    epochs = epochs[:window]
+    temps = temps[:window]
+
+    future = epochs > now.timestamp()
+    low = future & (temps < min_temp)
+    high = future & ~low & (temps > max_temp)
+    breaching = np.flatnonzero(low | high)
+    if not len(breaching):
+        return []
+
+    # Etiquetas de día solo para las filas que generan alerta
+    today = np.datetime64(now.date(), "D")
+    alerts = []
+    for i in breaching.tolist():
+        time_str = times[i]
+        temp = temperatures[i]
+        days_diff = int((np.datetime64(time_str[:10], "D") - today).astype(int))
+        day_label = DAY_LABELS.get(days_diff, f"{time_str[8:10]}/{time_str[5:7]}")
+        full_time_label = f"{day_label} {time_str[11:16]}"
+
+        if low[i]:
+            alerts.append({
+                "type": "forecast_temperature_low",
+                "sensor_id": "forecast",
+                "temperature": temp,
+                "threshold": min_temp,
+                "time": time_str,
+                "message": f"Pronóstico: {temp}°C para {full_time_label} (mín: {min_temp}°C)",
+                "severity": "info",
+                "alert_type": "forecast"
+            })
+        else:
+            alerts.append({
+                "type": "forecast_temperature_high",
+                "sensor_id": "forecast",
+                "temperature": temp,
+                "threshold": max_temp,
+                "time": time_str,
+                "message": f"Pronóstico: {temp}°C para {full_time_label} (máx: {max_temp}°C)",
+                "severity": "info",
+                "alert_type": "forecast"
+            })
+    return alerts
@@ -1,46 +1,107 @@
+import asyncio
+import base64
+import binascii
 import json
 import logging
-from typing import List, Optional
+import time
+from typing import List, Optional, Sequence, Set
 from pathlib import Path
 
-from src.models.farm_models import Farm
+from src.models.farm_models import DETAIL_FIELDS, FARM_FIELDS
+from src.models.sensor_array import SensorArray
+from src.repositories.factory import create_farm_repository, live_state_path
+from src.services import alert_engine
+from src.services.live_state import LiveSensorState
+from src.services.weather_service import WeatherService
+from src.utils import config
 
 logger = logging.getLogger(__name__)
 
+
+def encode_cursor(farm_id: str) -> str:
+    """Opaque pagination cursor: the id of the last farm returned"""
+    return base64.urlsafe_b64encode(json.dumps({"after": farm_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(payload["after"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor") from None
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """Comma-separated field list → ordered fields (id always included); None = every allowed field"""
+    if not fields:
+        return list(allowed)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
 class FarmService:
     """Service for farm data management"""
     
     DATA_FILE = Path(__file__).parent.parent.parent / "data" / "fincas.json"
+    repository = create_farm_repository(DATA_FILE)
+    # Lecturas en vivo: fuera del documento de la finca, se combinan al leer
+    live = LiveSensorState(live_state_path())
     
     @staticmethod
-    def get_all_farms() -> List[Farm]:
-        """Get all farms from JSON file"""
-        try:
-            with open(FarmService.DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            farms = [Farm(**farm_data) for farm_data in data]
-            logger.info(f"Loaded {len(farms)} farms")
-            return farms
-            
-        except FileNotFoundError:
-            logger.error(f"Farms data file not found: {FarmService.DATA_FILE}")
-            return []
-        except Exception as e:
-            logger.error(f"Error loading farms: {e}")
-            return []
+    def list_farms(
+        fields: Optional[str] = None,
+        include_sensors: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = config.FARMS_PAGE_DEFAULT_LIMIT
+    ) -> dict:
+        """One page of farms projected to the requested fields; sensors only when asked for"""
+        projection = parse_fields(fields, FARM_FIELDS)
+        after = decode_cursor(cursor) if cursor else None
+        repository = FarmService.repository
+        farms, last_id = repository.list_page(projection, after, limit)
+        if include_sensors:
+            # Sensores desde las columnas con las temperaturas vivas, sin modelos pydantic
+            for farm in farms:
+                farm["sensors"] = FarmService.live.overlay(repository.sensors(farm["id"])).to_dicts()
+        logger.info(f"Listed {len(farms)} farms (fields={','.join(projection)}, sensors={include_sensors})")
+        return {
+            "farms": farms,
+            "next_cursor": encode_cursor(last_id) if last_id else None
+        }
+    
+    @staticmethod
+    def get_farm(farm_id: str, fields: Optional[str] = None, include_sensors: bool = False) -> Optional[dict]:
+        """Farm projected to the requested fields; with sensors, joined with the live readings"""
+        projection = parse_fields(fields, DETAIL_FIELDS)
+        if not include_sensors:
+            return FarmService.repository.get_fields(farm_id, projection)
+        
+        farm = FarmService.get_farm_by_id(farm_id)
+        if farm is None:
+            return None
+        return {**{field: farm[field] for field in projection if field in farm}, "sensors": farm["sensors"]}
+    
+    @staticmethod
+    def with_live_sensors(farm: dict) -> dict:
+        """Farm document plus its sensors (from the columns) joined with the live readings"""
+        return FarmService.live.join(farm, FarmService.repository.sensors(farm["id"]))
+    
+    @staticmethod
+    def live_sensors(farm_id: str) -> Optional[SensorArray]:
+        """Sensor columns of a farm with the live temperatures overlaid (no per-sensor dicts)"""
+        sensors = FarmService.repository.sensors(farm_id)
+        return None if sensors is None else FarmService.live.overlay(sensors)
     
     @staticmethod
     def get_farm_by_id(farm_id: str) -> Optional[dict]:
         """Get specific farm by ID"""
         try:
-            with open(FarmService.DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            for farm in data:
-                if farm["id"] == farm_id:
-                    logger.info(f"Found farm: {farm['name']}")
-                    return farm
+            farm = FarmService.repository.get(farm_id)
+            if farm:
+                logger.info(f"Found farm: {farm['name']}")
+                return FarmService.with_live_sensors(farm)
             
             logger.warning(f"Farm not found: {farm_id}")
             return None
@@ -51,83 +112,25 @@ class FarmService:
     
     @staticmethod
     def update_farm_settings(farm_id: str, settings: dict) -> dict:
-        """Update farm settings"""
+        """Update farm settings (applied in memory, flushed atomically in batches)"""
         try:
-            with open(FarmService.DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            for farm in data:
-                if farm["id"] == farm_id:
-                    if "settings" not in farm:
-                        farm["settings"] = {}
-                    farm["settings"].update(settings)
-                    
-                    with open(FarmService.DATA_FILE, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
-                    
-                    logger.info(f"Updated settings for farm {farm_id}")
-                    return farm["settings"]
-            
-            raise ValueError(f"Farm not found: {farm_id}")
+            result = FarmService.repository.update_settings(farm_id, settings)
+            logger.info(f"Updated settings for farm {farm_id}")
+            return result
             
         except Exception as e:
             logger.error(f"Error updating farm settings: {e}")
             raise
     
     @staticmethod
-    def check_temperature_alerts(farm_id: str) -> List[dict]:
+    async def check_temperature_alerts(farm_id: str) -> List[dict]:
         """Check for temperature alerts based on thresholds"""
         try:
-            with open(FarmService.DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            farm = next((f for f in data if f["id"] == farm_id), None)
+            farm = FarmService.repository.get(farm_id)
             if not farm:
                 raise ValueError(f"Farm not found: {farm_id}")
             
-            settings = farm.get("settings", {})
-            if not settings.get("alerts_enabled", False):
-                return []
-            
-            min_temp = settings.get("temperature_threshold_min", 0)
-            max_temp = settings.get("temperature_threshold_max", 50)
-            
-            alerts = []
-            
-            # Alertas de sensores actuales
-            for sensor in farm.get("sensors", []):
-                temp = sensor.get("temperature", 0)
-                sensor_id = sensor.get("id", "unknown")
-                
-                if temp < min_temp:
-                    alerts.append({
-                        "type": "temperature_low",
-                        "sensor_id": sensor_id,
-                        "temperature": temp,
-                        "threshold": min_temp,
-                        "message": f"Temperatura baja detectada: {temp}°C (mín: {min_temp}°C)",
-                        "severity": "warning",
-                        "alert_type": "current"
-                    })
-                if temp > max_temp:
-                    alerts.append({
-                        "type": "temperature_high",
-                        "sensor_id": sensor_id,
-                        "temperature": temp,
-                        "threshold": max_temp,
-                        "message": f"Temperatura alta detectada: {temp}°C (máx: {max_temp}°C)",
-                        "severity": "warning",
-                        "alert_type": "current"
-                    })
-            
-            # Alertas de clima actual (API meteorológica)
-            weather_alerts = FarmService._check_current_weather_alerts(farm, min_temp, max_temp)
-            alerts.extend(weather_alerts)
-            
-            # Alertas de pronóstico
-            forecast_alerts = FarmService._check_forecast_alerts(farm, min_temp, max_temp, settings)
-            alerts.extend(forecast_alerts)
-            
+            alerts = await FarmService.farm_alerts(farm, FarmService.live_sensors(farm_id))
             logger.info(f"Found {len(alerts)} alerts for farm {farm_id}")
             return alerts
             
@@ -136,130 +139,132 @@ class FarmService:
             raise
     
     @staticmethod
-    def _check_forecast_alerts(farm: dict, min_temp: float, max_temp: float, settings: dict) -> List[dict]:
-        """Check forecast for temperature alerts"""
+    async def farm_alerts(farm: dict, sensors: Optional[SensorArray]) -> List[dict]:
+        """Alerts of one farm from its sensor columns (live readings already overlaid); [] when alerts are disabled"""
+        if not farm.get("settings", {}).get("alerts_enabled", False):
+            return []
+        
+        # Un solo request (current + hourly); la evaluación de sensores es síncrona y no se solapa
+        weather_data = await FarmService._fetch_alert_weather(farm)
+        return FarmService._evaluate_farm_alerts(farm, sensors, weather_data)
+    
+    @staticmethod
+    async def sweep_alerts(
+        severities: Optional[Set[str]] = None,
+        alert_types: Optional[Set[str]] = None
+    ) -> dict:
+        """Evaluate alerts for every farm with alerts_enabled, sharing one batched weather fetch"""
+        started = time.perf_counter()
+        farms = [
+            farm for farm in FarmService.repository.list_raw()
+            if farm.get("settings", {}).get("alerts_enabled", False)
+        ]
+        
+        # Un solo fetch en lote (chunks de coordenadas separadas por coma) para todas las fincas
+        fetch_start = time.perf_counter()
+        try:
+            weather = await WeatherService.get_forecast_many(
+                [(farm["location"]["latitude"], farm["location"]["longitude"]) for farm in farms],
+                forecast_days=3
+            ) if farms else []
+        except Exception as e:
+            logger.error(f"Error fetching weather for alert sweep: {e}")
+            weather = [None] * len(farms)
+        weather_fetch_ms = round((time.perf_counter() - fetch_start) * 1000, 1)
+        
+        # Evaluación en el loop: es NumPy corto que retiene el GIL, los threads no aportan
+        # y el cache de arrays horarios de alert_engine no es thread-safe
+        results = []
+        weather_errors = 0
+        for farm, weather_data in zip(farms, weather):
+            # Sin clima (fetch fallido) la finca solo se evalúa con sus sensores
+            weather_error = weather_data is None
+            weather_errors += weather_error
+            eval_start = time.perf_counter()
+            alerts = FarmService._evaluate_farm_alerts(farm, FarmService.live_sensors(farm["id"]), weather_data)
+            evaluation_ms = round((time.perf_counter() - eval_start) * 1000, 2)
+            
+            if severities:
+                alerts = [alert for alert in alerts if alert["severity"] in severities]
+            if alert_types:
+                alerts = [alert for alert in alerts if alert["alert_type"] in alert_types]
+            results.append({
+                "farm_id": farm["id"],
+                "farm_name": farm["name"],
+                "count": len(alerts),
+                "evaluation_ms": evaluation_ms,
+                "weather_error": weather_error,
+                "alerts": alerts
+            })
+            # Ceder el loop entre fincas para no demorar otros requests
+            await asyncio.sleep(0)
+        
+        total = sum(result["count"] for result in results)
+        logger.info(f"Alert sweep: {total} alerts across {len(results)} farms ({weather_errors} without weather)")
+        return {
+            "farms_evaluated": len(results),
+            "total_alerts": total,
+            "weather_errors": weather_errors,
+            "weather_fetch_ms": weather_fetch_ms,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "farms": results
+        }
+    
+    @staticmethod
+    def _evaluate_farm_alerts(farm: dict, sensors: Optional[SensorArray], weather_data: Optional[dict]) -> List[dict]:
+        """Sensor, current-weather and forecast alerts for one farm from its live sensor columns and an already fetched payload"""
+        settings = farm.get("settings", {})
+        min_temp = settings.get("temperature_threshold_min", 0)
+        max_temp = settings.get("temperature_threshold_max", 50)
+        
+        alerts = alert_engine.sensor_alerts(sensors, min_temp, max_temp)
+        alerts.extend(FarmService._weather_alerts(weather_data, min_temp, max_temp, settings))
+        return alerts
+    
+    @staticmethod
+    def _weather_alerts(weather_data: Optional[dict], min_temp: float, max_temp: float, settings: dict) -> List[dict]:
+        if not weather_data:
+            return []
+        
+        # Alertas de clima actual (API meteorológica)
+        alerts = FarmService._check_current_weather_alerts(weather_data, min_temp, max_temp)
+        
+        # Alertas de pronóstico
+        alerts.extend(FarmService._check_forecast_alerts(weather_data, min_temp, max_temp, settings))
+        return alerts
+    
+    @staticmethod
+    async def _fetch_alert_weather(farm: dict) -> Optional[dict]:
+        """Current weather + hourly forecast for the farm location in one (cached) call"""
         try:
-            import requests
-            
-            # Obtener pronóstico directamente con requests
             lat = farm["location"]["latitude"]
             lon = farm["location"]["longitude"]
-            
-            url = "https://api.open-meteo.com/v1/forecast"
-            params = {
-                'latitude': lat,
-                'longitude': lon,
-                'hourly': 'temperature_2m',
-                'forecast_days': 3,
-                'timezone': 'America/Argentina/Buenos_Aires'
-            }
-            
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            forecast_data = response.json()
-            
-            alerts = []
-            hourly = forecast_data.get("hourly", {})
-            times = hourly.get("time", [])
-            temperatures = hourly.get("temperature_2m", [])
-            
+            return await WeatherService.get_forecast(lat, lon, forecast_days=3)
+        except Exception as e:
+            logger.error(f"Error fetching weather for alerts: {e}")
+            return None
+    
+    @staticmethod
+    def _check_forecast_alerts(weather_data: dict, min_temp: float, max_temp: float, settings: dict) -> List[dict]:
+        """Check forecast for temperature alerts"""
+        try:
             # Revisar próximas horas según configuración (por defecto 24h)
             forecast_hours = settings.get("forecast_alert_hours", 24)
-            
-            from datetime import datetime, timezone, timedelta
-            
-            # Obtener hora actual en Argentina (UTC-3)
-            argentina_offset = timezone(timedelta(hours=-3))
-            now = datetime.now(argentina_offset)
-            
-            for i in range(min(forecast_hours, len(temperatures))):
-                temp = temperatures[i]
-                time_str = times[i] if i < len(times) else "unknown"
-                
-                # Verificar que la hora sea futura
-                try:
-                    # Parsear como hora local de Argentina
-                    dt_naive = datetime.fromisoformat(time_str)
-                    dt = dt_naive.replace(tzinfo=argentina_offset)
-                    
-                    # Solo procesar si es una hora futura
-                    if dt <= now:
-                        continue
-                        
-                except Exception as e:
-                    logger.error(f"Error parsing time {time_str}: {e}")
-                    continue
-                
-                # Formatear fecha y hora más descriptiva
-                try:
-                    # Determinar si es hoy, mañana o pasado mañana
-                    days_diff = (dt.date() - now.date()).days
-                    if days_diff == 0:
-                        day_label = "Hoy"
-                    elif days_diff == 1:
-                        day_label = "Mañana"
-                    elif days_diff == 2:
-                        day_label = "Pasado mañana"
-                    else:
-                        day_label = dt.strftime("%d/%m")
-                    
-                    time_label = dt.strftime("%H:%M")
-                    full_time_label = f"{day_label} {time_label}"
-                except Exception as e:
-                    logger.error(f"Error formatting time: {e}")
-                    full_time_label = time_str[-5:] if len(time_str) >= 5 else time_str
-                
-                if temp < min_temp:
-                    alerts.append({
-                        "type": "forecast_temperature_low",
-                        "sensor_id": "forecast",
-                        "temperature": temp,
-                        "threshold": min_temp,
-                        "time": time_str,
-                        "message": f"Pronóstico: {temp}°C para {full_time_label} (mín: {min_temp}°C)",
-                        "severity": "info",
-                        "alert_type": "forecast"
-                    })
-                elif temp > max_temp:
-                    alerts.append({
-                        "type": "forecast_temperature_high",
-                        "sensor_id": "forecast",
-                        "temperature": temp,
-                        "threshold": max_temp,
-                        "time": time_str,
-                        "message": f"Pronóstico: {temp}°C para {full_time_label} (máx: {max_temp}°C)",
-                        "severity": "info",
-                        "alert_type": "forecast"
-                    })
-            
-            return alerts
+            return alert_engine.forecast_alerts(
+                weather_data.get("hourly", {}),
+                min_temp,
+                max_temp,
+                forecast_hours
+            )
             
         except Exception as e:
             logger.error(f"Error checking forecast alerts: {e}")
             return []
     
     @staticmethod
-    def _check_current_weather_alerts(farm: dict, min_temp: float, max_temp: float) -> List[dict]:
+    def _check_current_weather_alerts(weather_data: dict, min_temp: float, max_temp: float) -> List[dict]:
         """Check current weather API for temperature alerts"""
         try:
-            import requests
-            
-            # Obtener clima actual directamente con requests
-            lat = farm["location"]["latitude"]
-            lon = farm["location"]["longitude"]
-            
-            url = "https://api.open-meteo.com/v1/forecast"
-            params = {
-                'latitude': lat,
-                'longitude': lon,
-                'current': 'temperature_2m',
-                'timezone': 'America/Argentina/Buenos_Aires'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            weather_data = response.json()
-            
             alerts = []
             current = weather_data.get("current", {})
             temp = current.get("temperature_2m", 0)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from src.services.farm_service import FarmService
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+AlertKey = Tuple[str, str, Optional[str]]
+
+
+def _alert_key(alert: dict) -> AlertKey:
+    return alert["type"], alert["sensor_id"], alert.get("time")
+
+
+def _event(name: str, farm_id: str, payload: dict) -> str:
+    """Serialize an event once; the same string is fanned out to every subscriber"""
+    return json.dumps({"event": name, "farm_id": farm_id, **payload}, ensure_ascii=False)
+
+
+class FarmChannel:
+    """Evaluates one farm once per change and fans deltas out to its subscribers"""
+
+    def __init__(self, farm_id: str):
+        self.farm_id = farm_id
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.changed = asyncio.Event()
+        self.alerts: Dict[AlertKey, dict] = {}
+        self.sensors: Dict[str, dict] = {}
+        self.ready = False
+        self.evaluations = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> str:
+        return _event("snapshot", self.farm_id, {
+            "alerts": list(self.alerts.values()),
+            "sensors": list(self.sensors.values())
+        })
+
+    def publish(self, message: str) -> None:
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente lento: descartar lo pendiente y resincronizar con el estado completo
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot())
+
+    async def run(self) -> None:
+        while True:
+            # Limpiar antes de evaluar: un cambio durante la evaluación dispara otra
+            self.changed.clear()
+            try:
+                await self.evaluate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stream evaluation failed for farm {self.farm_id}: {e}")
+
+            # Reevaluar ante un cambio o periódicamente (el pronóstico avanza con el reloj)
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=config.STREAM_REEVALUATE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def evaluate(self) -> None:
+        farm = FarmService.repository.get(self.farm_id)
+        if farm is None:
+            return
+        # Una sola superposición del estado vivo por evaluación: la misma para alertas y sensores
+        live = FarmService.live_sensors(self.farm_id)
+
+        alerts = {_alert_key(alert): alert for alert in await FarmService.farm_alerts(farm, live)}
+        sensors = {}
+        if live is not None:
+            temperature = live.temperature
+            temperatures = np.where(np.isnan(temperature), None, temperature).tolist()
+            for sensor_id, temp, status in zip(live.ids.tolist(), temperatures, live.status.tolist()):
+                sensors[sensor_id] = {"id": sensor_id, "temperature": temp, "status": status}
+        self.evaluations += 1
+
+        if not self.ready:
+            self.alerts, self.sensors, self.ready = alerts, sensors, True
+            self.publish(self.snapshot())
+            return
+
+        new_alerts = [alert for key, alert in alerts.items() if key not in self.alerts]
+        cleared_alerts = [alert for key, alert in self.alerts.items() if key not in alerts]
+        changed_sensors = [sensor for sensor_id, sensor in sensors.items() if self.sensors.get(sensor_id) != sensor]
+        self.alerts, self.sensors = alerts, sensors
+
+        if new_alerts or cleared_alerts or changed_sensors:
+            self.publish(_event("delta", self.farm_id, {
+                "alerts_new": new_alerts,
+                "alerts_cleared": cleared_alerts,
+                "sensors_changed": changed_sensors
+            }))
+
+
+class FarmStreamHub:
+    """Registry of per-farm channels; evaluation only runs while a farm has subscribers"""
+
+    def __init__(self):
+        self.channels: Dict[str, FarmChannel] = {}
+
+    def subscribe(self, farm_id: str) -> asyncio.Queue:
+        channel = self.channels.get(farm_id)
+        if channel is None:
+            channel = FarmChannel(farm_id)
+            self.channels[farm_id] = channel
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=config.STREAM_QUEUE_SIZE)
+        channel.subscribers.add(queue)
+        if channel.ready:
+            queue.put_nowait(channel.snapshot())
+        if channel.task is None:
+            channel.task = asyncio.create_task(channel.run())
+        logger.info(f"Stream subscriber added for farm {farm_id} ({len(channel.subscribers)} total)")
+        return queue
+
+    def unsubscribe(self, farm_id: str, queue: asyncio.Queue) -> None:
+        channel = self.channels.get(farm_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(queue)
+        if not channel.subscribers:
+            if channel.task is not None:
+                channel.task.cancel()
+            del self.channels[farm_id]
+        logger.info(f"Stream subscriber removed for farm {farm_id}")
+
+    def notify(self, farm_id: str) -> None:
+        """Signal that a farm changed (settings, readings); its channel re-evaluates once"""
+        channel = self.channels.get(farm_id)
+        if channel is not None:
+            channel.changed.set()
+
+    async def stop(self) -> None:
+        tasks = [channel.task for channel in self.channels.values() if channel.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.channels.clear()
+
+    def stats(self) -> dict:
+        return {
+            farm_id: {"subscribers": len(channel.subscribers), "evaluations": channel.evaluations}
+            for farm_id, channel in self.channels.items()
+        }
+
+
+stream_hub = FarmStreamHub()
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.repositories.factory import timeseries_path
+from src.repositories.timeseries_store import DAY_SECONDS, RESOLUTIONS, ROLLUP_SECONDS, TimeSeriesStore, retention_days
+from src.services.reading_parser import HEIGHTS_M
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+def parse_time(value: str) -> float:
+    """Epoch seconds or ISO 8601 (UTC unless an offset is given) → epoch seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class HistoryService:
+    """Sensor reading history backed by the embedded time-series store"""
+    
+    store = TimeSeriesStore(timeseries_path())
+    _maintenance_task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def pick_resolution(start: float, end: float, now: Optional[float] = None) -> str:
+        """Finest rollup that fits TIMESERIES_MAX_POINTS and still covers `start` under its retention"""
+        now = now or time.time()
+        retention = retention_days()
+        for resolution, width in ROLLUP_SECONDS.items():
+            if (end - start) / width <= config.TIMESERIES_MAX_POINTS and start >= now - retention[resolution] * DAY_SECONDS:
+                return resolution
+        return "1h"
+    
+    @staticmethod
+    def get_sensor_history(sensor_id: str, height: int, start: float, end: float, resolution: str = "auto") -> dict:
+        """History of one sensor at one height; season-long ranges are served from rollups"""
+        if height not in HEIGHTS_M:
+            raise ValueError(f"height must be one of {', '.join(str(h) for h in HEIGHTS_M)}")
+        if end <= start:
+            raise ValueError("end must be after start")
+        if resolution == "auto":
+            resolution = HistoryService.pick_resolution(start, end)
+        elif resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be auto or one of {', '.join(RESOLUTIONS)}")
+        
+        data = HistoryService.store.query(sensor_id, height, start, end, resolution)
+        logger.info(f"History for sensor {sensor_id} at {height}m: {len(data['ts'])} points ({resolution})")
+        return {
+            "sensor_id": sensor_id,
+            "height_m": height,
+            "start": start,
+            "end": end,
+            "resolution": resolution,
+            "points": len(data["ts"]),
+            **data
+        }
+    
+    @staticmethod
+    def start_maintenance() -> None:
+        if HistoryService._maintenance_task is None:
+            HistoryService._maintenance_task = asyncio.create_task(HistoryService._maintenance_loop())
+    
+    @staticmethod
+    async def stop_maintenance() -> None:
+        task = HistoryService._maintenance_task
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            HistoryService._maintenance_task = None
+    
+    @staticmethod
+    async def _maintenance_loop() -> None:
+        while True:
+            try:
+                await asyncio.to_thread(HistoryService.store.maintain)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Time-series maintenance failed: {e}")
+            await asyncio.sleep(config.TIMESERIES_MAINTENANCE_INTERVAL_SECONDS)
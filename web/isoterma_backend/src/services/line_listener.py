@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from src.services.reading_parser import ReadingParser
+from src.services.reading_service import ReadingService
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "LineProtocolListener"):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.listener.feed(data.split(b"\n"), can_drop=True)
+
+
+class LineProtocolListener:
+    """TCP/UDP listener for gateway frames (`sensor_id height temp ts` per line).
+
+    Frames from every connection are coalesced into batches of up to
+    LINE_LISTENER_BATCH_SIZE lines (or whatever arrived within
+    LINE_LISTENER_FLUSH_MS) and go through the same parser and writer as
+    POST /readings. When the writer falls behind and LINE_LISTENER_MAX_PENDING
+    lines are waiting, TCP connections stop being read (backpressure) and
+    UDP datagrams are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = config.LINE_LISTENER_BATCH_SIZE,
+        flush_ms: float = config.LINE_LISTENER_FLUSH_MS,
+        max_pending: int = config.LINE_LISTENER_MAX_PENDING
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.max_pending = max_pending
+        self.parser = ReadingParser("line", ReadingService.lookup)
+        self.pending: List[bytes] = []
+        self.counters = {
+            "lines_received": 0,
+            "accepted": 0,
+            "rejected": 0,
+            "dropped": 0,
+            "batches": 0,
+            "tcp_connections": 0,
+        }
+        self._room: Optional[asyncio.Event] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._tcp_server: Optional[asyncio.AbstractServer] = None
+        self._udp_transport: Optional[asyncio.DatagramTransport] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def start(
+        self,
+        host: str = config.LINE_LISTENER_HOST,
+        tcp_port: Optional[int] = config.LINE_LISTENER_TCP_PORT,
+        udp_port: Optional[int] = config.LINE_LISTENER_UDP_PORT
+    ) -> None:
+        if self._flush_task is not None:
+            return
+        self._room = asyncio.Event()
+        self._room.set()
+        self._ready = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+        loop = asyncio.get_running_loop()
+        if tcp_port is not None:
+            self._tcp_server = await asyncio.start_server(self._handle_tcp, host, tcp_port)
+        if udp_port is not None:
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UdpProtocol(self), local_addr=(host, udp_port)
+            )
+        logger.info(f"Line protocol listener on {host} (tcp={self.tcp_port}, udp={self.udp_port})")
+
+    async def stop(self) -> None:
+        """Close sockets, then hand whatever is pending to the writer"""
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+            await self.flush()
+        logger.info("Line protocol listener stopped")
+
+    @property
+    def tcp_port(self) -> Optional[int]:
+        return self._tcp_server.sockets[0].getsockname()[1] if self._tcp_server else None
+
+    @property
+    def udp_port(self) -> Optional[int]:
+        return self._udp_transport.get_extra_info("sockname")[1] if self._udp_transport else None
+
+    def feed(self, lines: List[bytes], can_drop: bool = False) -> None:
+        """Queue raw lines; UDP (can_drop) lines beyond max_pending are dropped"""
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return
+        self.counters["lines_received"] += len(lines)
+        if can_drop:
+            room = max(self.max_pending - len(self.pending), 0)
+            if room < len(lines):
+                self.counters["dropped"] += len(lines) - room
+                lines = lines[:room]
+        self.pending.extend(lines)
+        if len(self.pending) >= self.batch_size:
+            self._ready.set()
+        if len(self.pending) >= self.max_pending:
+            self._room.clear()
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.counters["tcp_connections"] += 1
+        carry = b""
+        # Tras descartar una línea demasiado larga, ignorar hasta el siguiente salto de línea
+        discarding = False
+        try:
+            while True:
+                # Cola llena: dejar de leer el socket hasta que el writer se ponga al día
+                await self._room.wait()
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                if discarding:
+                    end = chunk.find(b"\n")
+                    if end < 0:
+                        continue
+                    chunk = chunk[end + 1:]
+                    discarding = False
+                lines = (carry + chunk).split(b"\n")
+                carry = lines.pop()
+                if len(carry) > config.READINGS_MAX_LINE_BYTES:
+                    self.counters["rejected"] += 1
+                    carry = b""
+                    discarding = True
+                self.feed(lines)
+            if carry:
+                self.feed([carry])
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Gateway connection closed with error: {e}")
+        finally:
+            writer.close()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Line protocol flush failed: {e}")
+
+    async def flush(self) -> None:
+        """Parse pending lines in batches and submit them (waits while the writer queue is full)"""
+        while self.pending:
+            lines = self.pending[:self.batch_size]
+            del self.pending[:self.batch_size]
+            batch, errors = self.parser.parse(lines, 1, time.time())
+            if errors:
+                self.counters["rejected"] += len(errors)
+                logger.warning(f"Line protocol: {len(errors)} invalid frames (first: {errors[0][1]})")
+            if batch is not None:
+                self.counters["accepted"] += len(batch)
+                await ReadingService.writer.submit(batch)
+            self.counters["batches"] += 1
+            if len(self.pending) < self.max_pending and self._room is not None:
+                self._room.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._flush_task is not None,
+            "tcp_port": self.tcp_port,
+            "udp_port": self.udp_port,
+            "pending": len(self.pending),
+            **self.counters
+        }
+
+
+line_listener = LineProtocolListener()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.models.farm_models import TEMP_FIELDS
+from src.models.sensor_array import CURRENT_TEMP_COLUMN, SensorArray
+from src.services.reading_parser import ReadingBatch
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+class LiveSensorState:
+    """Hot current state of every sensor, kept apart from the static farm documents.
+
+    Struct of arrays indexed by a per-sensor row: last temperature and its
+    timestamp for each height (NaN = no reading yet). A reading only touches
+    these arrays, never the farm file; farm documents are joined against
+    them on read. Snapshotted to an .npz file so a restart keeps the state.
+    """
+
+    def __init__(self, snapshot_path: Optional[Path] = None, capacity: int = 1024):
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._lock = threading.Lock()
+        self.rows: Dict[str, int] = {}
+        self.sensor_ids: List[str] = []
+        self.temps = np.full((capacity, len(TEMP_FIELDS)), np.nan, dtype=np.float32)
+        self.ts = np.full((capacity, len(TEMP_FIELDS)), np.nan, dtype=np.float64)
+        self.version = 0
+        self._saved_version = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        if self.snapshot_path and self.snapshot_path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.sensor_ids)
+
+    def _row_numbers(self, sensor_ids: List[str]) -> np.ndarray:
+        """Rows for the given ids, registering new sensors (caller holds the lock)"""
+        for sensor_id in sensor_ids:
+            if sensor_id not in self.rows:
+                self.rows[sensor_id] = len(self.sensor_ids)
+                self.sensor_ids.append(sensor_id)
+        if len(self.sensor_ids) > len(self.temps):
+            # Crecer al doble: amortiza el costo de copiar
+            capacity = max(len(self.sensor_ids), 2 * len(self.temps))
+            grow = capacity - len(self.temps)
+            self.temps = np.vstack([self.temps, np.full((grow, self.temps.shape[1]), np.nan, dtype=np.float32)])
+            self.ts = np.vstack([self.ts, np.full((grow, self.ts.shape[1]), np.nan, dtype=np.float64)])
+        return np.array([self.rows[sensor_id] for sensor_id in sensor_ids], dtype=np.int64)
+
+    def update(self, batch: ReadingBatch) -> None:
+        """Keep, per sensor and height, the newest reading of the batch if newer than the stored one"""
+        unique, inverse = np.unique(batch.sensor_ids.astype(str), return_inverse=True)
+        with self._lock:
+            rows = self._row_numbers(unique.tolist())[inverse]
+            for column in range(batch.temps.shape[1]):
+                values = batch.temps[:, column]
+                present = ~np.isnan(values)
+                row, ts, value = rows[present], batch.ts[present], values[present]
+                if not len(row):
+                    continue
+                # Última lectura de cada fila: ordenar por (fila, ts) y tomar el final de cada grupo
+                order = np.lexsort((ts, row))
+                row, ts, value = row[order], ts[order], value[order]
+                last = np.flatnonzero(np.append(row[1:] != row[:-1], True))
+                row, ts, value = row[last], ts[last], value[last]
+                # Lecturas atrasadas no pisan una más nueva (NaN guardado = sin lectura)
+                newer = ~(ts <= self.ts[row, column])
+                self.ts[row[newer], column] = ts[newer]
+                self.temps[row[newer], column] = value[newer]
+            self.version += 1
+
+    def join(self, farm: dict, sensors: SensorArray) -> dict:
+        """Farm document plus its sensors, with each sensor's live temperature (2 m) and last reading per height"""
+        documents = sensors.to_dicts()
+        with self._lock:
+            rows = np.array([self.rows.get(sensor_id, -1) for sensor_id in sensors.ids.tolist()], dtype=np.int64)
+            if not (rows >= 0).any():
+                return {**farm, "sensors": documents}
+            temps = self.temps[rows].astype(np.float64)
+            ts = self.ts[rows]
+
+        # Todo el trabajo numérico en bloque; el loop solo arma los dicts
+        ts[rows < 0] = np.nan
+        has_reading = (~np.isnan(ts).all(axis=1)).tolist()
+        latest = np.where(np.isnan(ts), -np.inf, ts).max(axis=1).tolist()
+        temps = np.round(temps, 2)
+        values = np.where(np.isnan(temps), None, temps).tolist()
+
+        # Los dicts son nuevos (to_dicts): se completan en el lugar
+        for sensor, live, last_ts, heights in zip(documents, has_reading, latest, values):
+            if not live:
+                continue
+            if heights[CURRENT_TEMP_COLUMN] is not None:
+                sensor["temperature"] = heights[CURRENT_TEMP_COLUMN]
+            sensor["last_reading"] = {"ts": last_ts, **dict(zip(TEMP_FIELDS, heights))}
+        return {**farm, "sensors": documents}
+
+    def overlay(self, sensors: SensorArray) -> SensorArray:
+        """Sensor columns with the live temperature of every height that has a reading"""
+        with self._lock:
+            rows = np.array([self.rows.get(sensor_id, -1) for sensor_id in sensors.ids.tolist()], dtype=np.int64)
+            if not (rows >= 0).any():
+                return sensors
+            live = self.temps[rows].astype(np.float64)
+        live[rows < 0] = np.nan
+        # Mismo redondeo que join(): las lecturas vivas se guardan en float32
+        return sensors.with_temps(np.where(np.isnan(live), sensors.temps, np.round(live, 2)))
+
+    def save(self) -> bool:
+        """Write an .npz snapshot atomically; skipped when nothing changed since the last one"""
+        if self.snapshot_path is None or self.version == self._saved_version:
+            return False
+        with self._lock:
+            version = self.version
+            count = len(self.sensor_ids)
+            sensor_ids = np.array(self.sensor_ids, dtype=str)
+            temps = self.temps[:count].copy()
+            ts = self.ts[:count].copy()
+
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_path.parent, prefix=f".{self.snapshot_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, sensor_ids=sensor_ids, temps=temps, ts=ts)
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._saved_version = version
+        logger.info(f"Live sensor state snapshot: {count} sensors")
+        return True
+
+    def load(self) -> None:
+        try:
+            with np.load(self.snapshot_path, allow_pickle=False) as snapshot:
+                sensor_ids = snapshot["sensor_ids"].tolist()
+                temps = snapshot["temps"]
+                ts = snapshot["ts"]
+        except Exception as e:
+            logger.error(f"Error loading live sensor state, starting empty: {e}")
+            return
+
+        with self._lock:
+            self.rows = {}
+            self.sensor_ids = []
+            rows = self._row_numbers(sensor_ids)
+            self.temps[rows] = temps
+            self.ts[rows] = ts
+        logger.info(f"Loaded live sensor state for {len(sensor_ids)} sensors")
+
+    def start_snapshots(self, interval: float = config.LIVE_STATE_SNAPSHOT_SECONDS) -> None:
+        if self.snapshot_path is not None and self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop(interval))
+
+    async def stop_snapshots(self) -> None:
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            await asyncio.gather(self._snapshot_task, return_exceptions=True)
+            self._snapshot_task = None
+        # Último snapshot al apagar
+        await asyncio.to_thread(self.save)
+
+    async def _snapshot_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                logger.error(f"Error saving live sensor state: {e}")
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.services.farm_service import FarmService
+from src.services.weather_service import WeatherService
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchJob:
+    """One periodic refresh of a weather section for every farm location"""
+
+    HISTORY_SIZE = 20
+
+    def __init__(self, section: str, interval_minutes: int):
+        self.section = section
+        self.interval = interval_minutes * 60
+        self.runs = 0
+        self.failures = 0
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=self.HISTORY_SIZE)
+        self.next_run: Optional[float] = None
+
+    def next_slot(self, now: float) -> float:
+        """Next run time aligned to the upstream update cadence (UTC wall clock) plus the offset"""
+        slot = (now // self.interval + 1) * self.interval + config.PREFETCH_OFFSET_SECONDS
+        if slot - self.interval > now:
+            slot -= self.interval
+        return slot
+
+    def status(self) -> Dict[str, Any]:
+        last = self.history[-1] if self.history else None
+        return {
+            "section": self.section,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "next_run": _iso(self.next_run) if self.next_run else None,
+            # Atrasado si la última corrida empezó tarde o tardó más que el intervalo
+            "behind": bool(last) and (last["lag_seconds"] > self.interval or last["duration_ms"] > self.interval * 1000),
+            "last_run": last,
+            "history": list(self.history),
+        }
+
+
+class ForecastPrefetcher:
+    """Keeps the weather cache warm for every farm, refreshing on Open-Meteo's update cadence"""
+
+    def __init__(self):
+        self.jobs = [
+            PrefetchJob("current", config.PREFETCH_CURRENT_INTERVAL_MINUTES),
+            PrefetchJob("hourly", config.PREFETCH_HOURLY_INTERVAL_MINUTES),
+        ]
+        self._tasks: List[asyncio.Task] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._semaphore = asyncio.Semaphore(config.PREFETCH_CONCURRENCY)
+        self._tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs]
+        logger.info(f"Forecast prefetcher started ({', '.join(f'{j.section}/{j.interval}s' for j in self.jobs)})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Forecast prefetcher stopped")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "jobs": [job.status() for job in self.jobs],
+        }
+
+    async def _loop(self, job: PrefetchJob) -> None:
+        # Primera corrida al arrancar para no esperar al próximo slot
+        scheduled = time.time()
+        while True:
+            try:
+                await self.run_job(job, scheduled)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Prefetch job '{job.section}' crashed: {e}")
+
+            scheduled = job.next_slot(time.time())
+            job.next_run = scheduled
+            # Jitter para no golpear Open-Meteo en el borde exacto del slot
+            delay = scheduled - time.time() + random.uniform(0, config.PREFETCH_JITTER_SECONDS)
+            await asyncio.sleep(max(delay, 0))
+
+    async def run_job(self, job: PrefetchJob, scheduled: Optional[float] = None) -> Dict[str, Any]:
+        """Refresh one section for all farm locations with bounded concurrency and record timings"""
+        started = time.time()
+        locations = self._farm_locations()
+        batch_size = config.PREFETCH_BATCH_SIZE
+        batches = [locations[i:i + batch_size] for i in range(0, len(locations), batch_size)]
+        # Los datos precargados deben sobrevivir hasta la próxima corrida
+        ttl = job.interval + config.PREFETCH_OFFSET_SECONDS + config.PREFETCH_JITTER_SECONDS + 60
+
+        semaphore = self._semaphore or asyncio.Semaphore(config.PREFETCH_CONCURRENCY)
+        batch_durations: List[float] = []
+        errors: List[str] = []
+
+        async def run_batch(batch: List[Tuple[float, float]]) -> None:
+            async with semaphore:
+                batch_start = time.perf_counter()
+                try:
+                    await WeatherService.prefetch(batch, job.section, config.PREFETCH_FORECAST_DAYS, ttl=ttl)
+                except Exception as e:
+                    errors.append(str(e))
+                batch_durations.append(round((time.perf_counter() - batch_start) * 1000, 1))
+
+        await asyncio.gather(*(run_batch(batch) for batch in batches))
+
+        record = {
+            "section": job.section,
+            "scheduled_for": _iso(scheduled or started),
+            "started_at": _iso(started),
+            "lag_seconds": round(max(started - (scheduled or started), 0), 1),
+            "duration_ms": round((time.time() - started) * 1000, 1),
+            "locations": len(locations),
+            "batches": len(batches),
+            "batch_durations_ms": batch_durations,
+            "errors": errors,
+        }
+        job.runs += 1
+        if errors:
+            job.failures += 1
+            logger.warning(f"Prefetch '{job.section}' finished with {len(errors)} failed batches")
+        job.history.append(record)
+        logger.info(f"Prefetch '{job.section}': {len(locations)} locations in {record['duration_ms']} ms")
+        return record
+
+    @staticmethod
+    def _farm_locations() -> List[Tuple[float, float]]:
+        locations = {
+            (farm["location"]["latitude"], farm["location"]["longitude"])
+            for farm in FarmService.repository.list_raw()
+        }
+        return sorted(locations)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(timespec="seconds")
+
+
+prefetcher = ForecastPrefetcher()
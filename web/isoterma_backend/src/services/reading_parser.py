@@ -0,0 +1,296 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.models.farm_models import HEIGHTS_M, TEMP_FIELDS
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+READING_FIELDS = ("sensor_id", "ts") + TEMP_FIELDS
+# Protocolo de línea de los gateways: la altura llega como "2" o "2m"
+LINE_HEIGHTS = {
+    **{str(height): field for height, field in zip(HEIGHTS_M, TEMP_FIELDS)},
+    **{f"{height}m": field for height, field in zip(HEIGHTS_M, TEMP_FIELDS)},
+}
+
+_JSON_DECODER = json.JSONDecoder()
+
+FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "ndjson",
+    "text/csv": "csv",
+}
+
+
+class ReadingBatch:
+    """Validated readings as column arrays: ts in epoch seconds, temps (n, 4) with NaN for missing heights"""
+
+    __slots__ = ("sensor_ids", "farm_ids", "ts", "temps")
+
+    def __init__(self, sensor_ids: np.ndarray, farm_ids: np.ndarray, ts: np.ndarray, temps: np.ndarray):
+        self.sensor_ids = sensor_ids
+        self.farm_ids = farm_ids
+        self.ts = ts
+        self.temps = temps
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+async def iter_line_batches(
+    chunks: AsyncIterator[bytes],
+    batch_size: int = config.READINGS_BATCH_SIZE,
+    max_line_bytes: int = config.READINGS_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, List[bytes]]]:
+    """Split a streamed body into (first line number, lines) batches without buffering the whole body"""
+    pending = b""
+    batch: List[bytes] = []
+    next_line = 1
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        # Todas las líneas completas del chunk, no solo el fragmento pendiente
+        lengths = [len(line) for line in lines] + [len(pending)]
+        if max(lengths) > max_line_bytes:
+            too_long = next(i for i, length in enumerate(lengths) if length > max_line_bytes)
+            raise ValueError(f"Line {next_line + len(batch) + too_long} exceeds {max_line_bytes} bytes")
+        batch.extend(lines)
+        while len(batch) >= batch_size:
+            yield next_line, batch[:batch_size]
+            batch = batch[batch_size:]
+            next_line += batch_size
+
+    if pending:
+        batch.append(pending)
+    if batch:
+        yield next_line, batch
+
+
+def _decode(lines: List[bytes]) -> str:
+    """Decode a batch of lines at once; invalid UTF-8 then fails validation per row"""
+    joined = b"\n".join(lines)
+    try:
+        return joined.decode("utf-8")
+    except UnicodeDecodeError:
+        return joined.decode("utf-8", errors="replace")
+
+
+def _to_float(values: Sequence, invalid: np.ndarray) -> np.ndarray:
+    """Floats with NaN for null/empty; non-numeric values are NaN and flagged in `invalid`"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        # CSV: campos vacíos = altura sin lectura
+        return np.array([value or "nan" for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+
+    result = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            continue
+        try:
+            result[i] = float(value)
+        except (TypeError, ValueError):
+            invalid[i] = True
+    return result
+
+
+def _parse_iso(value: str) -> float:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _to_epoch(values: Sequence) -> np.ndarray:
+    """Epoch seconds (numbers) or ISO 8601 strings (UTC unless an offset is given) → float seconds, NaN if invalid"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+
+    result = np.full(len(values), np.nan)
+    iso = []
+    for i, value in enumerate(values):
+        if isinstance(value, str) and len(value) >= 10 and value[4] == "-":
+            iso.append(i)
+        elif value is not None and not isinstance(value, bool):
+            try:
+                result[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+    try:
+        # Camino rápido: todas ISO sin offset (o con 'Z')
+        stamps = np.array([values[i].rstrip("Z") for i in iso], dtype="datetime64[ms]")
+        result[iso] = stamps.astype(np.int64) / 1000.0
+    except ValueError:
+        for i in iso:
+            try:
+                result[i] = _parse_iso(values[i])
+            except ValueError:
+                pass
+    return result
+
+
+class ReadingParser:
+    """Parses batches of NDJSON or CSV lines into validated ReadingBatch columns.
+
+    NDJSON rows are objects with READING_FIELDS keys or 6-element arrays in
+    that order; CSV may start with a header naming the columns (any order).
+    The gateway line protocol ("line") carries one height per line:
+    `sensor_id height temp ts`, whitespace separated.
+    """
+
+    def __init__(self, fmt: str, resolve_farm: Callable[[str], Optional[str]]):
+        self.fmt = fmt
+        self.resolve_farm = resolve_farm
+        self.columns: Tuple[str, ...] = READING_FIELDS
+        self._header_checked = fmt != "csv"
+
+    def parse(self, lines: List[bytes], first_line: int, now: float) -> Tuple[Optional[ReadingBatch], List[Tuple[int, str]]]:
+        """(valid readings or None, [(line number, error)]) for one batch of raw lines"""
+        numbers, rows, errors = self._rows(lines, first_line)
+        if not rows:
+            return None, errors
+        return self._validate(numbers, rows, errors, now)
+
+    def _rows(self, lines: List[bytes], first_line: int) -> Tuple[List[int], List[Optional[dict]], List[Tuple[int, str]]]:
+        if self.fmt == "csv":
+            return self._csv_rows(lines, first_line)
+        if self.fmt == "line":
+            return self._line_rows(lines, first_line)
+        return self._ndjson_rows(lines, first_line)
+
+    def _ndjson_rows(self, lines: List[bytes], first_line: int):
+        numbers = [first_line + i for i, line in enumerate(lines) if line.strip()]
+        body = _decode([lines[n - first_line] for n in numbers]).split("\n")
+        # raw_decode sobre str evita el overhead de json.loads por línea (detección de encoding, regex final)
+        decode = _JSON_DECODER.raw_decode
+        rows: List[Optional[dict]] = []
+        for line in body:
+            line = line.strip()
+            try:
+                row, end = decode(line)
+                rows.append(row if end == len(line) else None)
+            except ValueError:
+                rows.append(None)
+
+        errors = []
+        if not all(type(row) is dict for row in rows):
+            for i, row in enumerate(rows):
+                if type(row) is dict:
+                    continue
+                if type(row) is list and len(row) == len(READING_FIELDS):
+                    rows[i] = dict(zip(READING_FIELDS, row))
+                else:
+                    errors.append((numbers[i], "invalid JSON row" if row is None else "expected an object or a 6-element array"))
+                    rows[i] = None
+        return numbers, rows, errors
+
+    def _line_rows(self, lines: List[bytes], first_line: int):
+        numbers = []
+        rows: List[Optional[dict]] = []
+        errors = []
+        for offset, line in enumerate(_decode(lines).split("\n")):
+            fields = line.split()
+            if not fields:
+                continue
+            numbers.append(first_line + offset)
+            if len(fields) != 4:
+                errors.append((numbers[-1], f"expected 'sensor_id height temp ts', got {len(fields)} fields"))
+                rows.append(None)
+                continue
+            sensor_id, height, temp, ts = fields
+            field = LINE_HEIGHTS.get(height)
+            if field is None:
+                errors.append((numbers[-1], f"height must be one of {', '.join(str(h) for h in HEIGHTS_M)}"))
+                rows.append(None)
+                continue
+            rows.append({"sensor_id": sensor_id, "ts": ts, field: temp})
+        return numbers, rows, errors
+
+    def _csv_rows(self, lines: List[bytes], first_line: int):
+        text = _decode(lines)
+
+        numbers = []
+        rows: List[Optional[dict]] = []
+        errors = []
+        columns = self.columns
+        width = len(columns)
+        for offset, line in enumerate(text.split("\n")):
+            line = line.strip()
+            if not line:
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            if not self._header_checked:
+                self._header_checked = True
+                if fields[0] == "sensor_id":
+                    missing = set(READING_FIELDS) - set(fields)
+                    if missing:
+                        raise ValueError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+                    self.columns = columns = tuple(fields)
+                    width = len(columns)
+                    continue
+            numbers.append(first_line + offset)
+            if len(fields) != width:
+                errors.append((numbers[-1], f"expected {width} fields, got {len(fields)}"))
+                rows.append(None)
+            else:
+                rows.append(dict(zip(columns, fields)))
+        return numbers, rows, errors
+
+    def _validate(self, numbers: List[int], rows: List[Optional[dict]], errors: List[Tuple[int, str]], now: float):
+        n = len(rows)
+        malformed = np.array([row is None for row in rows], dtype=bool)
+        if malformed.any():
+            rows = [row if row is not None else {} for row in rows]
+
+        sensor_ids = [row.get("sensor_id") for row in rows]
+        farm_ids = [self.resolve_farm(sid) if isinstance(sid, str) else None for sid in sensor_ids]
+        ts = _to_epoch([row.get("ts") for row in rows])
+
+        bad_temp = np.zeros(n, dtype=bool)
+        temps = np.empty((n, len(TEMP_FIELDS)), dtype=np.float64)
+        for j, field in enumerate(TEMP_FIELDS):
+            temps[:, j] = _to_float([row.get(field) for row in rows], bad_temp)
+
+        # Validación vectorizada; el primer motivo que aplica es el que se reporta
+        unknown = ~malformed & np.array([farm_id is None for farm_id in farm_ids], dtype=bool)
+        bad_ts = ~malformed & ~unknown & (~np.isfinite(ts) | (ts > now + config.READINGS_MAX_FUTURE_SECONDS))
+        checked = ~malformed & ~unknown & ~bad_ts
+        with np.errstate(invalid="ignore"):
+            out_of_range = (temps < config.READINGS_MIN_TEMP) | (temps > config.READINGS_MAX_TEMP)
+        bad_temp = checked & (bad_temp | out_of_range.any(axis=1) | np.isnan(temps).all(axis=1))
+        valid = checked & ~bad_temp
+
+        if not valid.all():
+            for reason, mask in (
+                ("unknown sensor_id", unknown),
+                ("invalid or future ts", bad_ts),
+                (f"temperatures must be numbers in [{config.READINGS_MIN_TEMP}, {config.READINGS_MAX_TEMP}]", bad_temp),
+            ):
+                errors.extend((numbers[i], reason) for i in np.flatnonzero(mask).tolist())
+            errors.sort()
+
+        keep = np.flatnonzero(valid)
+        if not len(keep):
+            return None, errors
+        batch = ReadingBatch(
+            sensor_ids=np.array(sensor_ids, dtype=object)[keep],
+            farm_ids=np.array(farm_ids, dtype=object)[keep],
+            ts=ts[keep],
+            temps=temps[keep]
+        )
+        return batch, errors
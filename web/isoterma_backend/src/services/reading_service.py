@@ -0,0 +1,75 @@
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional
+
+from src.services.farm_service import FarmService
+from src.services.history_service import HistoryService
+from src.services.reading_parser import ReadingParser, iter_line_batches
+from src.services.reading_writer import HistorySink, ReadingWriter
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+class SensorLookup:
+    """sensor_id → farm_id, rebuilt only when an unknown id shows up after the repository changed"""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._version: Optional[int] = None
+        self._farms: Dict[str, str] = {}
+
+    def __call__(self, sensor_id: str) -> Optional[str]:
+        farm_id = self._farms.get(sensor_id)
+        if farm_id is None and self.repository.version != self._version:
+            self._rebuild()
+            farm_id = self._farms.get(sensor_id)
+        return farm_id
+
+    def _rebuild(self) -> None:
+        self._version = self.repository.version
+        self._farms = {
+            sensor_id: farm["id"]
+            for farm in self.repository.list_raw()
+            for sensor_id in self.repository.sensors(farm["id"]).ids.tolist()
+        }
+
+
+class ReadingService:
+    """Bulk ingestion of sensor readings"""
+
+    lookup = SensorLookup(FarmService.repository)
+    writer = ReadingWriter()
+    writer.add_sink(HistorySink(HistoryService.store))
+    writer.add_sink(FarmService.live.update)
+
+    @staticmethod
+    async def ingest(chunks: AsyncIterator[bytes], fmt: str) -> dict:
+        """Parse a streamed NDJSON/CSV body batch by batch and hand valid rows to the writer"""
+        started = time.perf_counter()
+        parser = ReadingParser(fmt, ReadingService.lookup)
+        accepted = 0
+        rejected = 0
+        lines = 0
+        errors = []
+
+        async for first_line, batch_lines in iter_line_batches(chunks):
+            lines = first_line + len(batch_lines) - 1
+            batch, batch_errors = parser.parse(batch_lines, first_line, time.time())
+            rejected += len(batch_errors)
+            if len(errors) < config.READINGS_MAX_ERRORS:
+                errors.extend(batch_errors[:config.READINGS_MAX_ERRORS - len(errors)])
+            if batch is not None:
+                accepted += len(batch)
+                await ReadingService.writer.submit(batch)
+
+        duration = time.perf_counter() - started
+        logger.info(f"Ingested {accepted} readings ({rejected} rejected) in {duration * 1000:.1f} ms")
+        return {
+            "accepted": accepted,
+            "rejected": rejected,
+            "lines": lines,
+            "errors": [{"line": line, "error": error} for line, error in errors],
+            "duration_ms": round(duration * 1000, 1),
+            "readings_per_second": round(accepted / duration) if duration > 0 else None
+        }
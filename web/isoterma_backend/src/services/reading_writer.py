@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from src.services.farm_stream import stream_hub
+from src.services.reading_parser import HEIGHTS_M, ReadingBatch
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[ReadingBatch], None]
+
+class HistorySink:
+    """Appends every reading (one point per height with data) to the time-series store"""
+
+    def __init__(self, store):
+        self.store = store
+        self.heights = np.array(HEIGHTS_M, dtype=np.uint8)
+
+    def __call__(self, batch: ReadingBatch) -> None:
+        rows, columns = np.nonzero(~np.isnan(batch.temps))
+        self.store.append(batch.sensor_ids[rows], batch.ts[rows], self.heights[columns], batch.temps[rows, columns])
+
+
+class ReadingWriter:
+    """Single background consumer that applies validated reading batches to the registered sinks.
+
+    The queue is bounded (READINGS_QUEUE_BATCHES): when sinks fall behind,
+    submit() waits, which in turn slows down reading the request body.
+    """
+
+    def __init__(self, queue_size: int = config.READINGS_QUEUE_BATCHES):
+        self.queue_size = queue_size
+        self.sinks: List[Sink] = []
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.readings_written = 0
+        self.batches_written = 0
+        self.sink_errors = 0
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            self.task = asyncio.create_task(self._run())
+            logger.info(f"Reading writer started ({len(self.sinks)} sinks)")
+
+    async def submit(self, batch: ReadingBatch) -> None:
+        """Queue a batch for writing; waits while the queue is full (backpressure)"""
+        self.start()
+        await self.queue.put(batch)
+
+    async def stop(self) -> None:
+        """Drain queued batches, then stop the consumer"""
+        if self.task is None:
+            return
+        await self.queue.join()
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+        logger.info(f"Reading writer stopped ({self.readings_written} readings written)")
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self.queue.get()
+            try:
+                for sink in self.sinks:
+                    try:
+                        await asyncio.to_thread(sink, batch)
+                    except Exception as e:
+                        self.sink_errors += 1
+                        logger.error(f"Reading sink {getattr(sink, '__qualname__', type(sink).__name__)} failed: {e}")
+                self.readings_written += len(batch)
+                self.batches_written += 1
+                # Los streams abiertos de las fincas afectadas reevalúan una vez por lote
+                for farm_id in set(batch.farm_ids.tolist()):
+                    stream_hub.notify(farm_id)
+            finally:
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued_batches": self.queue.qsize() if self.queue else 0,
+            "batches_written": self.batches_written,
+            "readings_written": self.readings_written,
+            "sink_errors": self.sink_errors
+        }
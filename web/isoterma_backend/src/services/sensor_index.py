@@ -0,0 +1,248 @@
+import heapq
+import logging
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.sensor_array import SensorArray
+from src.services.live_state import LiveSensorState
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+# Mismo radio que haversine_m: una cota en metros con otro radio puede descartar al más cercano
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+
+Cell = Tuple[int, int]
+# (farm_id, fila del sensor en el SensorArray de la finca, lat, lon)
+Entry = Tuple[str, int, float, float]
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class SensorSpatialIndex:
+    """Uniform-grid spatial index over the sensors of every farm in a repository.
+
+    Synced lazily against repository.version; only farms whose sensor layout
+    (ids + coordinates) changed are re-bucketed. Sensor dicts are built from
+    the farm's SensorArray at query time, with the live readings (if a
+    LiveSensorState is given) overlaid on the temperature.
+    """
+
+    def __init__(
+        self,
+        repository,
+        cell_deg: float = config.SENSOR_INDEX_CELL_DEG,
+        live: Optional[LiveSensorState] = None
+    ):
+        self.repository = repository
+        self.cell_deg = cell_deg
+        self.live = live
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._grid: Dict[Cell, List[Entry]] = {}
+        self._farm_cells: Dict[str, set] = {}
+        self._farm_layouts: Dict[str, int] = {}
+        self._farm_sensors: Dict[str, SensorArray] = {}
+        self._cell_range: Optional[Tuple[int, int, int, int]] = None
+        # (entradas, latitudes, longitudes) para el barrido vectorizado de nearest(); se reemplaza entero
+        self._columns: Tuple[List[Entry], np.ndarray, np.ndarray] = ([], np.empty(0), np.empty(0))
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    @property
+    def size(self) -> int:
+        return sum(len(sensors) for sensors in self._farm_sensors.values())
+
+    def sync(self) -> None:
+        """Bring the index up to date with the repository (incremental per farm)"""
+        version = self.repository.version
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version == self._version:
+                return
+            farms = self.repository.list_raw()
+            seen = set()
+            rebucketed = 0
+            for farm in farms:
+                farm_id = farm["id"]
+                sensors = self.repository.sensors(farm_id)
+                seen.add(farm_id)
+                self._farm_sensors[farm_id] = sensors
+                layout = hash((sensors.ids.tobytes(), sensors.latitude.tobytes(), sensors.longitude.tobytes()))
+                if self._farm_layouts.get(farm_id) != layout:
+                    self._remove_farm(farm_id)
+                    self._insert_farm(farm_id, sensors)
+                    self._farm_layouts[farm_id] = layout
+                    rebucketed += 1
+
+            for farm_id in list(self._farm_layouts):
+                if farm_id not in seen:
+                    self._remove_farm(farm_id)
+                    del self._farm_layouts[farm_id]
+                    del self._farm_sensors[farm_id]
+                    rebucketed += 1
+
+            self._update_cell_range()
+            self._update_columns()
+            self._version = version
+            if rebucketed:
+                logger.info(f"Sensor index: re-indexed {rebucketed} farms ({self.size} sensors)")
+
+    def _insert_farm(self, farm_id: str, sensors: SensorArray) -> None:
+        cells = set()
+        for i, (lat, lon) in enumerate(zip(sensors.latitude.tolist(), sensors.longitude.tolist())):
+            cell = self._cell(lat, lon)
+            self._grid.setdefault(cell, []).append((farm_id, i, lat, lon))
+            cells.add(cell)
+        self._farm_cells[farm_id] = cells
+
+    def _remove_farm(self, farm_id: str) -> None:
+        for cell in self._farm_cells.pop(farm_id, ()):
+            remaining = [entry for entry in self._grid[cell] if entry[0] != farm_id]
+            if remaining:
+                self._grid[cell] = remaining
+            else:
+                del self._grid[cell]
+
+    def _update_cell_range(self) -> None:
+        if not self._grid:
+            self._cell_range = None
+            return
+        rows = [cell[0] for cell in self._grid]
+        cols = [cell[1] for cell in self._grid]
+        self._cell_range = (min(rows), max(rows), min(cols), max(cols))
+
+    def _update_columns(self) -> None:
+        entries = [entry for cell_entries in self._grid.values() for entry in cell_entries]
+        self._columns = (
+            entries,
+            np.array([entry[2] for entry in entries], dtype=np.float64),
+            np.array([entry[3] for entry in entries], dtype=np.float64)
+        )
+
+    def _sensors(self, entries: List[Entry]) -> List[dict]:
+        """Sensor dicts for the entries (same order), one live overlay per farm for just those rows"""
+        positions: Dict[str, List[int]] = {}
+        for position, entry in enumerate(entries):
+            positions.setdefault(entry[0], []).append(position)
+
+        result: List[Optional[dict]] = [None] * len(entries)
+        for farm_id, farm_positions in positions.items():
+            sensors = self._farm_sensors[farm_id].take([entries[position][1] for position in farm_positions])
+            if self.live is not None:
+                sensors = self.live.overlay(sensors)
+            for row, position in enumerate(farm_positions):
+                result[position] = {**sensors.record(row), "farm_id": farm_id}
+        return result
+
+    def query_bbox(self, west: float, south: float, east: float, north: float) -> List[dict]:
+        """Sensors inside [west, east] x [south, north]"""
+        self.sync()
+        row_min, col_min = self._cell(south, west)
+        row_max, col_max = self._cell(north, east)
+
+        # Viewport muy grande: recorrer solo las celdas ocupadas
+        n_cells = (row_max - row_min + 1) * (col_max - col_min + 1)
+        if n_cells > len(self._grid):
+            cells: Iterable[Cell] = [
+                cell for cell in self._grid
+                if row_min <= cell[0] <= row_max and col_min <= cell[1] <= col_max
+            ]
+        else:
+            cells = (
+                (row, col)
+                for row in range(row_min, row_max + 1)
+                for col in range(col_min, col_max + 1)
+            )
+
+        inside = []
+        for cell in cells:
+            for entry in self._grid.get(cell, ()):
+                _, _, lat, lon = entry
+                if south <= lat <= north and west <= lon <= east:
+                    inside.append(entry)
+        return self._sensors(inside)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> List[dict]:
+        """k nearest sensors to a point (ring search over grid cells), with distance in metres"""
+        self.sync()
+        if self._cell_range is None or k <= 0:
+            return []
+
+        # Empezar desde la celda ocupada más cercana: lejos de los sensores los anillos vacíos no cuentan
+        row_min, row_max, col_min, col_max = self._cell_range
+        row, col = self._cell(latitude, longitude)
+        row0 = min(max(row, row_min), row_max)
+        col0 = min(max(col, col_min), col_max)
+        max_ring = max(row0 - row_min, row_max - row0, col0 - col_min, col_max - col0)
+
+        # Anillos que cubren más celdas que las ocupadas: más barato medir todos los sensores
+        if (2 * max_ring + 1) ** 2 > len(self._grid):
+            ordered = self._nearest_scan(latitude, longitude, k)
+        else:
+            ordered = self._nearest_rings(latitude, longitude, k, row0, col0, max_ring)
+        sensors = self._sensors([entry for _, entry in ordered])
+        return [{**sensor, "distance_m": round(distance, 1)} for sensor, (distance, _) in zip(sensors, ordered)]
+
+    def _nearest_scan(self, latitude: float, longitude: float, k: int) -> List[Tuple[float, Entry]]:
+        """Vectorized haversine distance to every indexed sensor"""
+        entries, latitudes, longitudes = self._columns
+        phi1 = math.radians(latitude)
+        phi2 = np.radians(latitudes)
+        dlambda = np.radians(longitudes - longitude)
+        a = np.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+        distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        k = min(k, len(distances))
+        closest = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(k)
+        closest = closest[np.argsort(distances[closest], kind="stable")]
+        return [(float(distances[i]), entries[i]) for i in closest]
+
+    def _nearest_rings(
+        self, latitude: float, longitude: float, k: int, row0: int, col0: int, max_ring: int
+    ) -> List[Tuple[float, Entry]]:
+        """Ring search over grid cells around (row0, col0), stopping once no closer cell can remain"""
+        # Cota inferior de distancia por anillo: los sensores del anillo r están a (r - 1) celdas o más
+        # en latitud (al menos (r - 1) * cell_deg * METERS_PER_DEGREE) o en longitud; a un meridiano
+        # separado por dλ la distancia es R * asin(cos(lat) * sin(dλ)), que es la menor de las dos
+        cos_lat = math.cos(math.radians(min(abs(latitude), 90.0)))
+
+        best: List[Tuple[float, Entry]] = []  # max-heap por distancia (negada)
+        for ring in range(max_ring + 1):
+            gap = min(math.radians(max(ring - 1, 0) * self.cell_deg), math.pi / 2)
+            if len(best) >= k and EARTH_RADIUS_M * math.asin(cos_lat * math.sin(gap)) > -best[0][0]:
+                break
+            for cell in self._ring_cells(row0, col0, ring):
+                for entry in self._grid.get(cell, ()):
+                    distance = haversine_m(latitude, longitude, entry[2], entry[3])
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, entry))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, entry))
+
+        return sorted(((-neg, entry) for neg, entry in best), key=lambda item: item[0])
+
+    @staticmethod
+    def _ring_cells(row0: int, col0: int, ring: int) -> Iterable[Cell]:
+        if ring == 0:
+            yield row0, col0
+            return
+        for col in range(col0 - ring, col0 + ring + 1):
+            yield row0 - ring, col
+            yield row0 + ring, col
+        for row in range(row0 - ring + 1, row0 + ring):
+            yield row, col0 - ring
+            yield row, col0 + ring
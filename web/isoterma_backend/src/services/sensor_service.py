@@ -0,0 +1,28 @@
+import logging
+from typing import List
+
+from src.services.farm_service import FarmService
+from src.services.sensor_index import SensorSpatialIndex
+
+logger = logging.getLogger(__name__)
+
+class SensorService:
+    """Spatial queries over the sensors of all farms"""
+    
+    # Temperaturas con las lecturas vivas, igual que include=sensors
+    index = SensorSpatialIndex(FarmService.repository, live=FarmService.live)
+    
+    @staticmethod
+    def get_sensors_in_bbox(west: float, south: float, east: float, north: float) -> List[dict]:
+        """Sensors inside a map viewport"""
+        if west > east or south > north:
+            raise ValueError("Invalid bbox: expected west,south,east,north with west <= east and south <= north")
+        
+        sensors = SensorService.index.query_bbox(west, south, east, north)
+        logger.info(f"Found {len(sensors)} sensors in bbox ({west}, {south}, {east}, {north})")
+        return sensors
+    
+    @staticmethod
+    def get_nearest_sensors(latitude: float, longitude: float, k: int = 1) -> List[dict]:
+        """k nearest sensors to a point, closest first"""
+        return SensorService.index.nearest(latitude, longitude, k)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+# Secciones de la respuesta de Open-Meteo que se cachean por separado
+SECTION_TTLS = {
+    "current": config.WEATHER_CACHE_TTL_CURRENT,
+    "hourly": config.WEATHER_CACHE_TTL_HOURLY,
+}
+
+
+class WeatherCache:
+    """LRU + TTL cache for Open-Meteo response sections, keyed by snapped grid cell"""
+
+    def __init__(
+        self,
+        grid_deg: float = config.WEATHER_CACHE_GRID_DEG,
+        max_bytes: int = config.WEATHER_CACHE_MAX_BYTES,
+        max_entries: int = config.WEATHER_CACHE_MAX_ENTRIES
+    ):
+        self.grid_deg = grid_deg
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def snap(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Grid cell indexes for a coordinate (points in the same model cell share data)"""
+        return round(latitude / self.grid_deg), round(longitude / self.grid_deg)
+
+    def make_key(
+        self,
+        section: str,
+        latitude: float,
+        longitude: float,
+        variables: Iterable[str],
+        forecast_days: Optional[int] = None
+    ) -> Hashable:
+        # forecast_days solo cambia el contenido de la sección hourly
+        days = forecast_days if section == "hourly" else None
+        return (section, *self.snap(latitude, longitude), tuple(sorted(variables)), days)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Dict[str, Any], ttl: float) -> None:
+        size = len(json.dumps(value, separators=(",", ":")))
+        if size > self.max_bytes:
+            logger.warning(f"Weather cache entry too large to store ({size} bytes)")
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "grid_deg": self.grid_deg,
+            "ttl_seconds": SECTION_TTLS,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
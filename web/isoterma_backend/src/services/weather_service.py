@@ -1,96 +1,288 @@
-import requests
+import asyncio
+import httpx
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+from src.services.weather_cache import WeatherCache, SECTION_TTLS
+from src.utils import config
+from src.utils.http_client import get_json
+from src.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+CURRENT_VARIABLES = [
+    'temperature_2m',
+    'relative_humidity_2m',
+    'apparent_temperature',
+    'precipitation',
+    'rain',
+    'cloud_cover',
+    'pressure_msl',
+    'wind_speed_10m',
+    'wind_direction_10m',
+    'wind_gusts_10m'
+]
+
+HOURLY_VARIABLES = [
+    'temperature_2m',
+    'relative_humidity_2m',
+    'precipitation_probability',
+    'precipitation',
+    'wind_speed_10m'
+]
+
+TIMEZONE = 'America/Argentina/Buenos_Aires'
+
 class WeatherService:
     """Service for weather API interactions"""
-    
-    OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
-    
+
+    OPEN_METEO_URL = config.OPEN_METEO_URL
+    cache = WeatherCache()
+    inflight = SingleFlight()
+
+    @staticmethod
+    def _split_sections(data: Dict[str, Any], sections: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Split an upstream response into one cacheable block per section (plus location metadata)"""
+        meta = {
+            k: v for k, v in data.items()
+            if k not in ('current', 'current_units', 'hourly', 'hourly_units')
+        }
+        return {
+            section: {
+                **meta,
+                section: data.get(section, {}),
+                f'{section}_units': data.get(f'{section}_units', {})
+            }
+            for section in sections
+        }
+
+    @staticmethod
+    def _section_keys(
+        latitude: float,
+        longitude: float,
+        variables: Dict[str, List[str]],
+        forecast_days: Optional[int]
+    ) -> Dict[str, Any]:
+        return {
+            section: WeatherService.cache.make_key(section, latitude, longitude, names, forecast_days)
+            for section, names in variables.items()
+        }
+
+    @staticmethod
+    def _build_params(
+        latitude: Union[float, str],
+        longitude: Union[float, str],
+        variables: Dict[str, List[str]],
+        sections: Sequence[str],
+        forecast_days: Optional[int]
+    ) -> Dict[str, Any]:
+        """Query params for one location, or several as comma-separated coordinates"""
+        params = {
+            'latitude': latitude,
+            'longitude': longitude,
+            'timezone': TIMEZONE
+        }
+        for section in sections:
+            params[section] = variables[section]
+        if forecast_days is not None and 'hourly' in sections:
+            params['forecast_days'] = forecast_days
+        return params
+
+    @staticmethod
+    def _assemble(blocks: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for block in blocks.values():
+            result.update(block)
+        return result
+
+    @staticmethod
+    async def _fetch(
+        latitude: float,
+        longitude: float,
+        variables: Dict[str, List[str]],
+        forecast_days: Optional[int] = None,
+        timeout: float = 15
+    ) -> Dict[str, Any]:
+        """Fetch the requested sections ('current'/'hourly'), serving fresh ones from cache"""
+        cache = WeatherService.cache
+        keys = WeatherService._section_keys(latitude, longitude, variables, forecast_days)
+        blocks = {section: cache.get(key) for section, key in keys.items()}
+        missing = [section for section, block in blocks.items() if block is None]
+
+        if missing:
+            async def fetch_missing() -> Dict[str, Dict[str, Any]]:
+                params = WeatherService._build_params(
+                    latitude, longitude, variables, missing, forecast_days
+                )
+                data = await get_json(WeatherService.OPEN_METEO_URL, params, timeout=timeout)
+                fetched = WeatherService._split_sections(data, missing)
+                for section, block in fetched.items():
+                    cache.set(keys[section], block, SECTION_TTLS[section])
+                return fetched
+
+            # Callers concurrentes con la misma celda y parámetros comparten un único request
+            flight_key = tuple(keys[section] for section in missing)
+            blocks.update(await WeatherService.inflight.do(flight_key, fetch_missing))
+
+        return WeatherService._assemble(blocks)
+
+    @staticmethod
+    async def _fetch_many(
+        locations: Sequence[Tuple[float, float]],
+        variables: Dict[str, List[str]],
+        forecast_days: Optional[int] = None,
+        timeout: float = 30,
+        refresh: bool = False,
+        ttl: Optional[float] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Fetch many locations using Open-Meteo's comma-separated coordinates, one request per chunk.
+
+        refresh=True skips cache reads and re-publishes every location (used by the prefetcher);
+        ttl overrides the per-section TTL for the stored blocks. Locations of a failed chunk come
+        back as None; if every chunk fails the first error is raised.
+        """
+        cache = WeatherService.cache
+        sections = list(variables)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(locations)
+
+        # Índices de entrada agrupados por celda: puntos de la misma celda se piden una sola vez
+        pending: Dict[Tuple, List[int]] = {}
+        cell_keys: Dict[Tuple, Dict[str, Any]] = {}
+        for i, (latitude, longitude) in enumerate(locations):
+            keys = WeatherService._section_keys(latitude, longitude, variables, forecast_days)
+            blocks = {} if refresh else {section: cache.get(key) for section, key in keys.items()}
+            if blocks and all(block is not None for block in blocks.values()):
+                results[i] = WeatherService._assemble(blocks)
+                continue
+            cell = tuple(keys.values())
+            cell_keys[cell] = keys
+            pending.setdefault(cell, []).append(i)
+
+        cells = list(pending)
+        chunk_size = config.WEATHER_BATCH_CHUNK_SIZE
+        chunks = [cells[start:start + chunk_size] for start in range(0, len(cells), chunk_size)]
+
+        async def fetch_chunk(chunk: List[Tuple]) -> None:
+            points = [locations[pending[cell][0]] for cell in chunk]
+            params = WeatherService._build_params(
+                ",".join(str(lat) for lat, _ in points),
+                ",".join(str(lon) for _, lon in points),
+                variables,
+                sections,
+                forecast_days
+            )
+            data = await get_json(WeatherService.OPEN_METEO_URL, params, timeout=timeout)
+            # Con una sola ubicación Open-Meteo devuelve un objeto en lugar de una lista
+            payloads = data if isinstance(data, list) else [data]
+            if len(payloads) != len(chunk):
+                raise ValueError(f"Expected {len(chunk)} locations from Open-Meteo, got {len(payloads)}")
+
+            for cell, payload in zip(chunk, payloads):
+                blocks = WeatherService._split_sections(payload, sections)
+                for section, block in blocks.items():
+                    cache.set(cell_keys[cell][section], block, ttl or SECTION_TTLS[section])
+                assembled = WeatherService._assemble(blocks)
+                for i in pending[cell]:
+                    results[i] = assembled
+
+        # Los chunks van en paralelo; el límite por host del cliente acota la concurrencia real
+        outcomes = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        # Un chunk caído deja en None solo sus ubicaciones; el resto del lote sigue siendo válido
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        for outcome in failures:
+            if not isinstance(outcome, Exception):
+                raise outcome
+        if failures and len(failures) == len(chunks):
+            raise failures[0]
+        if failures:
+            logger.warning(f"Batch weather: {len(failures)} of {len(chunks)} upstream requests failed (first: {failures[0]})")
+        logger.info(
+            f"Batch weather: {len(locations)} locations, {len(cells)} cache misses, {len(chunks)} upstream requests"
+        )
+        return results
+
     @staticmethod
     async def get_current_weather(latitude: float, longitude: float) -> Dict[str, Any]:
         """Get current weather from Open-Meteo API"""
         try:
-            params = {
-                'latitude': latitude,
-                'longitude': longitude,
-                'current': [
-                    'temperature_2m',
-                    'relative_humidity_2m',
-                    'apparent_temperature',
-                    'precipitation',
-                    'rain',
-                    'cloud_cover',
-                    'pressure_msl',
-                    'wind_speed_10m',
-                    'wind_direction_10m',
-                    'wind_gusts_10m'
-                ],
-                'timezone': 'America/Argentina/Buenos_Aires'
-            }
-            
-            response = requests.get(
-                WeatherService.OPEN_METEO_URL,
-                params=params,
+            data = await WeatherService._fetch(
+                latitude,
+                longitude,
+                {'current': CURRENT_VARIABLES},
                 timeout=10
             )
-            response.raise_for_status()
-            
-            data = response.json()
             logger.info(f"Weather data fetched for ({latitude}, {longitude})")
             return data
-            
-        except requests.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching weather data: {e}")
             raise
-    
+
     @staticmethod
     async def get_forecast(latitude: float, longitude: float, forecast_days: int = 3) -> Dict[str, Any]:
         """Get weather forecast from Open-Meteo API"""
         try:
-            params = {
-                'latitude': latitude,
-                'longitude': longitude,
-                'current': [
-                    'temperature_2m',
-                    'relative_humidity_2m',
-                    'apparent_temperature',
-                    'precipitation',
-                    'rain',
-                    'cloud_cover',
-                    'pressure_msl',
-                    'wind_speed_10m',
-                    'wind_direction_10m',
-                    'wind_gusts_10m'
-                ],
-                'hourly': [
-                    'temperature_2m',
-                    'relative_humidity_2m',
-                    'precipitation_probability',
-                    'precipitation',
-                    'wind_speed_10m'
-                ],
-                'forecast_days': forecast_days,
-                'timezone': 'America/Argentina/Buenos_Aires'
-            }
-            
-            response = requests.get(
-                WeatherService.OPEN_METEO_URL,
-                params=params,
+            data = await WeatherService._fetch(
+                latitude,
+                longitude,
+                {'current': CURRENT_VARIABLES, 'hourly': HOURLY_VARIABLES},
+                forecast_days=forecast_days,
                 timeout=15
             )
-            response.raise_for_status()
-            
-            data = response.json()
             logger.info(f"Forecast data fetched for ({latitude}, {longitude}) - {forecast_days} days")
             return data
-            
-        except requests.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching forecast data: {e}")
             raise
-    
+
+    @staticmethod
+    async def get_forecast_many(
+        locations: Sequence[Tuple[float, float]],
+        forecast_days: int = 3
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Get current weather + forecast for many (latitude, longitude) points, aligned to input order (None where the upstream chunk failed)"""
+        try:
+            return await WeatherService._fetch_many(
+                locations,
+                {'current': CURRENT_VARIABLES, 'hourly': HOURLY_VARIABLES},
+                forecast_days=forecast_days
+            )
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching batch forecast data: {e}")
+            raise
+
+    @staticmethod
+    async def prefetch(
+        locations: Sequence[Tuple[float, float]],
+        section: str,
+        forecast_days: int = 3,
+        ttl: Optional[float] = None
+    ) -> int:
+        """Refresh one section ('current' or 'hourly') for many locations and publish it into the cache"""
+        variables = {'current': CURRENT_VARIABLES, 'hourly': HOURLY_VARIABLES}[section]
+        results = await WeatherService._fetch_many(
+            locations,
+            {section: variables},
+            forecast_days=forecast_days if section == 'hourly' else None,
+            refresh=True,
+            ttl=ttl
+        )
+        failed = sum(result is None for result in results)
+        if failed:
+            # Lo que sí llegó ya quedó publicado en la cache; el error queda en el historial del prefetch
+            raise RuntimeError(f"{failed} of {len(results)} locations failed to refresh")
+        return len(results)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Hit/miss counters and size of the response cache, plus request coalescing counters"""
+        return {
+            **WeatherService.cache.stats(),
+            "upstream": WeatherService.inflight.stats()
+        }
+
     @staticmethod
     async def validate_sensor(latitude: float, longitude: float, measured_temp: float) -> Dict[str, Any]:
         """Validate sensor reading against API data"""
@@ -98,7 +290,7 @@ class WeatherService:
             weather_data = await WeatherService.get_current_weather(latitude, longitude)
             api_temp = weather_data['current']['temperature_2m']
             difference = abs(api_temp - measured_temp)
-            
+
             # Determine status
             if difference < 2:
                 status = "OK"
@@ -109,7 +301,7 @@ class WeatherService:
             else:
                 status = "ERROR"
                 message = "Sensor requires attention - significant deviation"
-            
+
             return {
                 'measured_temperature': measured_temp,
                 'api_temperature': api_temp,
@@ -117,7 +309,7 @@ class WeatherService:
                 'status': status,
                 'message': message
             }
-            
+
         except Exception as e:
             logger.error(f"Error validating sensor: {e}")
             raise
\ No newline at end of file
@@ -0,0 +1,90 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Open-Meteo
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "15"))
+
+# Shared HTTP client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "true").lower() == "true"
+
+# Weather response cache
+WEATHER_CACHE_GRID_DEG = float(os.getenv("WEATHER_CACHE_GRID_DEG", "0.05"))
+WEATHER_CACHE_TTL_CURRENT = float(os.getenv("WEATHER_CACHE_TTL_CURRENT", "600"))
+WEATHER_CACHE_TTL_HOURLY = float(os.getenv("WEATHER_CACHE_TTL_HOURLY", "3600"))
+WEATHER_CACHE_MAX_BYTES = int(os.getenv("WEATHER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "5000"))
+
+# Batch weather (coordenadas separadas por coma en un solo request)
+WEATHER_BATCH_CHUNK_SIZE = int(os.getenv("WEATHER_BATCH_CHUNK_SIZE", "100"))
+WEATHER_BATCH_MAX_LOCATIONS = int(os.getenv("WEATHER_BATCH_MAX_LOCATIONS", "1000"))
+
+# Prefetch de pronósticos para todas las fincas
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+# Open-Meteo actualiza 'current' cada 15 min y los modelos horarios cada hora
+PREFETCH_CURRENT_INTERVAL_MINUTES = int(os.getenv("PREFETCH_CURRENT_INTERVAL_MINUTES", "15"))
+PREFETCH_HOURLY_INTERVAL_MINUTES = int(os.getenv("PREFETCH_HOURLY_INTERVAL_MINUTES", "60"))
+PREFETCH_OFFSET_SECONDS = float(os.getenv("PREFETCH_OFFSET_SECONDS", "120"))
+PREFETCH_JITTER_SECONDS = float(os.getenv("PREFETCH_JITTER_SECONDS", "30"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+PREFETCH_BATCH_SIZE = int(os.getenv("PREFETCH_BATCH_SIZE", "100"))
+PREFETCH_FORECAST_DAYS = int(os.getenv("PREFETCH_FORECAST_DAYS", "3"))
+
+# Escritura de fincas.json
+FARM_FLUSH_DELAY_SECONDS = float(os.getenv("FARM_FLUSH_DELAY_SECONDS", "0.5"))
+FARM_FSYNC_POLICY = os.getenv("FARM_FSYNC_POLICY", "always")  # always | interval | never
+FARM_FSYNC_INTERVAL_SECONDS = float(os.getenv("FARM_FSYNC_INTERVAL_SECONDS", "30"))
+
+# Storage de fincas: 'json' (data/fincas.json) o 'sqlite'
+FARM_STORAGE_BACKEND = os.getenv("FARM_STORAGE_BACKEND", "json").lower()
+FARM_SQLITE_PATH = os.getenv("FARM_SQLITE_PATH", "data/fincas.db")
+
+# Paginación de GET /farms
+FARMS_PAGE_DEFAULT_LIMIT = int(os.getenv("FARMS_PAGE_DEFAULT_LIMIT", "100"))
+FARMS_PAGE_MAX_LIMIT = int(os.getenv("FARMS_PAGE_MAX_LIMIT", "1000"))
+
+# Índice espacial de sensores (grilla uniforme)
+SENSOR_INDEX_CELL_DEG = float(os.getenv("SENSOR_INDEX_CELL_DEG", "0.001"))
+
+# Streams SSE/WebSocket por finca
+STREAM_REEVALUATE_SECONDS = float(os.getenv("STREAM_REEVALUATE_SECONDS", "60"))
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+
+# Ingesta de lecturas de sensores (POST /readings, NDJSON o CSV)
+READINGS_BATCH_SIZE = int(os.getenv("READINGS_BATCH_SIZE", "5000"))
+READINGS_QUEUE_BATCHES = int(os.getenv("READINGS_QUEUE_BATCHES", "64"))
+READINGS_MAX_LINE_BYTES = int(os.getenv("READINGS_MAX_LINE_BYTES", "4096"))
+READINGS_MAX_ERRORS = int(os.getenv("READINGS_MAX_ERRORS", "20"))
+READINGS_MIN_TEMP = float(os.getenv("READINGS_MIN_TEMP", "-50"))
+READINGS_MAX_TEMP = float(os.getenv("READINGS_MAX_TEMP", "60"))
+READINGS_MAX_FUTURE_SECONDS = float(os.getenv("READINGS_MAX_FUTURE_SECONDS", "300"))
+
+# Historial de lecturas (time-series embebido con rollups 1m/15m/1h)
+TIMESERIES_DIR = os.getenv("TIMESERIES_DIR", "data/timeseries")
+TIMESERIES_RETENTION_RAW_DAYS = int(os.getenv("TIMESERIES_RETENTION_RAW_DAYS", "7"))
+TIMESERIES_RETENTION_1M_DAYS = int(os.getenv("TIMESERIES_RETENTION_1M_DAYS", "30"))
+TIMESERIES_RETENTION_15M_DAYS = int(os.getenv("TIMESERIES_RETENTION_15M_DAYS", "365"))
+TIMESERIES_RETENTION_1H_DAYS = int(os.getenv("TIMESERIES_RETENTION_1H_DAYS", "1825"))
+TIMESERIES_MAX_POINTS = int(os.getenv("TIMESERIES_MAX_POINTS", "2000"))
+TIMESERIES_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("TIMESERIES_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+
+# Estado vivo de sensores (última lectura por altura, separado de fincas.json)
+LIVE_STATE_SNAPSHOT_PATH = os.getenv("LIVE_STATE_SNAPSHOT_PATH", "data/live_state.npz")
+LIVE_STATE_SNAPSHOT_SECONDS = float(os.getenv("LIVE_STATE_SNAPSHOT_SECONDS", "60"))
+
+# Listener de protocolo de línea para gateways (TCP/UDP): "sensor_id height temp ts"
+LINE_LISTENER_ENABLED = os.getenv("LINE_LISTENER_ENABLED", "false").lower() == "true"
+LINE_LISTENER_HOST = os.getenv("LINE_LISTENER_HOST", "0.0.0.0")
+LINE_LISTENER_TCP_PORT = int(os.getenv("LINE_LISTENER_TCP_PORT", "8765"))
+LINE_LISTENER_UDP_PORT = int(os.getenv("LINE_LISTENER_UDP_PORT", "8765"))
+LINE_LISTENER_BATCH_SIZE = int(os.getenv("LINE_LISTENER_BATCH_SIZE", "2000"))
+LINE_LISTENER_FLUSH_MS = float(os.getenv("LINE_LISTENER_FLUSH_MS", "200"))
+LINE_LISTENER_MAX_PENDING = int(os.getenv("LINE_LISTENER_MAX_PENDING", "50000"))
@@ -0,0 +1,79 @@
+import asyncio
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (httpx[http2])"""
+    return config.HTTP_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def _create_client() -> httpx.AsyncClient:
+    """Shared client factory: same pool limits and timeouts inside and outside the lifespan"""
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        timeout=config.API_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+async def startup_http_client() -> httpx.AsyncClient:
+    """Create the shared async HTTP client (called from the app lifespan)"""
+    global _client
+    if _client is None:
+        _client = _create_client()
+        logger.info(
+            f"HTTP client started (http2={_http2_available()}, per-host limit={config.HTTP_MAX_CONNECTIONS_PER_HOST})"
+        )
+    return _client
+
+
+async def shutdown_http_client() -> None:
+    """Close the shared async HTTP client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _host_semaphores.clear()
+        logger.info("HTTP client closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it lazily outside the app lifespan (scripts, tests)"""
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(config.HTTP_MAX_CONNECTIONS_PER_HOST)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+
+async def get_json(url: str, params: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    """GET a JSON document through the shared client, honouring the per-host connection limit"""
+    client = get_http_client()
+    async with _host_semaphore(url):
+        response = await client.get(url, params=params, timeout=timeout or config.API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one shared in-flight task"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        # shield: si un caller se cancela, la tarea compartida sigue para el resto
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marcar la excepción como recuperada aunque todos los callers se hayan cancelado
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
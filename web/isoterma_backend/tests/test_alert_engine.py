@@ -0,0 +1,19 @@
+from src.models.sensor_array import SensorArray
+from src.services import alert_engine
+
+
+def test_sensor_alerts_only_for_breaching_rows():
+    sensors = SensorArray.from_dicts([
+        {"id": "S1", "latitude": -39.16, "longitude": -67.03, "status": "active", "temperature": -1.5},
+        {"id": "S2", "latitude": -39.16, "longitude": -67.03, "status": "active", "temperature": 12.0},
+        {"id": "S3", "latitude": -39.16, "longitude": -67.03, "status": "active", "temperature": None},
+        {"id": "S4", "latitude": -39.16, "longitude": -67.03, "status": "active", "temperature": 31.25},
+    ])
+
+    alerts = alert_engine.sensor_alerts(sensors, 0, 30)
+
+    assert [(alert["sensor_id"], alert["type"], alert["temperature"]) for alert in alerts] == [
+        ("S1", "temperature_low", -1.5),
+        ("S4", "temperature_high", 31.25),
+    ]
+    assert alert_engine.sensor_alerts(sensors.take([]), 0, 30) == []
@@ -0,0 +1,83 @@
+import json
+import sqlite3
+
+from src.repositories.farm_repository import FarmRepository
+from src.repositories.sqlite_farm_repository import SqliteFarmRepository
+
+
+def make_farm(farm_id: str, **overrides) -> dict:
+    farm = {
+        "id": farm_id,
+        "name": f"Finca {farm_id}",
+        "location": {"latitude": -39.16, "longitude": -67.03, "address": "Ruta 22", "region": "Río Negro"},
+        "area_hectares": 10.0,
+        "bounds": {"north": -39.15, "south": -39.17, "west": -67.04, "east": -67.02},
+        "sensors": [
+            {"id": f"{farm_id}_S1", "latitude": -39.16, "longitude": -67.03, "status": "active", "temperature": 4.5},
+            {"id": f"{farm_id}_S2", "latitude": -39.161, "longitude": -67.031, "status": "warning", "temperature": None},
+        ],
+        "crops": ["manzana"],
+        "owner": "Test",
+        "created_at": "2026-01-01T00:00:00Z",
+        "settings": {"alerts_enabled": True},
+    }
+    farm.update(overrides)
+    return farm
+
+
+def test_flush_keeps_invalid_farms(tmp_path):
+    invalid = make_farm("F_BAD")
+    del invalid["owner"]
+    documents = [make_farm("F_OK"), invalid]
+    path = tmp_path / "fincas.json"
+    path.write_text(json.dumps(documents), encoding="utf-8")
+
+    repository = FarmRepository(path, flush_delay=60)
+    assert [farm["id"] for farm in repository.list_raw()] == ["F_OK"]
+
+    repository.update_settings("F_OK", {"temperature_threshold_min": -2})
+    repository.flush()
+
+    written = json.loads(path.read_text(encoding="utf-8"))
+    assert written[1] == invalid
+    assert written[0]["settings"] == {"alerts_enabled": True, "temperature_threshold_min": -2}
+    assert written[0]["sensors"] == documents[0]["sensors"]
+
+
+def test_documents_keep_sensors_only_as_columns(tmp_path):
+    farm = make_farm("F_OK")
+    path = tmp_path / "fincas.json"
+    path.write_text(json.dumps([farm]), encoding="utf-8")
+
+    repository = FarmRepository(path, flush_delay=60)
+    assert "sensors" not in repository.get("F_OK")
+    assert all("sensors" not in document for document in repository.list_raw())
+    assert repository.sensors("F_OK").to_dicts() == farm["sensors"]
+
+
+def test_sqlite_settings_write_patches_snapshot_without_reload(tmp_path):
+    path = tmp_path / "farms.db"
+    repository = SqliteFarmRepository(path)
+    repository.import_farms([make_farm("F1"), make_farm("F2")])
+    raw = repository.list_raw()
+    sensors = repository.sensors("F1")
+    version = repository.version
+
+    repository.update_settings("F1", {"temperature_threshold_min": -2})
+
+    # Escritura propia: mismo snapshot, con los settings aplicados
+    assert repository.version == version
+    assert repository.list_raw() is raw
+    assert repository.sensors("F1") is sensors
+    assert raw[0]["settings"] == {"alerts_enabled": True, "temperature_threshold_min": -2}
+    assert repository.get("F1")["settings"] == raw[0]["settings"]
+
+    # Un commit de otra conexión sí recarga todo
+    other = sqlite3.connect(path)
+    with other:
+        other.execute("UPDATE sensors SET temperature = 9.5 WHERE id = 'F2_S1'")
+    other.close()
+    assert repository.version != version
+    assert repository.sensors("F2").temperature[0] == 9.5
+    assert repository.list_raw()[0]["settings"]["temperature_threshold_min"] == -2
+    repository.close()
@@ -0,0 +1,56 @@
+import asyncio
+import socket
+
+from src.services import line_listener as line_listener_module
+from src.services.line_listener import LineProtocolListener
+from src.services.reading_parser import ReadingParser
+from src.services.reading_service import ReadingService
+
+FARMS = {"s1": "finca_a", "s2": "finca_b"}
+
+
+async def exchange(listener, tcp_chunks, datagrams):
+    await listener.start(host="127.0.0.1", tcp_port=0, udp_port=0)
+    try:
+        _, writer = await asyncio.open_connection("127.0.0.1", listener.tcp_port)
+        for chunk in tcp_chunks:
+            writer.write(chunk)
+            await writer.drain()
+            # Cada escritura llega al listener como una lectura distinta
+            await asyncio.sleep(0.05)
+        writer.close()
+        await writer.wait_closed()
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            for datagram in datagrams:
+                udp.sendto(datagram, ("127.0.0.1", listener.udp_port))
+        await asyncio.sleep(0.05)
+    finally:
+        await listener.stop()
+
+
+def test_tcp_and_udp_lines_reach_the_writer(monkeypatch):
+    submitted = []
+
+    async def submit(batch):
+        submitted.extend(zip(batch.sensor_ids.tolist(), batch.temps[:, 1].tolist()))
+
+    monkeypatch.setattr(ReadingService.writer, "submit", submit)
+    monkeypatch.setattr(line_listener_module.config, "READINGS_MAX_LINE_BYTES", 32)
+    listener = LineProtocolListener(batch_size=100, flush_ms=10, max_pending=1000)
+    listener.parser = ReadingParser("line", FARMS.get)
+
+    ts = "2024-01-01T00:00:00Z"
+    asyncio.run(exchange(
+        listener,
+        tcp_chunks=[
+            f"s1 2 5.0 {ts}\n".encode() + b"x" * 40,
+            # Resto de la línea descartada: no debe parsearse como una trama nueva
+            f"s2 2 1.0 {ts}\ns2 2 6.0 {ts}\n".encode(),
+        ],
+        datagrams=[f"s1 2 7.0 {ts}\ns2 2 8.0 {ts}".encode()],
+    ))
+
+    assert sorted(submitted) == [("s1", 5.0), ("s1", 7.0), ("s2", 6.0), ("s2", 8.0)]
+    assert listener.counters["rejected"] == 1
+    assert listener.counters["tcp_connections"] == 1
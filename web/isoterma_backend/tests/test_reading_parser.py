@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from src.services.reading_parser import iter_line_batches
+
+
+async def collect(chunks, **kwargs):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return [batch async for batch in iter_line_batches(stream(), **kwargs)]
+
+
+def test_batches_keep_line_numbers_across_chunks():
+    batches = asyncio.run(collect([b"a\nb", b"b\nc\n", b"d"], batch_size=2, max_line_bytes=8))
+    assert batches == [(1, [b"a", b"bb"]), (3, [b"c", b"d"])]
+
+
+@pytest.mark.parametrize("chunks, line", [
+    ([b"ok\n" + b"x" * 100 + b"\nok\n"], 2),  # línea completa dentro de un chunk
+    ([b"ok\nok\n", b"x" * 60, b"x" * 60 + b"\n"], 3),  # fragmento pendiente entre chunks
+])
+def test_every_line_is_length_checked(chunks, line):
+    with pytest.raises(ValueError, match=f"Line {line} exceeds 64 bytes"):
+        asyncio.run(collect(chunks, batch_size=100, max_line_bytes=64))
@@ -0,0 +1,92 @@
+import random
+
+import numpy as np
+
+from src.models.sensor_array import SensorArray
+from src.services.live_state import LiveSensorState
+from src.services.reading_parser import ReadingBatch
+from src.services.sensor_index import SensorSpatialIndex, haversine_m
+
+
+class StubRepository:
+    version = 1
+
+    def __init__(self, farms):
+        self.farms = farms
+        self.arrays = {farm["id"]: SensorArray.from_dicts(farm["sensors"]) for farm in farms}
+
+    def list_raw(self):
+        return [{"id": farm["id"]} for farm in self.farms]
+
+    def sensors(self, farm_id):
+        return self.arrays[farm_id]
+
+
+def make_index(sensors_per_farm: int = 200, seed: int = 0, live=None) -> SensorSpatialIndex:
+    rng = random.Random(seed)
+    farms = []
+    for f, (lat0, lon0) in enumerate(((-39.16, -67.03), (-38.95, -68.06))):
+        farms.append({
+            "id": f"F_{f}",
+            "sensors": [
+                {"id": f"S_{f}_{i}", "latitude": lat0 + rng.random() * 0.02,
+                 "longitude": lon0 + rng.random() * 0.02, "status": "active", "temperature": 5.0}
+                for i in range(sensors_per_farm)
+            ],
+        })
+    return SensorSpatialIndex(StubRepository(farms), cell_deg=0.001, live=live)
+
+
+def brute_force(index, latitude, longitude, k):
+    distances = sorted(
+        (haversine_m(latitude, longitude, sensor["latitude"], sensor["longitude"]), sensor["id"])
+        for farm in index.repository.farms for sensor in farm["sensors"]
+    )
+    return [sensor_id for _, sensor_id in distances[:k]]
+
+
+def test_nearest_matches_brute_force_near_and_far():
+    index = make_index()
+    rng = random.Random(1)
+    near = [(-39.16 + rng.uniform(-0.01, 0.03), -67.03 + rng.uniform(-0.01, 0.03)) for _ in range(50)]
+    for latitude, longitude in [(-39.15, -67.02), (-38.94, -68.05), (-37.0, -65.0), (10.0, 20.0)] + near:
+        result = index.nearest(latitude, longitude, k=5)
+        assert [sensor["id"] for sensor in result] == brute_force(index, latitude, longitude, 5)
+        assert result == sorted(result, key=lambda sensor: sensor["distance_m"])
+
+
+def test_nearest_far_from_every_sensor_bounded_work(monkeypatch):
+    index = make_index()
+    index.sync()
+    visited = []
+    ring_cells = SensorSpatialIndex._ring_cells
+
+    def counting_ring_cells(row0, col0, ring):
+        cells = list(ring_cells(row0, col0, ring))
+        visited.extend(cells)
+        return cells
+
+    monkeypatch.setattr(SensorSpatialIndex, "_ring_cells", staticmethod(counting_ring_cells))
+    for latitude, longitude in ((-41.0, -70.0), (-39.0, -67.5)):  # ~300 km y entre las dos fincas
+        visited.clear()
+        result = index.nearest(latitude, longitude, k=3)
+        # Nunca más celdas recorridas que celdas ocupadas (lejos de todo, barrido vectorizado)
+        assert len(visited) <= len(index._grid)
+        assert [sensor["id"] for sensor in result] == brute_force(index, latitude, longitude, 3)
+
+
+def test_queries_overlay_live_readings():
+    live = LiveSensorState()
+    index = make_index(live=live)
+    sensor_ids = [sensor["id"] for farm in index.repository.farms for sensor in farm["sensors"]]
+    temps = np.full((len(sensor_ids), 4), np.nan)
+    temps[:, 1] = 2.25
+    live.update(ReadingBatch(
+        np.array(sensor_ids), np.array(["F_0"] * len(sensor_ids)), np.full(len(sensor_ids), 1.7e9), temps
+    ))
+
+    nearest = index.nearest(-39.15, -67.02, k=3)
+    inside = index.query_bbox(-67.03, -39.16, -67.02, -39.15)
+    assert inside and all(sensor["temperature"] == 2.25 for sensor in nearest + inside)
+    # Sin lectura viva queda la temperatura del documento
+    assert all(sensor["temperature"] == 5.0 for sensor in make_index().nearest(-39.15, -67.02, k=3))
@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+
+from src.repositories import timeseries_codec
+from src.repositories.timeseries_store import DAY_SECONDS, TimeSeriesStore
+
+
+def yesterday_noon() -> float:
+    return (time.time() // DAY_SECONDS - 1) * DAY_SECONDS + 12 * 3600
+
+
+def append_points(store: TimeSeriesStore, sensor_id: str, ts: np.ndarray, temp: float = 4.5) -> None:
+    store.append(np.array([sensor_id] * len(ts)), ts, np.full(len(ts), 2, dtype=np.uint8), np.full(len(ts), temp))
+
+
+def test_encode_keeps_points_appended_while_encoding(tmp_path, monkeypatch):
+    store = TimeSeriesStore(tmp_path)
+    start = yesterday_noon()
+    append_points(store, "S1", start + np.arange(100) * 60.0)
+    append_points(store, "S2", start + np.arange(100) * 60.0)
+
+    write_chunks = timeseries_codec.write_chunks
+
+    def late_append(chunks):
+        # Lectura tardía del mismo día mientras se codifica fuera del lock
+        append_points(store, "S1", np.array([start + 30.0]), temp=9.0)
+        return write_chunks(chunks)
+
+    monkeypatch.setattr(timeseries_codec, "write_chunks", late_append)
+    assert store.maintain()["compacted"] >= 1
+
+    raw = store.query("S1", 2, start - 1, start + DAY_SECONDS / 2, "raw")
+    assert len(raw["ts"]) == 101
+    assert len(set(raw["ts"])) == 101
+    assert raw["temperature"][1] == 9.0
+    assert len(store.query("S2", 2, start - 1, start + DAY_SECONDS / 2, "raw")["ts"]) == 100
+
+    # El punto tardío quedó en un .bin nuevo y se incorpora en el siguiente mantenimiento
+    monkeypatch.setattr(timeseries_codec, "write_chunks", write_chunks)
+    store.maintain()
+    assert not list((tmp_path / "raw").glob("*.bin"))
+    assert store.query("S1", 2, start - 1, start + DAY_SECONDS / 2, "raw") == raw
+
+
+def test_rollup_query_reads_only_its_series_after_compaction(tmp_path, monkeypatch):
+    store = TimeSeriesStore(tmp_path)
+    start = yesterday_noon() - DAY_SECONDS
+    ts = start + np.arange(0, 2 * DAY_SECONDS - 13 * 3600, 600.0)
+    for i in range(20):
+        append_points(store, f"S{i}", ts, temp=float(i))
+    # Parciales tardíos del mismo bucket: se combinan al compactar
+    append_points(store, "S7", ts[:3], temp=20.0)
+
+    before = {resolution: store.query("S7", 2, start, start + 2 * DAY_SECONDS, resolution) for resolution in ("15m", "1h")}
+    store.maintain()
+    assert list((tmp_path / "1h").glob("*.srt")) and not list((tmp_path / "1h").glob("*.bin"))
+
+    read_whole = []
+    read_partition = TimeSeriesStore._read_partition
+    monkeypatch.setattr(TimeSeriesStore, "_read_partition", lambda self, path, dtype: read_whole.append(path) or read_partition(self, path, dtype))
+    for resolution, expected in before.items():
+        assert store.query("S7", 2, start, start + 2 * DAY_SECONDS, resolution) == expected
+    # Los días cerrados no se leen enteros: solo el slice de la serie
+    assert not [path for path in read_whole if path.suffix == ".srt"]
+    assert before["1h"]["max"][0] == 20.0 and before["1h"]["min"][0] == 7.0
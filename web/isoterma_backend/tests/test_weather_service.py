@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.services import weather_service
+from src.services.weather_cache import WeatherCache
+from src.services.weather_service import WeatherService
+
+VARIABLES = {"current": ["temperature_2m"]}
+
+
+def payload(latitude: str) -> dict:
+    return {"latitude": float(latitude), "current": {"time": "2026-10-18T09:00", "temperature_2m": float(latitude)}}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Open-Meteo falso: responde cada chunk salvo los que contienen una latitud marcada como caída"""
+    failing = set()
+
+    async def get_json(url, params, timeout=None):
+        latitudes = params["latitude"].split(",")
+        if failing & set(latitudes):
+            raise httpx.ConnectError("upstream down")
+        payloads = [payload(latitude) for latitude in latitudes]
+        return payloads if len(payloads) > 1 else payloads[0]
+
+    monkeypatch.setattr(weather_service, "get_json", get_json)
+    monkeypatch.setattr(WeatherService, "cache", WeatherCache())
+    monkeypatch.setattr(weather_service.config, "WEATHER_BATCH_CHUNK_SIZE", 2)
+    return failing
+
+
+def test_failed_chunk_only_blanks_its_locations(upstream):
+    locations = [(-30.0 - i, -60.0) for i in range(5)]
+    upstream.add("-32.0")
+
+    results = asyncio.run(WeatherService._fetch_many(locations, VARIABLES))
+
+    # Chunks de 2: el segundo (-32, -33) cae, el resto se devuelve igual
+    assert [result is None for result in results] == [False, False, True, True, False]
+    assert results[4]["current"]["temperature_2m"] == -34.0
+
+
+def test_every_chunk_failing_raises(upstream):
+    upstream.update({"-30.0", "-32.0"})
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(WeatherService._fetch_many([(-30.0, -60.0), (-32.0, -60.0)], VARIABLES))
@@ -1,14 +1,24 @@
 const API_BASE_URL = 'http://localhost:8000/api/v1';
 
 export const api = {
-	async getFarms() {
-		const res = await fetch(`${API_BASE_URL}/farms`);
-		if (!res.ok) throw new Error('Error fetching farms');
-		return res.json();
+	async getFarms(fields: string = 'id,name,location') {
+		// Resúmenes sin sensores; recorre todas las páginas del cursor
+		const farms: any[] = [];
+		let cursor: string | null = null;
+		do {
+			const params = new URLSearchParams({ fields });
+			if (cursor) params.set('cursor', cursor);
+			const res = await fetch(`${API_BASE_URL}/farms?${params}`);
+			if (!res.ok) throw new Error('Error fetching farms');
+			const page = await res.json();
+			farms.push(...page.farms);
+			cursor = page.next_cursor;
+		} while (cursor);
+		return { success: true, farms };
 	},
 
 	async getFarm(id: string) {
-		const res = await fetch(`${API_BASE_URL}/farms/${id}`);
+		const res = await fetch(`${API_BASE_URL}/farms/${id}?include=sensors`);
 		if (!res.ok) throw new Error('Error fetching farm');
 		return res.json();
 	},